@@ -0,0 +1,111 @@
+"""Matching incoming alarms against the configured activation groups.
+
+An alarm is accepted when one of the ``activation_groups`` equals one of its
+``dispatch_group_codes`` or occurs in one of its ``dispatch_groups`` texts,
+both compared case-insensitively.  With several hundred AAO groups configured
+the naive filters × texts substring search dominates alarm processing, so the
+groups are compiled once into a code set plus an Aho-Corasick automaton that
+scans every dispatch text in a single pass.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+class ActivationMatcher:
+    """Compiled form of an ``activation_groups`` list."""
+
+    def __init__(self, groups: Iterable[str]) -> None:
+        patterns = sorted({str(group).upper() for group in groups})
+        self.codes: FrozenSet[str] = frozenset(patterns)
+        # An empty filter is contained in every text.
+        self._matches_any_text = "" in self.codes
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[bool] = [False]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+            state = following
+        self._terminal[state] = True
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and propagate terminal states."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._terminal[following] = (
+                    self._terminal[following] or self._terminal[self._fail[following]]
+                )
+                queue.append(following)
+
+    def search(self, text: str) -> bool:
+        """Return True if any group occurs in the already upper-cased *text*."""
+        if self._matches_any_text:
+            return True
+        goto, fail, terminal = self._goto, self._fail, self._terminal
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+    def matches(self, alarm: Dict[str, Any]) -> bool:
+        """Return True if *alarm* is addressed to one of the groups."""
+        for code in alarm.get("dispatch_group_codes") or []:
+            if isinstance(code, str) and code.upper() in self.codes:
+                return True
+        dispatch_groups = alarm.get("dispatch_groups")
+        if isinstance(dispatch_groups, list):
+            texts: Sequence[Any] = dispatch_groups
+        elif isinstance(dispatch_groups, str):
+            texts = (dispatch_groups,)
+        else:
+            return False
+        return any(self.search(str(text).upper()) for text in texts)
+
+
+@lru_cache(maxsize=8)
+def _compile(groups: Tuple[str, ...]) -> ActivationMatcher:
+    return ActivationMatcher(groups)
+
+
+def activation_matcher(groups: Optional[Sequence[str]]) -> Optional[ActivationMatcher]:
+    """Return the cached matcher for *groups*, or None when no filter is set.
+
+    The settings snapshot hands out the same list until the groups are
+    changed, so in practice every alarm after the first hits the cache.
+    """
+    if not groups:
+        return None
+    return _compile(tuple(groups))
+
+
+__all__ = ["ActivationMatcher", "activation_matcher"]
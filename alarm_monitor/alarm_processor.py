@@ -3,110 +3,30 @@
 from __future__ import annotations
 
 import logging
-import re
-from typing import Any, Callable, Dict, List, Optional, Set
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
-LOGGER = logging.getLogger(__name__)
+from .activation import activation_matcher
+from .alarm_schema import ALARM_VALIDATOR, AlarmValidationError
 
-_INCIDENT_NUMBER_RE = re.compile(r'^[A-Za-z0-9\-_]{1,50}$')
+LOGGER = logging.getLogger(__name__)
 
-_OPTIONAL_STRING_FIELDS = (
-    "keyword", "subject", "location", "diagnosis",
-    "remark", "timestamp", "timestamp_display", "keyword_secondary",
-)
-_OPTIONAL_LIST_FIELDS = (
-    "groups", "aao_groups", "dispatch_group_codes",
-)
-_OPTIONAL_LIST_OR_STRING_FIELDS = (
-    "dispatch_groups",
-)
+# Enrichment results of a replayed backlog are written back in chunks of
+# this many alarms, each with one store update and persist.
+_BATCH_ENRICHMENT_CHUNK = 10
 
 
 def validate_alarm_payload(alarm: dict) -> None:
-    """Validate alarm payload fields.
+    """Validate alarm payload fields against the compiled alarm schema.
 
     incident_number is required and must be 1–50 alphanumeric/dash/underscore chars.
     When other optional fields are present they must satisfy their constraints.
 
     Raises:
-        ValueError: if any field violates its constraint.
+        AlarmValidationError: a ``ValueError`` listing every violated constraint.
     """
-    if "incident_number" not in alarm or not alarm.get("incident_number"):
-        raise ValueError("incident_number is required")
-
-    incident_number = alarm.get("incident_number")
-    if not isinstance(incident_number, str):
-        raise ValueError("incident_number must be a string")
-    if not _INCIDENT_NUMBER_RE.match(incident_number):
-        raise ValueError(
-            "incident_number must be 1–50 characters matching ^[A-Za-z0-9\\-_]+$"
-        )
-
-    for field in _OPTIONAL_STRING_FIELDS:
-        value = alarm.get(field)
-        if value is not None:
-            if not isinstance(value, str):
-                raise ValueError(f"{field} must be a string")
-            if len(value) > 500:
-                raise ValueError(f"{field} must not exceed 500 characters")
-
-    for field in _OPTIONAL_LIST_FIELDS:
-        value = alarm.get(field)
-        if value is not None:
-            if not isinstance(value, list):
-                raise ValueError(f"{field} must be a list")
-            for i, item in enumerate(value):
-                if not isinstance(item, str):
-                    raise ValueError(f"{field}[{i}] must be a string")
-                if len(item) > 200:
-                    raise ValueError(f"{field}[{i}] must not exceed 200 characters")
-
-    for field in _OPTIONAL_LIST_OR_STRING_FIELDS:
-        value = alarm.get(field)
-        if value is not None:
-            if not isinstance(value, (list, str)):
-                raise ValueError(f"{field} must be a list or string")
-            if isinstance(value, list):
-                for i, item in enumerate(value):
-                    if not isinstance(item, str):
-                        raise ValueError(f"{field}[{i}] must be a string")
-                    if len(item) > 200:
-                        raise ValueError(f"{field}[{i}] must not exceed 200 characters")
-
-    lat = alarm.get("latitude")
-    if lat is not None:
-        try:
-            lat_f = float(lat)
-        except (TypeError, ValueError):
-            raise ValueError("latitude must be a number")
-        if not (-90 <= lat_f <= 90):
-            raise ValueError("latitude must be between -90 and 90")
-
-    lon = alarm.get("longitude")
-    if lon is not None:
-        try:
-            lon_f = float(lon)
-        except (TypeError, ValueError):
-            raise ValueError("longitude must be a number")
-        if not (-180 <= lon_f <= 180):
-            raise ValueError("longitude must be between -180 and 180")
-
-    has_lat = alarm.get("latitude") is not None
-    has_lon = alarm.get("longitude") is not None
-    if has_lat != has_lon:
-        raise ValueError("latitude and longitude must be provided together")
-
-    ld = alarm.get("location_details")
-    if ld is not None:
-        if not isinstance(ld, dict):
-            raise ValueError("location_details must be a dict")
-        for key, val in ld.items():
-            if not isinstance(key, str):
-                raise ValueError("location_details keys must be strings")
-            if val is not None and not isinstance(val, str):
-                raise ValueError(f"location_details.{key} must be a string or null")
-            if isinstance(val, str) and len(val) > 500:
-                raise ValueError(f"location_details.{key} must not exceed 500 characters")
+    ALARM_VALIDATOR.validate(alarm)
 
 
 def _serialize_history_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
@@ -138,12 +58,102 @@ def _serialize_history_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _increment_error_metric(name: str) -> None:
+    try:
+        from .app import _increment_metric
+        _increment_metric(name)
+    except ImportError:
+        pass
+
+
+def _lookup_enrichment(
+    alarm: Dict[str, Any],
+    config: Any,
+    session: Any,
+    trace: Any = None,
+) -> Tuple[Optional[Dict[str, float]], Optional[Dict[str, Any]]]:
+    """Return ``(coordinates, weather)`` for *alarm*; failures yield None."""
+    from .geocode import geocode_location
+    from .weather import fetch_weather
+
+    location = alarm.get("location")
+    coordinates: Optional[Dict[str, float]] = None
+    weather = None
+
+    lat = alarm.get("latitude")
+    lon = alarm.get("longitude")
+    if lat is not None and lon is not None:
+        try:
+            coordinates = {"lat": float(lat), "lon": float(lon)}
+        except (TypeError, ValueError):
+            coordinates = None
+
+    if coordinates is None and location:
+        try:
+            coordinates = geocode_location(config.nominatim_base_url, location, session=session)
+        except Exception as exc:
+            LOGGER.warning("Failed to geocode location %s: %s", location, exc)
+            _increment_error_metric("geocode_errors")
+
+    if coordinates and trace is not None:
+        trace.mark("geocoded")
+
+    if coordinates:
+        try:
+            weather = fetch_weather(
+                config.weather_base_url,
+                config.weather_params,
+                float(coordinates["lat"]),
+                float(coordinates["lon"]),
+                session=session,
+            )
+            if trace is not None:
+                trace.mark("weather")
+        except Exception as exc:
+            LOGGER.warning("Failed to fetch weather: %s", exc)
+            _increment_error_metric("weather_errors")
+
+    return coordinates, weather
+
+
+def _prefetch_route(
+    coordinates: Optional[Dict[str, float]],
+    effective_settings: Mapping[str, Any],
+    config: Any,
+    route_cache: Any,
+) -> None:
+    """Compute the route from the station so it is cached before the
+    first kiosk or navigation page asks for it."""
+    if not coordinates or route_cache is None or not config.ors_api_key:
+        return
+    start_lat = effective_settings.get("default_latitude")
+    start_lon = effective_settings.get("default_longitude")
+    if start_lat is not None and start_lon is not None:
+        route_cache.prefetch(
+            config.ors_api_key,
+            float(start_lat),
+            float(start_lon),
+            float(coordinates["lat"]),
+            float(coordinates["lon"]),
+        )
+
+
+def _submit(task: Callable[[], None], executor: Any) -> None:
+    if executor is not None:
+        executor.submit(task)
+    else:
+        import threading
+        threading.Thread(target=task, daemon=True).start()
+
+
 def process_alarm(
     alarm: Dict[str, Any],
     store: Any,
     config: Any,
     get_settings: Callable[[], Dict[str, Any]],
     executor: Any = None,
+    trace: Any = None,
+    route_cache: Any = None,
 ) -> bool:
     """Process incoming alarm data: filter, geocode, fetch weather, and store.
 
@@ -157,13 +167,21 @@ def process_alarm(
         config: The AppConfig instance.
         get_settings: Callable returning current effective settings dict.
         executor: Optional ThreadPoolExecutor for background tasks.
+        trace: Optional :class:`~alarm_monitor.tracing.AlarmTrace` that receives
+            pipeline timing spans.
+        route_cache: Optional :class:`~alarm_monitor.route_cache.RouteCache`;
+            the route from the station to the geocoded destination is
+            precomputed into it after enrichment.
 
     Returns:
         True if the alarm was accepted and stored, False if it was silently dropped.
     """
     LOGGER.info("Processing alarm: %s", alarm.get("incident_number"))
+    accepted_at = time.monotonic()
 
     validate_alarm_payload(alarm)
+    if trace is not None:
+        trace.mark("validated")
 
     incident_number = alarm.get("incident_number")
 
@@ -176,35 +194,13 @@ def process_alarm(
 
     effective_settings = get_settings()
     activation_filters = effective_settings.get("activation_groups", [])
-    if activation_filters:
-        dispatch_codes: Set[str] = set()
-        for code in alarm.get("dispatch_group_codes") or []:
-            if isinstance(code, str):
-                dispatch_codes.add(code.upper())
-
-        dispatch_texts: List[str] = []
-        dispatch_groups = alarm.get("dispatch_groups")
-        if isinstance(dispatch_groups, list):
-            dispatch_texts = [str(item).upper() for item in dispatch_groups]
-        elif isinstance(dispatch_groups, str):
-            dispatch_texts = [dispatch_groups.upper()]
-
-        match_found = False
-        for target in activation_filters:
-            target_upper = target.upper()
-            if target_upper in dispatch_codes:
-                match_found = True
-                break
-            if any(target_upper in text for text in dispatch_texts):
-                match_found = True
-                break
-
-        if not match_found:
-            LOGGER.info(
-                "Ignoring alarm without configured groups: filters=%s",
-                activation_filters,
-            )
-            return False
+    matcher = activation_matcher(activation_filters)
+    if matcher is not None and not matcher.matches(alarm):
+        LOGGER.info(
+            "Ignoring alarm without configured groups: filters=%s",
+            activation_filters,
+        )
+        return False
 
     # Store immediately with no coordinates/weather
     alarm_payload: Dict[str, Any] = {
@@ -213,67 +209,140 @@ def process_alarm(
         "weather": None,
     }
     store.update(alarm_payload)
+    if trace is not None:
+        trace.mark("stored")
 
     # Run geocoding + weather in the background
     def _enrich() -> None:
         import requests as _requests
-        from .geocode import geocode_location
-        from .weather import fetch_weather
 
         session = _requests.Session()
         try:
-            location = alarm.get("location")
-            coordinates: Optional[Dict[str, float]] = None
-            weather = None
-
-            lat = alarm.get("latitude")
-            lon = alarm.get("longitude")
-            if lat is not None and lon is not None:
-                try:
-                    coordinates = {"lat": float(lat), "lon": float(lon)}
-                except (TypeError, ValueError):
-                    coordinates = None
-
-            if coordinates is None and location:
-                try:
-                    coordinates = geocode_location(config.nominatim_base_url, location, session=session)
-                except Exception as exc:
-                    LOGGER.warning("Failed to geocode location %s: %s", location, exc)
-                    try:
-                        from .app import _increment_metric
-                        _increment_metric("geocode_errors")
-                    except ImportError:
-                        pass
-
-            if coordinates:
-                try:
-                    weather = fetch_weather(
-                        config.weather_base_url,
-                        config.weather_params,
-                        float(coordinates["lat"]),
-                        float(coordinates["lon"]),
-                        session=session,
-                    )
-                except Exception as exc:
-                    LOGGER.warning("Failed to fetch weather: %s", exc)
-                    try:
-                        from .app import _increment_metric
-                        _increment_metric("weather_errors")
-                    except ImportError:
-                        pass
+            coordinates, weather = _lookup_enrichment(alarm, config, session, trace)
 
             # Update the stored alarm with enriched data
             store.update_enrichment(incident_number, coordinates, weather)
+            if trace is not None:
+                trace.mark("enriched")
+
+            from .metrics import ALARM_ENRICHMENT_SECONDS
+            ALARM_ENRICHMENT_SECONDS.observe(time.monotonic() - accepted_at)
+
+            _prefetch_route(coordinates, effective_settings, config, route_cache)
         finally:
             session.close()
 
-    if executor is not None:
-        executor.submit(_enrich)
-    else:
-        import threading
-        threading.Thread(target=_enrich, daemon=True).start()
-
+    _submit(_enrich, executor)
     return True
 
 
-__all__ = ["process_alarm", "validate_alarm_payload", "_serialize_history_entry"]
+@dataclass
+class AlarmBatchResult:
+    """Outcome of :func:`process_alarm_batch`."""
+
+    stored: List[Dict[str, Any]] = field(default_factory=list)
+    duplicates: List[str] = field(default_factory=list)
+    filtered: List[str] = field(default_factory=list)
+
+
+def process_alarm_batch(
+    alarms: List[Any],
+    store: Any,
+    config: Any,
+    get_settings: Callable[[], Mapping[str, Any]],
+    executor: Any = None,
+    route_cache: Any = None,
+) -> AlarmBatchResult:
+    """Store a replayed backlog of alarms in one transaction.
+
+    All payloads are validated first; if any is invalid nothing is stored.
+    Alarms whose incident number is already stored or occurs earlier in the
+    batch count as duplicates, alarms for other groups are filtered like in
+    :func:`process_alarm`.  The remaining alarms are committed with a single
+    store update and persist, and enriched by one background job that
+    shares its HTTP session.  The alarm on screen is enriched, written back
+    and routed first; the rest of the backlog follows in small chunks without
+    a route prefetch.
+
+    Raises:
+        AlarmValidationError: listing the violations of every invalid alarm,
+            prefixed with its index (``alarms[2]: keyword must be a string``).
+    """
+    errors = [
+        f"alarms[{index}]: {message}"
+        for index, alarm in enumerate(alarms)
+        for message in ALARM_VALIDATOR.errors(alarm)
+    ]
+    if errors:
+        raise AlarmValidationError(errors)
+    LOGGER.info("Processing batch of %d alarms", len(alarms))
+    accepted_at = time.monotonic()
+
+    effective_settings = get_settings()
+    matcher = activation_matcher(effective_settings.get("activation_groups", []))
+    result = AlarmBatchResult()
+    seen = set()
+    for alarm in alarms:
+        incident_number = alarm["incident_number"]
+        if incident_number in seen or store.has_incident_number(incident_number):
+            result.duplicates.append(incident_number)
+        elif matcher is not None and not matcher.matches(alarm):
+            result.filtered.append(incident_number)
+        else:
+            result.stored.append(alarm)
+        seen.add(incident_number)
+    if result.duplicates or result.filtered:
+        LOGGER.info(
+            "Ignoring %d duplicate and %d filtered alarms of the batch",
+            len(result.duplicates),
+            len(result.filtered),
+        )
+    if not result.stored:
+        return result
+
+    store.update_many([
+        {"alarm": alarm, "coordinates": None, "weather": None} for alarm in result.stored
+    ])
+    stored = list(result.stored)
+
+    def _enrich_batch() -> None:
+        import requests as _requests
+        from .metrics import ALARM_ENRICHMENT_SECONDS
+
+        latest = store.latest() or {}
+        displayed = (latest.get("alarm") or {}).get("incident_number")
+        ordered = sorted(stored, key=lambda alarm: alarm["incident_number"] != displayed)
+        chunks = [ordered[:1]] + [
+            ordered[start:start + _BATCH_ENRICHMENT_CHUNK]
+            for start in range(1, len(ordered), _BATCH_ENRICHMENT_CHUNK)
+        ]
+        session = _requests.Session()
+        try:
+            for chunk in chunks:
+                enrichments = {
+                    alarm["incident_number"]: _lookup_enrichment(alarm, config, session)
+                    for alarm in chunk
+                }
+                store.update_enrichment_many(enrichments)
+                elapsed = time.monotonic() - accepted_at
+                for _ in enrichments:
+                    ALARM_ENRICHMENT_SECONDS.observe(elapsed)
+                # Only the alarm on screen needs its route; prefetching the
+                # backlog would spend ORS quota and evict live routes.
+                if displayed in enrichments:
+                    coordinates, _ = enrichments[displayed]
+                    _prefetch_route(coordinates, effective_settings, config, route_cache)
+        finally:
+            session.close()
+
+    _submit(_enrich_batch, executor)
+    return result
+
+
+__all__ = [
+    "AlarmBatchResult",
+    "process_alarm",
+    "process_alarm_batch",
+    "validate_alarm_payload",
+    "_serialize_history_entry",
+]
@@ -0,0 +1,207 @@
+"""Declarative schema and compiled validator for incoming alarm payloads.
+
+The fields accepted from alarm-mail are described once in
+:data:`ALARM_SCHEMA`.  :func:`compile_schema` generates one validation
+function from it with every name and limit inlined, so a payload is checked
+in a single pass that reports every violation instead of only the first.
+:data:`ALARM_VALIDATOR` is built at import time and shared by all ingest
+paths; validation runs for every alarm-mail delivery including retries.
+"""
+
+from __future__ import annotations
+
+import re
+import textwrap
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_INCIDENT_NUMBER_RE = re.compile(r'^[A-Za-z0-9\-_]{1,50}$')
+
+
+class AlarmValidationError(ValueError):
+    """Raised for an invalid alarm payload; ``errors`` lists every violation."""
+
+    def __init__(self, errors: Sequence[str]) -> None:
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Constraints for one payload field.
+
+    ``kind`` is one of ``incident_number``, ``string``, ``string_list``,
+    ``string_or_list``, ``number`` or ``string_map``.  ``max_length`` limits
+    strings, list items and map values; ``minimum``/``maximum`` bound numbers.
+    Absent and ``None`` values are accepted unless the field is ``required``.
+    """
+
+    name: str
+    kind: str
+    required: bool = False
+    max_length: Optional[int] = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+
+ALARM_SCHEMA: Tuple[FieldSpec, ...] = (
+    FieldSpec("incident_number", "incident_number", required=True),
+    *(
+        FieldSpec(name, "string", max_length=500)
+        for name in (
+            "keyword", "subject", "location", "diagnosis",
+            "remark", "timestamp", "timestamp_display", "keyword_secondary",
+        )
+    ),
+    *(
+        FieldSpec(name, "string_list", max_length=200)
+        for name in ("groups", "aao_groups", "dispatch_group_codes")
+    ),
+    FieldSpec("dispatch_groups", "string_or_list", max_length=200),
+    FieldSpec("latitude", "number", minimum=-90, maximum=90),
+    FieldSpec("longitude", "number", minimum=-180, maximum=180),
+    FieldSpec("location_details", "string_map", max_length=500),
+)
+# Fields that must be given together or not at all.
+ALARM_FIELD_PAIRS: Tuple[Tuple[str, str], ...] = (("latitude", "longitude"),)
+
+
+# Source templates per field kind.  ``value`` holds the field's value and is
+# known to be not None; ``{name}``, ``{limit}``, ``{minimum}`` and
+# ``{maximum}`` are filled in from the FieldSpec.
+# Lists are scanned without enumerate() first; only an offending list is
+# walked again to name the bad items.
+_ITEMS_TEMPLATE = """\
+for item in value:
+    if item.__class__ is not str or len(item) > {limit}:
+        for index, item in enumerate(value):
+            if not isinstance(item, str):
+                errors.append(f"{name}[{{index}}] must be a string")
+            elif len(item) > {limit}:
+                errors.append(f"{name}[{{index}}] must not exceed {limit} characters")
+        break
+"""
+_TEMPLATES = {
+    "incident_number": """\
+if not isinstance(value, str):
+    errors.append("{name} must be a string")
+elif not _incident_number_match(value):
+    errors.append("{name} must be 1–50 characters matching ^[A-Za-z0-9\\\\-_]+$")
+""",
+    "string": """\
+if not isinstance(value, str):
+    errors.append("{name} must be a string")
+elif len(value) > {limit}:
+    errors.append("{name} must not exceed {limit} characters")
+""",
+    "string_list": """\
+if not isinstance(value, list):
+    errors.append("{name} must be a list")
+else:
+""" + textwrap.indent(_ITEMS_TEMPLATE, "    "),
+    "string_or_list": """\
+if isinstance(value, list):
+""" + textwrap.indent(_ITEMS_TEMPLATE, "    ") + """\
+elif not isinstance(value, str):
+    errors.append("{name} must be a list or string")
+""",
+    "number": """\
+try:
+    number = float(value)
+except (TypeError, ValueError):
+    errors.append("{name} must be a number")
+else:
+    if not ({minimum!r} <= number <= {maximum!r}):
+        errors.append("{name} must be between {minimum:g} and {maximum:g}")
+""",
+    "string_map": """\
+if not isinstance(value, dict):
+    errors.append("{name} must be a dict")
+else:
+    for key, item in value.items():
+        if not isinstance(key, str):
+            errors.append("{name} keys must be strings")
+        elif item is not None and not isinstance(item, str):
+            errors.append(f"{name}.{{key}} must be a string or null")
+        elif item is not None and len(item) > {limit}:
+            errors.append(f"{name}.{{key}} must not exceed {limit} characters")
+""",
+}
+
+
+class AlarmValidator:
+    """A schema compiled into a single validation function."""
+
+    def __init__(self, check: Callable[[Dict[str, Any]], List[str]], source: str) -> None:
+        self._check = check
+        self.source = source
+
+    def errors(self, alarm: Any) -> List[str]:
+        """Return every violation in *alarm* (empty if it is valid)."""
+        if not isinstance(alarm, dict):
+            return ["alarm payload must be an object"]
+        return self._check(alarm)
+
+    def validate(self, alarm: Any) -> None:
+        """Raise :class:`AlarmValidationError` listing all violations."""
+        errors = self.errors(alarm)
+        if errors:
+            raise AlarmValidationError(errors)
+
+
+def compile_schema(
+    schema: Sequence[FieldSpec],
+    pairs: Sequence[Tuple[str, str]] = (),
+) -> AlarmValidator:
+    """Build an :class:`AlarmValidator` for *schema*.
+
+    The checks of all fields are generated into the source of one function,
+    with names and limits as literals, so a payload is validated without a
+    call or lookup per field.  The generated code is kept in
+    ``AlarmValidator.source`` for debugging.
+
+    Raises:
+        ValueError: if a field uses an unknown ``kind`` or a name that is not
+            a plain identifier.
+    """
+    lines = ["def check(alarm):", "    errors = []", "    get = alarm.get"]
+    for spec in schema:
+        template = _TEMPLATES.get(spec.kind)
+        if template is None:
+            raise ValueError(f"Unknown field kind {spec.kind!r} for {spec.name}")
+        if not spec.name.isidentifier():
+            raise ValueError(f"Invalid field name {spec.name!r}")
+        body = template.format(
+            name=spec.name, limit=spec.max_length, minimum=spec.minimum, maximum=spec.maximum
+        )
+        lines.append(f"    value = get({spec.name!r})")
+        if spec.required:
+            lines.append("    if not value:")
+            lines.append(f'        errors.append("{spec.name} is required")')
+            lines.append("    else:")
+        else:
+            lines.append("    if value is not None:")
+        lines.append(textwrap.indent(body, "        ").rstrip("\n"))
+    for first, second in pairs:
+        lines.append(f"    if (get({first!r}) is None) != (get({second!r}) is None):")
+        lines.append(f'        errors.append("{first} and {second} must be provided together")')
+    lines.append("    return errors")
+    source = "\n".join(lines) + "\n"
+
+    namespace: Dict[str, Any] = {"_incident_number_match": _INCIDENT_NUMBER_RE.match}
+    exec(compile(source, "<alarm-schema>", "exec"), namespace)
+    return AlarmValidator(namespace["check"], source)
+
+
+ALARM_VALIDATOR = compile_schema(ALARM_SCHEMA, ALARM_FIELD_PAIRS)
+
+
+__all__ = [
+    "ALARM_FIELD_PAIRS",
+    "ALARM_SCHEMA",
+    "ALARM_VALIDATOR",
+    "AlarmValidationError",
+    "AlarmValidator",
+    "FieldSpec",
+    "compile_schema",
+]
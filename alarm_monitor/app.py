@@ -13,28 +13,76 @@ import time
 import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional
 
-from flask import Flask, request
+from flask import Flask, g, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from .calendar_cache import CalendarCache
 from .config import AppConfig, load_config
 from .cec_controller import create_cec_display_watcher, get_hdmi_cec_settings, is_cec_client_available
-from .messenger import create_messenger
+from .hooks import AlarmHooks
+from .messenger import ParticipantPoller, create_messenger
 from .message_store import MessageStore
+from .metrics import HTTP_REQUEST_SECONDS
 from .ntfy_client import create_ntfy_poller
+from .road_graph import load_road_graph
+from .route_cache import RouteCache
+from .static_assets import register_static_assets, static_url
 from .storage import AlarmStore, SettingsStore
+from .tracing import AlarmTracer
 from .warnings_cache import WarningsCache
 from .weather_cache import WeatherCache
 
 LOGGER = logging.getLogger(__name__)
 
-_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+class _CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Thread pool that counts submitted tasks not yet picked up by a worker."""
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers)
+        self._waiting_lock = threading.Lock()
+        self._waiting = 0
+
+    @property
+    def queue_depth(self) -> int:
+        with self._waiting_lock:
+            return self._waiting
+
+    def _dequeued(self) -> None:
+        with self._waiting_lock:
+            self._waiting -= 1
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> concurrent.futures.Future:
+        def _run() -> Any:
+            self._dequeued()
+            return fn(*args, **kwargs)
+
+        def _on_done(future: concurrent.futures.Future) -> None:
+            # A task cancelled while queued never reaches _run.
+            if future.cancelled():
+                self._dequeued()
+
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            future = super().submit(_run)
+        except BaseException:
+            self._dequeued()
+            raise
+        future.add_done_callback(_on_done)
+        return future
+
+
+_executor = _CountingExecutor(max_workers=4)
 atexit.register(_executor.shutdown, wait=False)
 
 _INCIDENT_NUMBER_RE = re.compile(r'^[A-Za-z0-9\-_]{1,50}$')
 
+# Endpoints that set their own content-addressed caching headers.
+_SELF_CACHING_ENDPOINTS = frozenset({"static", "api.api_logo"})
+
 # Module-level limiter – initialized with app in create_app() via init_app().
 # Blueprint route handlers import this to apply per-route limits.
 _limiter = Limiter(key_func=get_remote_address)
@@ -52,10 +100,15 @@ _metrics = {
 }
 
 
-def _increment_metric(name: str) -> None:
+def _increment_metric(name: str, amount: int = 1) -> None:
     """Atomically increment a named metric counter."""
     with _metrics_lock:
-        _metrics[name] = _metrics.get(name, 0) + 1
+        _metrics[name] = _metrics.get(name, 0) + amount
+
+
+def _executor_queue_depth() -> int:
+    """Return the number of background tasks waiting for a free worker."""
+    return _executor.queue_depth
 
 
 def generate_csrf_token(settings_password: str) -> str:
@@ -80,44 +133,38 @@ def generate_csrf_token_for_hour_offset(settings_password: str, hour_offset: int
 
 
 # ---------------------------------------------------------------------------
-# Module-level helper for effective settings
+# Defaults for the effective settings
 # ---------------------------------------------------------------------------
 
 
-def get_effective_settings(settings_store: SettingsStore, config: AppConfig) -> Dict[str, Any]:
-    """Get effective settings merging stored values with config defaults."""
-    stored = settings_store.get_all()
+def settings_defaults(config: AppConfig) -> Dict[str, Any]:
+    """Return the config defaults behind every user-configurable setting.
+
+    The :class:`SettingsStore` merges stored values over these to form the
+    effective settings snapshot.
+    """
     return {
-        "fire_department_name": stored.get("fire_department_name", config.fire_department_name),
-        "default_latitude": stored.get("default_latitude", config.default_latitude),
-        "default_longitude": stored.get("default_longitude", config.default_longitude),
-        "default_location_name": stored.get("default_location_name", config.default_location_name),
-        "activation_groups": stored.get("activation_groups", config.activation_groups),
-        "calendar_urls": stored.get("calendar_urls", config.calendar_urls),
-        "ntfy_topic_url": stored.get("ntfy_topic_url", config.ntfy_topic_url),
-        "ntfy_poll_interval": stored.get("ntfy_poll_interval", config.ntfy_poll_interval),
-        "message_default_ttl_minutes": stored.get("message_default_ttl_minutes", 60),
-        "dwd_warnings_mock": stored.get("dwd_warnings_mock", config.dwd_warnings_mock),
-        "show_last_alarm": stored.get("show_last_alarm", config.show_last_alarm),
-        "warnings_min_level": stored.get("warnings_min_level", config.warnings_min_level),
-        "hdmi_cec_enabled": stored.get("hdmi_cec_enabled", config.cec_enabled),
-        "hdmi_cec_client_path": stored.get("hdmi_cec_client_path", config.cec_client_path),
-        "hdmi_cec_device_address": stored.get(
-            "hdmi_cec_device_address", config.cec_device_address
-        ),
-        "hdmi_cec_idle_standby_minutes": stored.get(
-            "hdmi_cec_idle_standby_minutes", config.cec_idle_standby_minutes
-        ),
-        "hdmi_cec_wake_on_alarm": stored.get(
-            "hdmi_cec_wake_on_alarm", config.cec_wake_on_alarm
-        ),
-        "hdmi_cec_standby_on_idle": stored.get(
-            "hdmi_cec_standby_on_idle", config.cec_standby_on_idle
-        ),
-        "hdmi_cec_schedules": stored.get("hdmi_cec_schedules", []),
-        "hdmi_cec_linux_device": stored.get(
-            "hdmi_cec_linux_device", config.cec_linux_device
-        ),
+        "fire_department_name": config.fire_department_name,
+        "default_latitude": config.default_latitude,
+        "default_longitude": config.default_longitude,
+        "default_location_name": config.default_location_name,
+        "activation_groups": config.activation_groups,
+        "calendar_urls": config.calendar_urls,
+        "ntfy_topic_url": config.ntfy_topic_url,
+        "ntfy_poll_interval": config.ntfy_poll_interval,
+        "ntfy_mode": config.ntfy_mode,
+        "message_default_ttl_minutes": 60,
+        "dwd_warnings_mock": config.dwd_warnings_mock,
+        "show_last_alarm": config.show_last_alarm,
+        "warnings_min_level": config.warnings_min_level,
+        "hdmi_cec_enabled": config.cec_enabled,
+        "hdmi_cec_client_path": config.cec_client_path,
+        "hdmi_cec_device_address": config.cec_device_address,
+        "hdmi_cec_idle_standby_minutes": config.cec_idle_standby_minutes,
+        "hdmi_cec_wake_on_alarm": config.cec_wake_on_alarm,
+        "hdmi_cec_standby_on_idle": config.cec_standby_on_idle,
+        "hdmi_cec_schedules": [],
+        "hdmi_cec_linux_device": config.cec_linux_device,
     }
 
 
@@ -150,12 +197,10 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
     app.config["APP_VERSION_URL"] = config.app_version_url
     app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 3600
 
-    # Asset cache busting helper – appends ?v=<app_version> to static file URLs
-    from flask import url_for as _url_for
-
+    # Asset cache busting helper – appends ?v=<content digest> to static file URLs
     def asset_url(filename: str) -> str:
-        """Return the URL for a static file with a cache-busting version query string."""
-        return _url_for("static", filename=filename) + "?v=" + config.app_version
+        """Return the URL for a static file versioned by its content hash."""
+        return static_url(filename)
 
     app.jinja_env.globals["asset_url"] = asset_url
 
@@ -168,13 +213,16 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
     store = AlarmStore(persistence_path=persistence_path)
     app.config["ALARM_STORE"] = store
     app.config["APP_CONFIG"] = config
+    app.config["ALARM_TRACER"] = AlarmTracer()
 
     # Initialize settings store
     if config.settings_file:
         settings_path = Path(config.settings_file)
     else:
         settings_path = Path(app.instance_path) / "settings.json"
-    settings_store = SettingsStore(persistence_path=settings_path)
+    settings_store = SettingsStore(
+        persistence_path=settings_path, defaults=settings_defaults(config)
+    )
     app.config["SETTINGS_STORE"] = settings_store
 
     # Logo upload directory – same folder as the settings file
@@ -189,6 +237,21 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
     warnings_cache = WarningsCache()
     app.config["WARNINGS_CACHE"] = warnings_cache
 
+    # Routes are computed once per station/destination pair and shared by all
+    # kiosks; new alarms precompute theirs during enrichment.
+    app.config["ROUTE_CACHE"] = RouteCache()
+    # Optional offline road graph answers /api/route when ORS is unavailable
+    app.config["ROAD_GRAPH"] = load_road_graph(config.road_graph_file)
+
+    # Calendar feeds are only ever downloaded in the background; warm the
+    # cache now so the first /api/calendar request already has events.
+    calendar_cache = CalendarCache()
+    app.config["CALENDAR_CACHE"] = calendar_cache
+    calendar_cache.prefetch(
+        settings_store.effective().get("calendar_urls") or [],
+        executor=_executor,
+    )
+
     # SSE subscriber registry – one threading.Event per connected client
     _subscribers: List[threading.Event] = []
     _subscribers_lock = threading.Lock()
@@ -199,11 +262,27 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
     _limiter.init_app(app)
     app.config["LIMITER"] = _limiter
 
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request_duration(response):
+        started = g.get("request_started")
+        if started is not None:
+            # Unmatched URLs share one series so 404 scans cannot grow label cardinality.
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, request.endpoint or "unmatched"
+            )
+        return response
+
+    register_static_assets(app)
+
     @app.after_request
     def set_cache_headers(response):
-        # Static assets are cache-busted via ?v=<app_version> query strings,
-        # so they can be cached normally by the browser.
-        if request.path.startswith("/static/"):
+        # Static assets and the logo carry a strong content ETag and are
+        # immutable when requested with their current ?v=<digest>.
+        if request.endpoint in _SELF_CACHING_ENDPOINTS:
             return response
         # All other responses (HTML pages, API endpoints) must never be cached.
         # This is especially important for kiosk displays so that design changes
@@ -239,17 +318,31 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
             for evt in _ntfy_subscribers:
                 evt.set()
 
-    def _get_current_settings() -> Dict[str, Any]:
-        return get_effective_settings(settings_store, config)
-
     ntfy_poller = create_ntfy_poller(
-        get_effective_settings=_get_current_settings,
+        get_effective_settings=settings_store.effective,
         message_store=message_store,
         on_message=_trigger_sse_for_message,
+        cursor_path=messages_path.with_name("ntfy_cursors.json"),
     )
     ntfy_poller.start()
     app.config["NTFY_POLLER"] = ntfy_poller
 
+    def _reconnect_ntfy(settings: Mapping[str, Any], changed: FrozenSet[str]) -> None:
+        # Re-open the ntfy stream now instead of after the next keepalive.
+        if changed & {"ntfy_topic_url", "ntfy_mode"}:
+            ntfy_poller.reconnect()
+
+    settings_store.subscribe(_reconnect_ntfy)
+    # Expired messages are removed when they expire and pushed to dashboards
+    message_store.start_expiry_timer(on_expired=_trigger_sse_for_message)
+
+    # One shared participant poller; changes are pushed to dashboards via SSE
+    participant_poller: Optional[ParticipantPoller] = None
+    if messenger is not None:
+        participant_poller = ParticipantPoller(messenger, on_change=_trigger_sse_for_message)
+        participant_poller.start()
+    app.config["PARTICIPANT_POLLER"] = participant_poller
+
     def _get_alarm_payload() -> Optional[Dict[str, Any]]:
         latest = store.latest()
         return latest if latest is not None else None
@@ -261,14 +354,40 @@ def create_app(config: Optional[AppConfig] = None) -> Flask:
         return os.environ.get("TZ", "UTC")
 
     cec_watcher = create_cec_display_watcher(
-        get_effective_settings=_get_current_settings,
+        get_effective_settings=settings_store.effective,
         get_alarm_payload=_get_alarm_payload,
         get_display_duration_minutes=_get_display_duration_minutes,
         get_timezone=_get_timezone,
+        persistent_session=config.cec_persistent_session,
     )
     cec_watcher.start()
     app.config["CEC_WATCHER"] = cec_watcher
 
+    def _recheck_display(settings: Mapping[str, Any], changed: FrozenSet[str]) -> None:
+        if any(key.startswith("hdmi_cec_") for key in changed):
+            cec_watcher.handle_settings_changed()
+
+    settings_store.subscribe(_recheck_display)
+
+    # Side effects of a stored alarm: dashboards are notified on the request
+    # thread, everything touching hardware or the network runs in order
+    # on the hook worker.
+    alarm_hooks = AlarmHooks()
+    atexit.register(alarm_hooks.shutdown)
+    alarm_hooks.register("sse", lambda alarm: _trigger_sse_for_message())
+    alarm_hooks.register(
+        "cec", lambda alarm: cec_watcher.handle_alarm_stored(), background=True
+    )
+    if participant_poller is not None:
+        poller = participant_poller
+
+        def _watch_participants(alarm: Dict[str, Any]) -> None:
+            # Resolve the emergency before the first dashboard asks for it
+            poller.watch(str(alarm["incident_number"]))
+
+        alarm_hooks.register("participants", _watch_participants, background=True)
+    app.config["ALARM_HOOKS"] = alarm_hooks
+
     # Register blueprints – all route handlers live in routes/api.py and routes/views.py
     from .routes.api import api_bp
     from .routes.views import views_bp
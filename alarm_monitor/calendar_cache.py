@@ -0,0 +1,248 @@
+"""iCal calendar cache with per-feed background refresh."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from .calendar_service import (
+    _DEFAULT_LOOK_AHEAD_DAYS,
+    _safe_log_url,
+    expand_occurrences,
+    fetch_calendar_feeds,
+    merge_upcoming_events,
+    start_times,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# After a failed download the stale events are kept and the feed is retried
+# after this many seconds instead of waiting for the full TTL.
+_RETRY_SECONDS = 60.0
+# The serialised response is recomputed at least this often so events that
+# have started drop out of the list even when no feed changed.
+_RESULT_MAX_AGE_SECONDS = 60.0
+
+
+class CalendarCache:
+    """Thread-safe per-URL cache of parsed iCal events.
+
+    Requests are answered from memory only.  Feeds that are missing or older
+    than the TTL are refreshed in the background (stale-while-revalidate),
+    using conditional GETs so unchanged calendars cost a single 304.  All due
+    feeds are fetched concurrently in one background job, so a slow calendar
+    server occupies a single worker of the shared executor for at most the
+    total fetch deadline.
+
+    Per-feed health (last success, last error, duration) is exposed by
+    :meth:`health` and :meth:`render_metrics`.  Feeds are identified by their
+    position in the configured list and by host only, because calendar URLs
+    frequently embed private access tokens.
+    """
+
+    def __init__(self, ttl_minutes: int = 15) -> None:
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, Dict[str, Any]] = {}
+        self._ttl = ttl_minutes * 60.0
+        self._generation = 0
+        self._result_key: Optional[Tuple[Any, ...]] = None
+        self._result: List[Dict[str, Any]] = []
+        self._result_built_at = 0.0
+
+    def get_events(
+        self,
+        urls: Sequence[str],
+        executor: Any = None,
+        max_events: int = 10,
+        look_ahead_days: int = _DEFAULT_LOOK_AHEAD_DAYS,
+    ) -> List[Dict[str, Any]]:
+        """Return upcoming events for *urls* from memory.
+
+        Feeds that are due are refreshed in the background; until the first
+        download finishes a feed simply contributes no events.
+
+        Args:
+            urls: iCal URLs currently configured.
+            executor: Optional ThreadPoolExecutor for background fetch. If None, a daemon thread is used.
+            max_events: Maximum number of events to return.
+            look_ahead_days: How many days ahead to include events for.
+        """
+        urls = tuple(url.strip() for url in urls if url and url.strip())
+        now = time.monotonic()
+        due: List[str] = []
+        with self._lock:
+            self._forget_unconfigured(urls)
+            for url in urls:
+                feed = self._feeds.setdefault(
+                    url, {"events": [], "starts": [], "next_refresh": 0.0}
+                )
+                if not feed.get("fetching") and now >= feed["next_refresh"]:
+                    feed["fetching"] = True
+                    due.append(url)
+
+            key = (urls, self._generation, max_events, look_ahead_days)
+            if key == self._result_key and now - self._result_built_at < _RESULT_MAX_AGE_SECONDS:
+                result = self._result
+            else:
+                result = merge_upcoming_events(
+                    [self._feeds[url]["events"] for url in urls],
+                    max_events=max_events,
+                    look_ahead_days=look_ahead_days,
+                    starts=[self._feeds[url]["starts"] for url in urls],
+                )
+                self._result_key = key
+                self._result = result
+                self._result_built_at = now
+
+        if due:
+            self._schedule(due, executor)
+        return list(result)
+
+    def prefetch(self, urls: Sequence[str], executor: Any = None) -> None:
+        """Start background downloads for *urls* that are due (e.g. at startup)."""
+        self.get_events(urls, executor=executor)
+
+    def _forget_unconfigured(self, urls: Tuple[str, ...]) -> None:
+        for url in list(self._feeds):
+            if url not in urls and not self._feeds[url].get("fetching"):
+                del self._feeds[url]
+                self._generation += 1
+
+    def _schedule(self, urls: List[str], executor: Any) -> None:
+        if executor is not None:
+            executor.submit(self._refresh, urls)
+        else:
+            threading.Thread(target=self._refresh, args=(urls,), daemon=True).start()
+
+    def _refresh(self, urls: List[str]) -> None:
+        with self._lock:
+            validators = {
+                url: (self._feeds[url].get("etag"), self._feeds[url].get("last_modified"))
+                for url in urls
+                if url in self._feeds
+            }
+            indexes = {
+                url: self._feeds[url]["index"]
+                for url in urls
+                if self._feeds.get(url, {}).get("index") is not None
+            }
+        try:
+            results = fetch_calendar_feeds(urls, validators=validators, indexes=indexes)
+        except Exception as exc:  # pragma: no cover - defensive
+            LOGGER.warning("Background calendar refresh failed: %s", exc)
+            results = []
+
+        now = time.monotonic()
+        finished = {result.url: result for result in results}
+        with self._lock:
+            for url in urls:
+                feed = self._feeds.get(url)
+                if feed is None:
+                    continue
+                feed["fetching"] = False
+                result = finished.get(url)
+                if result is None or result.error is not None or result.download is None:
+                    error = result.error if result is not None else "refresh failed"
+                    LOGGER.warning(
+                        "Background calendar fetch failed for %s: %s", _safe_log_url(url), error
+                    )
+                    feed["next_refresh"] = now + _RETRY_SECONDS
+                    feed["last_error"] = error
+                    feed["last_error_at"] = datetime.now(timezone.utc)
+                    feed["duration"] = result.duration_seconds if result is not None else None
+                    self._reexpand(feed)
+                    continue
+
+                feed["next_refresh"] = now + self._ttl
+                feed["last_error"] = None
+                feed["last_success_at"] = datetime.now(timezone.utc)
+                feed["duration"] = result.duration_seconds
+                download = result.download
+                if download.not_modified:
+                    self._reexpand(feed)
+                    continue
+                feed["events"] = download.events
+                feed["starts"] = download.starts
+                feed["index"] = download.index
+                feed["etag"] = download.etag
+                feed["last_modified"] = download.last_modified
+                self._generation += 1
+
+    def _reexpand(self, feed: Dict[str, Any]) -> None:
+        # Recurring events were expanded for the window at download time;
+        # without a new body the window is moved forward from the kept index.
+        index = feed.get("index")
+        if index is not None:
+            feed["events"] = expand_occurrences(index)
+            feed["starts"] = start_times(feed["events"])
+            self._generation += 1
+
+    def health(self, urls: Sequence[str]) -> List[Dict[str, Any]]:
+        """Per-feed status for the configured *urls*, without secrets."""
+        urls = [url.strip() for url in urls if url and url.strip()]
+        report = []
+        with self._lock:
+            for index, url in enumerate(urls):
+                feed = self._feeds.get(url, {})
+                last_success = feed.get("last_success_at")
+                last_error_at = feed.get("last_error_at")
+                if feed.get("last_error"):
+                    status = "error"
+                elif last_success is not None:
+                    status = "ok"
+                else:
+                    status = "pending"
+                duration = feed.get("duration")
+                report.append({
+                    "index": index,
+                    # hostname drops any user:password@ part of the netloc.
+                    "host": urlparse(url).hostname or "",
+                    "status": status,
+                    "events": len(feed.get("events", [])),
+                    "last_success": last_success.isoformat() if last_success else None,
+                    "last_error": feed.get("last_error"),
+                    "last_error_at": last_error_at.isoformat() if last_error_at else None,
+                    "duration_seconds": round(duration, 3) if duration is not None else None,
+                })
+        return report
+
+    def render_metrics(self, urls: Sequence[str]) -> List[str]:
+        """Prometheus gauges describing the health of each configured feed."""
+        health = self.health(urls)
+        lines = [
+            "# HELP alarm_monitor_calendar_feed_up Whether the last fetch of a calendar feed succeeded",
+            "# TYPE alarm_monitor_calendar_feed_up gauge",
+        ]
+        lines.extend(
+            f'alarm_monitor_calendar_feed_up{{feed="{feed["index"]}"}} {1 if feed["status"] == "ok" else 0}'
+            for feed in health
+        )
+        lines += [
+            "# HELP alarm_monitor_calendar_feed_last_success_timestamp_seconds Unix time of the last successful fetch",
+            "# TYPE alarm_monitor_calendar_feed_last_success_timestamp_seconds gauge",
+        ]
+        for feed in health:
+            if feed["last_success"]:
+                timestamp = datetime.fromisoformat(feed["last_success"]).timestamp()
+                lines.append(
+                    "alarm_monitor_calendar_feed_last_success_timestamp_seconds"
+                    f'{{feed="{feed["index"]}"}} {timestamp:.0f}'
+                )
+        lines += [
+            "# HELP alarm_monitor_calendar_feed_fetch_duration_seconds Duration of the last fetch attempt",
+            "# TYPE alarm_monitor_calendar_feed_fetch_duration_seconds gauge",
+        ]
+        for feed in health:
+            if feed["duration_seconds"] is not None:
+                lines.append(
+                    "alarm_monitor_calendar_feed_fetch_duration_seconds"
+                    f'{{feed="{feed["index"]}"}} {feed["duration_seconds"]:.3f}'
+                )
+        return lines
+
+
+__all__ = ["CalendarCache"]
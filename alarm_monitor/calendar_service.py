@@ -2,19 +2,37 @@
 
 from __future__ import annotations
 
+import heapq
 import logging
-import re
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from itertools import islice, takewhile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 import requests
 
+from .ical_parser import CalendarIndex, iter_unfolded_lines
+from .metrics import track_outbound
+
 LOGGER = logging.getLogger(__name__)
 
 _MAX_CALENDAR_SIZE = 2 * 1024 * 1024  # 2 MB
 _REQUEST_TIMEOUT = 10  # seconds
+# A server trickling bytes never trips the per-read timeout, so each download
+# is additionally capped in total.
+_FEED_DEADLINE_SECONDS = 20.0
+# Deadline for fetching all feeds together; slower feeds are reported as
+# timed out and the others are returned.
+_TOTAL_DEADLINE_SECONDS = 15.0
+_MAX_PARALLEL_FEEDS = 8
 _DEFAULT_LOOK_AHEAD_DAYS = 30
+# Occurrences are kept this far beyond the look-ahead window so that events
+# moving into the window between two cache refreshes are already known.
+_WINDOW_MARGIN = timedelta(days=1)
 
 
 def _is_safe_url(url: str) -> bool:
@@ -35,106 +53,296 @@ def _safe_log_url(url: str) -> str:
         return "<invalid URL>"
 
 
-def _parse_ical_dt(value: str) -> Optional[datetime]:
-    """Parse an iCal date or datetime value into a UTC-aware datetime.
+@dataclass
+class CalendarDownload:
+    """Result of a (conditional) download of a single iCal feed.
 
-    Handles:
-    - All-day dates: ``YYYYMMDD``
-    - UTC datetimes: ``YYYYMMDDTHHMMSSz``
-    - Local datetimes (treated as UTC): ``YYYYMMDDTHHMMSS``
+    ``events`` are sorted by start time and ``starts`` lists their start
+    times, for :func:`merge_upcoming_events` to bisect.  ``index`` holds the
+    parsed VEVENTs and should be passed to the next download of the same feed.
     """
-    value = value.strip()
-
-    if re.fullmatch(r"\d{8}", value):
-        try:
-            return datetime.strptime(value, "%Y%m%d").replace(tzinfo=timezone.utc)
-        except ValueError:
-            return None
 
-    if re.fullmatch(r"\d{8}T\d{6}Z", value):
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    index: Optional[CalendarIndex] = None
+    starts: List[datetime] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.starts = start_times(self.events)
+
+
+def _iter_chunks(response: requests.Response, url: str) -> Iterator[bytes]:
+    """Yield body chunks, enforcing the size limit and the per-feed deadline."""
+    started = time.monotonic()
+    received = 0
+    for chunk in response.iter_content(chunk_size=8192):
+        received += len(chunk)
+        if received > _MAX_CALENDAR_SIZE:
+            LOGGER.warning("Calendar response too large, truncating: %s", _safe_log_url(url))
+            return
+        if time.monotonic() - started > _FEED_DEADLINE_SECONDS:
+            raise requests.Timeout(f"download exceeded {_FEED_DEADLINE_SECONDS:.0f}s")
+        yield chunk
+
+
+def download_calendar(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    look_ahead_days: int = _DEFAULT_LOOK_AHEAD_DAYS,
+    now: Optional[datetime] = None,
+    index: Optional[CalendarIndex] = None,
+) -> CalendarDownload:
+    """Download and parse a single iCal feed.
+
+    The body is parsed while it streams in; only occurrences starting between
+    *now* and *look_ahead_days* (plus one day of margin) are returned, with
+    recurring events expanded inside that window.  VEVENTs whose text is
+    unchanged since the download that produced *index* are not parsed again.
+
+    When *etag* or *last_modified* from a previous download are given they are
+    sent as ``If-None-Match``/``If-Modified-Since``; a ``304 Not Modified``
+    answer yields ``not_modified=True`` and no events.
+
+    Raises:
+        ValueError: If the URL is not an http(s) URL.
+        requests.RequestException: On network or HTTP errors.
+    """
+    if not _is_safe_url(url):
+        raise ValueError(f"Unsafe calendar URL: {_safe_log_url(url)}")
+
+    headers = {"User-Agent": "AlarmDashboard-Calendar/1.0"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    with track_outbound("ical"):
+        response = requests.get(
+            url,
+            timeout=_REQUEST_TIMEOUT,
+            headers=headers,
+            stream=True,
+        )
         try:
-            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(
-                tzinfo=timezone.utc
+            if response.status_code == 304:
+                return CalendarDownload(etag=etag, last_modified=last_modified, not_modified=True)
+            response.raise_for_status()
+            new_index = CalendarIndex.build(
+                iter_unfolded_lines(_iter_chunks(response, url)), now, previous=index
             )
-        except ValueError:
-            return None
+        finally:
+            response.close()
+
+    LOGGER.debug(
+        "Calendar %s: %d events parsed, %d reused",
+        _safe_log_url(url), new_index.parsed, new_index.reused,
+    )
+    return CalendarDownload(
+        events=expand_occurrences(new_index, look_ahead_days, now),
+        index=new_index,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def start_times(events: Sequence[Dict[str, Any]]) -> List[datetime]:
+    """Start times of the sorted *events*, computed once per feed update."""
+    return [event["start"] for event in events]
+
+
+def expand_occurrences(
+    index: CalendarIndex,
+    look_ahead_days: int = _DEFAULT_LOOK_AHEAD_DAYS,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Occurrences in *index* from *now* to the look-ahead window plus margin.
+
+    The window moves with *now*, so callers re-expand a cached index on every
+    refresh instead of reusing the list from the original download.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return index.occurrences(now, now + timedelta(days=look_ahead_days) + _WINDOW_MARGIN)
+
+
+def _start_of(event: Dict[str, Any]) -> datetime:
+    return event["start"]
 
-    m = re.fullmatch(r"(\d{8}T\d{6})", value)
-    if m:
-        try:
-            return datetime.strptime(m.group(1), "%Y%m%dT%H%M%S").replace(
-                tzinfo=timezone.utc
-            )
-        except ValueError:
-            return None
 
-    return None
+def merge_upcoming_events(
+    feeds: Iterable[Sequence[Dict[str, Any]]],
+    max_events: int = 10,
+    look_ahead_days: int = _DEFAULT_LOOK_AHEAD_DAYS,
+    now: Optional[datetime] = None,
+    starts: Optional[Iterable[Sequence[datetime]]] = None,
+) -> List[Dict[str, Any]]:
+    """Merge per-feed event lists into the serialised upcoming events.
+
+    Each list in *feeds* must be sorted by start time (as returned by
+    :func:`download_calendar`).  *starts* holds the matching
+    :func:`start_times` of every feed; past events are skipped by bisecting
+    them, and the lists are heap-merged lazily, so only the first
+    *max_events* events inside the look-ahead window are touched.  Without
+    *starts* the start times are collected here, one pass per feed.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    cutoff = now + timedelta(days=look_ahead_days)
 
+    feeds = list(feeds)
+    if starts is None:
+        starts = [start_times(events) for events in feeds]
+    merged = heapq.merge(
+        *(
+            islice(events, bisect_left(feed_starts, now), None)
+            for events, feed_starts in zip(feeds, starts)
+        ),
+        key=_start_of,
+    )
+    upcoming = islice(takewhile(lambda event: event["start"] <= cutoff, merged), max_events)
+
+    result = []
+    for event in upcoming:
+        serialized: Dict[str, Any] = {
+            "summary": event.get("summary", ""),
+            "start": event["start"].isoformat(),
+            "end": event["end"].isoformat() if event.get("end") else None,
+        }
+        if event.get("description"):
+            serialized["description"] = event["description"]
+        if event.get("location_name"):
+            serialized["location_name"] = event["location_name"]
+        result.append(serialized)
+
+    return result
 
-def _unfold_ical(text: str) -> str:
-    """Unfold iCal folded lines (RFC 5545 §3.1)."""
-    return re.sub(r"\r?\n[ \t]", "", text)
 
+@dataclass
+class FeedResult:
+    """Outcome of fetching one feed as part of :func:`fetch_calendar_feeds`."""
 
-def _parse_events(ical_text: str) -> List[Dict[str, Any]]:
-    """Extract VEVENT entries from raw iCal text."""
-    events = []
-    unfolded = _unfold_ical(ical_text)
+    url: str
+    download: Optional[CalendarDownload] = None
+    error: Optional[str] = None
+    duration_seconds: float = 0.0
 
-    for vevent_match in re.finditer(
-        r"BEGIN:VEVENT(.*?)END:VEVENT", unfolded, re.DOTALL
-    ):
-        block = vevent_match.group(1)
-        event: Dict[str, Any] = {}
 
-        for line in block.splitlines():
-            if ":" not in line:
+def describe_fetch_error(exc: BaseException) -> str:
+    """Short, URL-free description of a download failure.
+
+    Exception messages from ``requests`` embed the full URL, which for
+    private calendar feeds contains an access token.
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return f"HTTP {exc.response.status_code}"
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.ConnectionError):
+        return "connection error"
+    if isinstance(exc, ValueError):
+        return "invalid URL"
+    return type(exc).__name__
+
+
+def _timed_download(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    index: Optional[CalendarIndex],
+) -> Tuple[CalendarDownload, float]:
+    started = time.monotonic()
+    download = download_calendar(url, etag=etag, last_modified=last_modified, index=index)
+    return download, time.monotonic() - started
+
+
+def fetch_calendar_feeds(
+    urls: Sequence[str],
+    validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    deadline: float = _TOTAL_DEADLINE_SECONDS,
+    indexes: Optional[Dict[str, CalendarIndex]] = None,
+) -> List[FeedResult]:
+    """Download several feeds concurrently, waiting at most *deadline* seconds.
+
+    Args:
+        urls: iCal URLs to fetch.
+        validators: Optional ``{url: (etag, last_modified)}`` from earlier
+            downloads, sent as conditional request headers.
+        indexes: Optional ``{url: CalendarIndex}`` from earlier downloads so
+            unchanged events are not parsed again.
+        deadline: Total time budget.  Feeds still running afterwards are
+            reported with ``error="timeout"``; their threads finish on their
+            own within the per-feed deadline and the result is discarded.
+
+    Returns:
+        One :class:`FeedResult` per URL, in the order given.
+    """
+    validators = validators or {}
+    indexes = indexes or {}
+    results = [FeedResult(url=url) for url in urls]
+    if not results:
+        return results
+
+    pool = ThreadPoolExecutor(
+        max_workers=min(len(results), _MAX_PARALLEL_FEEDS),
+        thread_name_prefix="calendar-fetch",
+    )
+    started = time.monotonic()
+    try:
+        futures = {
+            pool.submit(
+                _timed_download,
+                result.url,
+                *validators.get(result.url, (None, None)),
+                indexes.get(result.url),
+            ): result
+            for result in results
+        }
+        wait(futures, timeout=deadline)
+        for future, result in futures.items():
+            if not future.done():
+                future.cancel()
+                result.error = "timeout"
+                result.duration_seconds = time.monotonic() - started
+                continue
+            exc = future.exception()
+            if exc is not None:
+                result.error = describe_fetch_error(exc)
+                result.duration_seconds = time.monotonic() - started
                 continue
-            colon_pos = line.index(":")
-            prop_part = line[:colon_pos]
-            value = line[colon_pos + 1:]
-            name_base = prop_part.split(";")[0].upper()
-
-            if name_base == "SUMMARY":
-                event["summary"] = value
-            elif name_base == "DTSTART":
-                dt = _parse_ical_dt(value)
-                if dt:
-                    event["start"] = dt
-            elif name_base == "DTEND":
-                dt = _parse_ical_dt(value)
-                if dt:
-                    event["end"] = dt
-            elif name_base == "DESCRIPTION":
-                event["description"] = value
-            elif name_base == "LOCATION":
-                event["location_name"] = value
-
-        if "summary" in event and "start" in event:
-            events.append(event)
-
-    return events
+            result.download, result.duration_seconds = future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
 
 
 def fetch_calendar_events(
     urls: List[str],
     max_events: int = 10,
     look_ahead_days: int = _DEFAULT_LOOK_AHEAD_DAYS,
+    deadline: float = _TOTAL_DEADLINE_SECONDS,
 ) -> List[Dict[str, Any]]:
     """Fetch and merge upcoming events from a list of iCal URLs.
 
+    Feeds are downloaded concurrently; feeds that fail or miss the total
+    *deadline* are logged and skipped.  Request handlers should use
+    :class:`~alarm_monitor.calendar_cache.CalendarCache` instead.
+
     Args:
         urls: List of iCal (.ics) URLs to fetch.
         max_events: Maximum number of events to return.
         look_ahead_days: How many days ahead to include events for.
+        deadline: Total time budget in seconds for all downloads.
 
     Returns:
         List of serialised event dicts sorted by start time.
     """
-    now = datetime.now(timezone.utc)
-    cutoff = now + timedelta(days=look_ahead_days)
-    all_events: List[Dict[str, Any]] = []
-
+    safe_urls: List[str] = []
     for url in urls:
         url = url.strip()
         if not url:
@@ -142,56 +350,33 @@ def fetch_calendar_events(
         if not _is_safe_url(url):
             LOGGER.warning("Skipping unsafe calendar URL: %s", _safe_log_url(url))
             continue
+        safe_urls.append(url)
 
-        try:
-            response = requests.get(
-                url,
-                timeout=_REQUEST_TIMEOUT,
-                headers={"User-Agent": "AlarmDashboard-Calendar/1.0"},
-                stream=True,
+    downloads: List[CalendarDownload] = []
+    for result in fetch_calendar_feeds(safe_urls, deadline=deadline):
+        if result.error is not None or result.download is None:
+            LOGGER.warning(
+                "Failed to fetch calendar %s: %s", _safe_log_url(result.url), result.error
             )
-            response.raise_for_status()
-
-            content = b""
-            for chunk in response.iter_content(chunk_size=8192):
-                content += chunk
-                if len(content) > _MAX_CALENDAR_SIZE:
-                    LOGGER.warning(
-                        "Calendar response too large, truncating: %s", _safe_log_url(url)
-                    )
-                    break
-
-            ical_text = content.decode("utf-8", errors="replace")
-            events = _parse_events(ical_text)
-
-            for event in events:
-                start = event.get("start")
-                if not isinstance(start, datetime):
-                    continue
-                if now <= start <= cutoff:
-                    all_events.append(event)
-
-        except requests.RequestException as exc:
-            LOGGER.warning("Failed to fetch calendar %s: %s", _safe_log_url(url), exc)
-        except Exception as exc:  # pragma: no cover - defensive
-            LOGGER.warning("Error processing calendar %s: %s", _safe_log_url(url), exc)
-
-    all_events.sort(key=lambda e: e["start"])
-
-    result = []
-    for event in all_events[:max_events]:
-        serialized: Dict[str, Any] = {
-            "summary": event.get("summary", ""),
-            "start": event["start"].isoformat(),
-            "end": event["end"].isoformat() if event.get("end") else None,
-        }
-        if event.get("description"):
-            serialized["description"] = event["description"]
-        if event.get("location_name"):
-            serialized["location_name"] = event["location_name"]
-        result.append(serialized)
-
-    return result
-
-
-__all__ = ["fetch_calendar_events"]
+            continue
+        downloads.append(result.download)
+
+    return merge_upcoming_events(
+        [download.events for download in downloads],
+        max_events,
+        look_ahead_days,
+        starts=[download.starts for download in downloads],
+    )
+
+
+__all__ = [
+    "CalendarDownload",
+    "FeedResult",
+    "describe_fetch_error",
+    "download_calendar",
+    "expand_occurrences",
+    "fetch_calendar_events",
+    "fetch_calendar_feeds",
+    "merge_upcoming_events",
+    "start_times",
+]
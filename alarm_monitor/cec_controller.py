@@ -1,27 +1,48 @@
 """HDMI-CEC display control for connected monitors and TVs.
 
 Uses ``cec-client`` (from cec-utils / libcec) to wake displays on alarm and
-send them to standby after a configurable idle period.  Fixed weekly schedules
+send them to standby after a configurable idle period.  By default one
+interactive ``cec-client`` process is kept running so commands do not pay the
+adapter initialisation of a fresh process each time.  Fixed weekly schedules
 keep the display powered on during defined windows (e.g. training nights).
+
+The display watcher does not poll: it re-evaluates the rules when an alarm is
+stored or the settings change, and otherwise sleeps until the next instant at
+which the outcome can change (end of the alarm display, idle-standby deadline,
+next schedule boundary).
 """
 
 from __future__ import annotations
 
 import logging
 import os
+import queue
 import subprocess
 import threading
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, time as dt_time, timedelta, timezone
 from typing import Any, Callable, Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from .metrics import track_outbound
+
 LOGGER = logging.getLogger(__name__)
 
 _DEFAULT_CLIENT_PATH = "/usr/bin/cec-client"
 _DEFAULT_IDLE_STANDBY_MINUTES = 30
 _DEFAULT_DEVICE_ADDRESS = 0
-_POLL_INTERVAL_SECONDS = 30
+# Upper bound for the watcher's sleep; re-asserts the schedule wake-up and
+# covers clock changes and settings edited by another worker process.
+_MAX_SLEEP_SECONDS = 600
+# Delay before retrying a failed standby command.
+_RETRY_SECONDS = 30
+# Deadlines are slept past by this much so the re-evaluation lands after them.
+_DEADLINE_SLACK_SECONDS = 1.0
+# Opening the adapter takes a few seconds on a Raspberry Pi.
+_SESSION_START_TIMEOUT_SECONDS = 20.0
+_SESSION_REPLY_TIMEOUT_SECONDS = 10.0
+_SESSION_READY_MARKER = "waiting for input"
+_SESSION_REPLY_MARKER = "power status:"
 
 _WEEKDAY_LABELS = (
     "Montag",
@@ -81,6 +102,40 @@ def is_in_schedule_window(schedules: List[Dict[str, Any]], now_local: datetime)
     return False
 
 
+def next_schedule_boundary(
+    schedules: List[Dict[str, Any]], now_local: datetime
+) -> Optional[datetime]:
+    """Return the next instant after *now_local* at which a schedule window opens or closes.
+
+    Windows are evaluated per minute and include their end minute, so a
+    window closes at ``end_time`` plus one minute.  Windows crossing midnight
+    also open and close at the start and end of their weekday, matching
+    :func:`is_in_schedule_window`.
+    """
+    boundaries: List[datetime] = []
+    midnight = datetime.combine(now_local.date(), dt_time(0), tzinfo=now_local.tzinfo)
+    for entry in schedules:
+        if not entry.get("enabled", True):
+            continue
+        try:
+            weekday = int(entry.get("weekday", -1))
+        except (TypeError, ValueError):
+            continue
+        start = _time_to_minutes(str(entry.get("start_time") or ""))
+        end = _time_to_minutes(str(entry.get("end_time") or ""))
+        if weekday not in range(7) or start is None or end is None:
+            continue
+        minutes = {start, end + 1} if start <= end else {0, end + 1, start, 24 * 60}
+        days_ahead = (weekday - now_local.weekday()) % 7
+        for week in (0, 7):
+            day = midnight + timedelta(days=days_ahead + week)
+            for minute in minutes:
+                candidate = day + timedelta(minutes=minute)
+                if candidate > now_local:
+                    boundaries.append(candidate)
+    return min(boundaries, default=None)
+
+
 def normalize_schedules(raw: Any) -> List[Dict[str, Any]]:
     """Validate and normalise schedule entries from settings storage."""
     if not isinstance(raw, list):
@@ -151,12 +206,177 @@ def is_cec_client_available(client_path: str) -> bool:
     return bool(client_path) and os.path.isfile(client_path) and os.access(client_path, os.X_OK)
 
 
+class CecClientSession:
+    """Long-running interactive ``cec-client`` process.
+
+    Commands are written to its stdin.  Each one is followed by a power status
+    query; the ``power status:`` line on stdout confirms the adapter has
+    processed the command.  The process is started on first use and restarted
+    when it exits or stops answering.  Not thread-safe; the controller
+    serialises access.
+    """
+
+    def __init__(
+        self,
+        client_path: str,
+        start_timeout: float = _SESSION_START_TIMEOUT_SECONDS,
+        reply_timeout: float = _SESSION_REPLY_TIMEOUT_SECONDS,
+    ) -> None:
+        self._client_path = client_path
+        self._start_timeout = start_timeout
+        self._reply_timeout = reply_timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.starts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def send(self, command: str, status_query: str) -> Tuple[bool, str]:
+        """Send *command* followed by *status_query*; return ``(success, output)``.
+
+        A failed attempt restarts the process and retries once.
+        """
+        output = ""
+        for _ in range(2):
+            if not self.running:
+                self.close()
+                ready, output = self._start()
+                if not ready:
+                    self.close()
+                    continue
+            self._discard_pending()
+            try:
+                assert self._process is not None and self._process.stdin is not None
+                self._process.stdin.write(f"{command}\n{status_query}\n")
+                self._process.stdin.flush()
+            except (OSError, ValueError) as exc:
+                output = str(exc)
+                self.close()
+                continue
+            reply, output = self._read_until(_SESSION_REPLY_MARKER, self._reply_timeout)
+            if reply:
+                return True, output
+            LOGGER.warning("cec-client session did not answer %r, restarting", command)
+            self.close()
+        return False, output
+
+    def close(self) -> None:
+        """Ask the process to quit and make sure it is gone."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if process.poll() is None and process.stdin is not None:
+                process.stdin.write("q\n")
+                process.stdin.flush()
+            process.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            process.kill()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                LOGGER.warning("cec-client (pid %s) did not exit", process.pid)
+        for stream in (process.stdin, process.stdout):
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+    def _start(self) -> Tuple[bool, str]:
+        try:
+            process = subprocess.Popen(
+                [self._client_path, "-d", "1"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+        except OSError as exc:
+            return False, str(exc)
+        self._process = process
+        self.starts += 1
+        # A fresh queue per process so lines of a dead one never leak into
+        # the replies of its successor.
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._read_stdout,
+            args=(process, self._lines),
+            daemon=True,
+            name="cec-client-reader",
+        ).start()
+        ready, output = self._read_until(_SESSION_READY_MARKER, self._start_timeout)
+        if ready:
+            LOGGER.info("cec-client session started (pid %s)", process.pid)
+        else:
+            LOGGER.warning("cec-client session failed to start: %s", output)
+        return ready, output
+
+    @staticmethod
+    def _read_stdout(process: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        assert process.stdout is not None
+        try:
+            for line in process.stdout:
+                lines.put(line.rstrip())
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    def _read_until(self, marker: str, timeout: float) -> Tuple[bool, str]:
+        """Collect stdout lines until one contains *marker*, EOF or *timeout*."""
+        deadline = time.monotonic() + timeout
+        collected: List[str] = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                collected.append("timed out")
+                return False, "\n".join(collected)
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                collected.append("cec-client exited")
+                return False, "\n".join(collected)
+            if line:
+                collected.append(line)
+            if marker in line.lower():
+                return True, "\n".join(collected)
+
+    def _discard_pending(self) -> None:
+        while True:
+            try:
+                line = self._lines.get_nowait()
+            except queue.Empty:
+                return
+            if line is None:
+                # Keep the EOF marker so the next read notices the exit.
+                self._lines.put(None)
+                return
+
+
 class CecController:
-    """Thin wrapper around ``cec-client`` for power on / standby commands."""
+    """Thin wrapper around ``cec-client`` for power on / standby commands.
+
+    With ``persistent=True`` commands go through a long-running
+    :class:`CecClientSession`; otherwise every command spawns
+    ``cec-client -s``.
+    """
 
-    def __init__(self, client_path: str, device_address: int = _DEFAULT_DEVICE_ADDRESS) -> None:
+    def __init__(
+        self,
+        client_path: str,
+        device_address: int = _DEFAULT_DEVICE_ADDRESS,
+        persistent: bool = False,
+    ) -> None:
         self._client_path = client_path
         self._device_address = max(0, min(15, device_address))
+        self._session: Optional[CecClientSession] = (
+            CecClientSession(client_path) if persistent else None
+        )
         self._lock = threading.Lock()
         self.last_action: Optional[str] = None
         self.last_output: Optional[str] = None
@@ -171,9 +391,20 @@ class CecController:
         return self._device_address
 
     def configure(self, client_path: str, device_address: int) -> None:
-        self._client_path = client_path or _DEFAULT_CLIENT_PATH
+        client_path = client_path or _DEFAULT_CLIENT_PATH
+        if client_path != self._client_path and self._session is not None:
+            with self._lock:
+                self._session.close()
+                self._session = CecClientSession(client_path)
+        self._client_path = client_path
         self._device_address = max(0, min(15, device_address))
 
+    def close(self) -> None:
+        """Stop the persistent ``cec-client`` process, if any."""
+        if self._session is not None:
+            with self._lock:
+                self._session.close()
+
     def available(self) -> bool:
         return is_cec_client_available(self._client_path)
 
@@ -191,21 +422,13 @@ class CecController:
             self.last_success = False
             return False
 
-        with self._lock:
-            try:
-                result = subprocess.run(
-                    [self._client_path, "-s", "-d", "1"],
-                    input=f"{command}\n",
-                    capture_output=True,
-                    text=True,
-                    timeout=15,
-                    check=False,
-                )
-                output = ((result.stdout or "") + (result.stderr or "")).strip()
-                success = result.returncode == 0
-            except (subprocess.TimeoutExpired, OSError) as exc:
-                output = str(exc)
-                success = False
+        with self._lock, track_outbound("cec-client") as call:
+            if self._session is not None:
+                success, output = self._session.send(command, f"pow {self._device_address}")
+            else:
+                success, output = self._run_once(command)
+            if not success:
+                call.fail()
 
             self.last_action = command
             self.last_output = output
@@ -216,14 +439,29 @@ class CecController:
                 LOGGER.warning("CEC command failed (%s): %s", command, output)
             return success
 
-
-def _alarm_display_mode(
+    def _run_once(self, command: str) -> Tuple[bool, str]:
+        try:
+            result = subprocess.run(
+                [self._client_path, "-s", "-d", "1"],
+                input=f"{command}\n",
+                capture_output=True,
+                text=True,
+                timeout=15,
+                check=False,
+            )
+        except (subprocess.TimeoutExpired, OSError) as exc:
+            return False, str(exc)
+        output = ((result.stdout or "") + (result.stderr or "")).strip()
+        return result.returncode == 0, output
+
+
+def _alarm_display_until(
     alarm_payload: Optional[Dict[str, Any]],
     display_duration_minutes: int,
-) -> str:
-    """Return ``alarm`` or ``idle`` using the same rules as ``GET /api/alarm``."""
+) -> Optional[datetime]:
+    """Return when the alarm display of *alarm_payload* ends (UTC), if it has a timestamp."""
     if alarm_payload is None:
-        return "idle"
+        return None
 
     received_at = alarm_payload.get("received_at")
     if isinstance(received_at, str):
@@ -233,19 +471,33 @@ def _alarm_display_mode(
             received_at = None
 
     if not isinstance(received_at, datetime):
-        return "idle"
+        return None
 
     if received_at.tzinfo is None:
         received_at = received_at.replace(tzinfo=timezone.utc)
 
-    duration = max(1, display_duration_minutes)
-    if received_at + timedelta(minutes=duration) < datetime.now(timezone.utc):
+    return received_at + timedelta(minutes=max(1, display_duration_minutes))
+
+
+def _alarm_display_mode(
+    alarm_payload: Optional[Dict[str, Any]],
+    display_duration_minutes: int,
+) -> str:
+    """Return ``alarm`` or ``idle`` using the same rules as ``GET /api/alarm``."""
+    display_until = _alarm_display_until(alarm_payload, display_duration_minutes)
+    if display_until is None or display_until < datetime.now(timezone.utc):
         return "idle"
     return "alarm"
 
 
 class CecDisplayWatcher:
-    """Background thread that applies standby / schedule rules for HDMI-CEC."""
+    """Background thread that applies standby / schedule rules for HDMI-CEC.
+
+    :meth:`handle_alarm_stored` and :meth:`handle_settings_changed` trigger an
+    immediate re-evaluation; between events the thread sleeps until the
+    deadline returned by :meth:`_tick`.  All ``cec-client`` commands run on
+    this thread, so request handlers never wait for the adapter.
+    """
 
     def __init__(
         self,
@@ -262,6 +514,8 @@ class CecDisplayWatcher:
         self._controller = controller
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._alarm_pending = False
         self._display_mode = "idle"
         self._idle_since: Optional[datetime] = None
         self._was_in_schedule = False
@@ -281,9 +535,21 @@ class CecDisplayWatcher:
 
     def stop(self) -> None:
         self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._controller.close()
 
     def handle_alarm_stored(self) -> None:
-        """Wake the display immediately when a new alarm is stored."""
+        """Have the watcher thread wake the display for a new alarm; returns immediately."""
+        self._alarm_pending = True
+        self._wake_event.set()
+
+    def handle_settings_changed(self) -> None:
+        """Re-evaluate the rules after the HDMI-CEC settings were updated."""
+        self._wake_event.set()
+
+    def _wake_for_alarm(self) -> None:
         settings = get_hdmi_cec_settings(self._get_effective_settings())
         if not settings["enabled"] or not settings["wake_on_alarm"]:
             return
@@ -302,34 +568,48 @@ class CecDisplayWatcher:
 
     def _run(self) -> None:
         while not self._stop_event.is_set():
+            # Cleared before evaluating so an event arriving meanwhile is kept.
+            self._wake_event.clear()
+            timeout = float(_MAX_SLEEP_SECONDS)
             try:
-                self._tick()
+                if self._alarm_pending:
+                    self._alarm_pending = False
+                    self._wake_for_alarm()
+                delay = self._tick()
+                if delay is not None:
+                    timeout = min(timeout, delay)
             except Exception:
                 LOGGER.error("Unexpected error in CEC display watcher", exc_info=True)
-            self._stop_event.wait(_POLL_INTERVAL_SECONDS)
+            self._wake_event.wait(timeout)
 
-    def _tick(self) -> None:
+    def _tick(self) -> Optional[float]:
+        """Apply the rules once; return seconds until the next deadline, if any."""
         settings = get_hdmi_cec_settings(self._get_effective_settings())
         if not settings["enabled"]:
             self._display_mode = "idle"
             self._idle_since = None
             self._was_in_schedule = False
             self._standby_sent_for_idle = False
-            return
+            return None
 
         self._controller.configure(settings["client_path"], settings["device_address"])
         if not self._controller.available():
-            return
+            return None
 
         now_utc = datetime.now(timezone.utc)
         now_local = self._local_now()
         in_schedule = is_in_schedule_window(settings["schedules"], now_local)
 
-        alarm_payload = self._get_alarm_payload()
-        current_mode = _alarm_display_mode(
-            alarm_payload,
+        deadlines: List[datetime] = []
+        boundary = next_schedule_boundary(settings["schedules"], now_local)
+        if boundary is not None:
+            deadlines.append(boundary.astimezone(timezone.utc))
+
+        display_until = _alarm_display_until(
+            self._get_alarm_payload(),
             self._get_display_duration_minutes(),
         )
+        current_mode = "alarm" if display_until is not None and display_until >= now_utc else "idle"
         previous_mode = self._display_mode
 
         if in_schedule and not self._was_in_schedule:
@@ -343,6 +623,7 @@ class CecDisplayWatcher:
         if current_mode == "alarm":
             self._idle_since = None
             self._standby_sent_for_idle = False
+            deadlines.append(display_until)
         elif current_mode == "idle":
             if in_schedule:
                 if self._controller.wake():
@@ -360,22 +641,31 @@ class CecDisplayWatcher:
                     idle_deadline = self._idle_since + timedelta(
                         minutes=settings["idle_standby_minutes"]
                     )
-                    if now_utc >= idle_deadline:
-                        if self._controller.standby():
-                            self._standby_sent_for_idle = True
+                    if now_utc < idle_deadline:
+                        deadlines.append(idle_deadline)
+                    elif self._controller.standby():
+                        self._standby_sent_for_idle = True
+                    else:
+                        deadlines.append(now_utc + timedelta(seconds=_RETRY_SECONDS))
 
         self._display_mode = current_mode
         self._was_in_schedule = in_schedule
 
+        if not deadlines:
+            return None
+        delay = (min(deadlines) - now_utc).total_seconds()
+        return max(0.0, delay) + _DEADLINE_SLACK_SECONDS
+
 
 def create_cec_display_watcher(
     get_effective_settings: Callable[[], Dict[str, Any]],
     get_alarm_payload: Callable[[], Optional[Dict[str, Any]]],
     get_display_duration_minutes: Callable[[], int],
     get_timezone: Callable[[], str],
+    persistent_session: bool = True,
 ) -> CecDisplayWatcher:
     """Create a configured :class:`CecDisplayWatcher` (always started in ``create_app``)."""
-    controller = CecController(_DEFAULT_CLIENT_PATH)
+    controller = CecController(_DEFAULT_CLIENT_PATH, persistent=persistent_session)
     return CecDisplayWatcher(
         get_effective_settings=get_effective_settings,
         get_alarm_payload=get_alarm_payload,
@@ -386,12 +676,14 @@ def create_cec_display_watcher(
 
 
 __all__ = [
+    "CecClientSession",
     "CecController",
     "CecDisplayWatcher",
     "create_cec_display_watcher",
     "get_hdmi_cec_settings",
     "is_cec_client_available",
     "is_in_schedule_window",
+    "next_schedule_boundary",
     "normalize_schedules",
     "_WEEKDAY_LABELS",
 ]
@@ -14,6 +14,8 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Optional, cast
 
+from .ntfy_client import parse_ntfy_topics
+
 try:
     from dotenv import load_dotenv
 except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
@@ -47,6 +49,7 @@ class AppConfig:
     history_file: Optional[str] = None
     settings_file: Optional[str] = None
     ors_api_key: Optional[str] = None
+    road_graph_file: Optional[str] = None
     app_version: str = "dev-main"
     app_version_url: Optional[str] = None
     messenger_server_url: Optional[str] = None
@@ -55,6 +58,7 @@ class AppConfig:
     calendar_urls: List[str] = field(default_factory=list)
     ntfy_topic_url: Optional[str] = None
     ntfy_poll_interval: int = 60
+    ntfy_mode: str = "stream"
     messages_file: Optional[str] = None
     message_max_ttl_hours: int = 72
     cec_enabled: bool = False
@@ -64,6 +68,7 @@ class AppConfig:
     cec_idle_standby_minutes: int = 30
     cec_wake_on_alarm: bool = True
     cec_standby_on_idle: bool = True
+    cec_persistent_session: bool = True
 
 
 class MissingConfiguration(RuntimeError):
@@ -214,6 +219,9 @@ def load_config() -> AppConfig:
     )
 
     ors_api_key = _get_env("ORS_API_KEY") or None
+    road_graph_file = _get_env("ROAD_GRAPH_FILE") or None
+    if road_graph_file:
+        _validate_path(road_graph_file, "ROAD_GRAPH_FILE")
 
     settings_password = _get_env("SETTINGS_PASSWORD") or None
     if not settings_password:
@@ -250,7 +258,15 @@ def load_config() -> AppConfig:
 
     # ntfy.sh message integration
     ntfy_topic_url = _get_env("NTFY_TOPIC_URL") or None
+    if ntfy_topic_url:
+        try:
+            parse_ntfy_topics(ntfy_topic_url)
+        except ValueError as exc:
+            raise MissingConfiguration(f"NTFY_TOPIC_URL: {exc}") from None
     ntfy_poll_interval = int(_get_env("NTFY_POLL_INTERVAL", default="60") or "60")
+    ntfy_mode = (_get_env("NTFY_MODE", default="stream") or "stream").strip().lower()
+    if ntfy_mode not in ("stream", "poll"):
+        raise MissingConfiguration("NTFY_MODE must be 'stream' or 'poll'")
     messages_file = _get_env("MESSAGES_FILE") or None
     message_max_ttl_hours = int(_get_env("MESSAGE_MAX_TTL_HOURS", default="72") or "72")
 
@@ -278,6 +294,10 @@ def load_config() -> AppConfig:
         _get_env("CEC_STANDBY_ON_IDLE", default="true") or "true"
     ).lower()
     cec_standby_on_idle = cec_standby_on_idle_raw in ("1", "true", "yes", "on")
+    cec_persistent_session_raw = (
+        _get_env("CEC_PERSISTENT_SESSION", default="true") or "true"
+    ).lower()
+    cec_persistent_session = cec_persistent_session_raw in ("1", "true", "yes", "on")
 
     if cec_enabled:
         LOGGER.info(
@@ -319,6 +339,7 @@ def load_config() -> AppConfig:
         history_file=history_file,
         settings_file=settings_file,
         ors_api_key=ors_api_key,
+        road_graph_file=road_graph_file,
         app_version=app_version,
         app_version_url=app_version_url,
         messenger_server_url=messenger_server_url,
@@ -327,6 +348,7 @@ def load_config() -> AppConfig:
         calendar_urls=calendar_urls,
         ntfy_topic_url=ntfy_topic_url,
         ntfy_poll_interval=ntfy_poll_interval,
+        ntfy_mode=ntfy_mode,
         messages_file=messages_file,
         message_max_ttl_hours=message_max_ttl_hours,
         cec_enabled=cec_enabled,
@@ -336,6 +358,7 @@ def load_config() -> AppConfig:
         cec_idle_standby_minutes=cec_idle_standby_minutes,
         cec_wake_on_alarm=cec_wake_on_alarm,
         cec_standby_on_idle=cec_standby_on_idle,
+        cec_persistent_session=cec_persistent_session,
     )
 
 
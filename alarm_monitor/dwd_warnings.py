@@ -17,6 +17,7 @@ from .bundesland import (
     resolve_dwd_region,
     warning_map_legend,
 )
+from .metrics import track_outbound
 
 LOGGER = logging.getLogger(__name__)
 
@@ -127,17 +128,18 @@ def fetch_warnings_payload(
 ) -> Dict[str, Any]:
     """Fetch the national DWD Gemeinde warnings JSON payload."""
     _session = session if session is not None else _get_session()
-    response = _session.get(
-        base_url,
-        timeout=15,
-        headers={"Accept-Encoding": "gzip"},
-    )
-    if response.status_code != 200:
-        raise DwdWarningsError(
-            f"DWD warnings request failed with status {response.status_code}"
+    with track_outbound("dwd"):
+        response = _session.get(
+            base_url,
+            timeout=15,
+            headers={"Accept-Encoding": "gzip"},
         )
+        if response.status_code != 200:
+            raise DwdWarningsError(
+                f"DWD warnings request failed with status {response.status_code}"
+            )
 
-    content = response.content
+        content = response.content
     if content[:2] == b"\x1f\x8b":
         content = gzip.decompress(content)
 
@@ -8,6 +8,8 @@ from typing import Dict, Optional
 
 import requests
 
+from .metrics import track_outbound
+
 LOGGER = logging.getLogger(__name__)
 
 # User-Agent header required by Nominatim usage policy
@@ -45,12 +47,13 @@ def geocode_location(
         "User-Agent": DEFAULT_USER_AGENT,
     }
     LOGGER.debug("Geocoding location '%s' via %s", location, base_url)
-    response = _s.get(base_url, params=params, headers=headers, timeout=10)
-    if response.status_code != 200:
-        raise GeocodingError(
-            f"Geocoding request failed with status {response.status_code}: {response.text}"
-        )
-    results = response.json()
+    with track_outbound("nominatim"):
+        response = _s.get(base_url, params=params, headers=headers, timeout=10)
+        if response.status_code != 200:
+            raise GeocodingError(
+                f"Geocoding request failed with status {response.status_code}: {response.text}"
+            )
+        results = response.json()
     if not results:
         LOGGER.warning("No geocoding results for location '%s'", location)
         return None
@@ -0,0 +1,89 @@
+"""Post-commit hooks for stored alarms.
+
+Everything that should happen once an alarm is in the store – pushing it to
+the dashboards, waking the display, watching the incident's participants –
+is registered here instead of being called from the request handler.  Hooks
+run in registration order: inline hooks on the caller's thread (only cheap
+ones such as the SSE notification), background hooks one after another on a
+dedicated worker thread, so a slow integration never delays the response to
+alarm-mail or the push to other dashboards.  Every hook call is timed in
+``alarm_monitor_alarm_hook_duration_seconds``.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import ALARM_HOOK_ERRORS, ALARM_HOOK_SECONDS
+
+LOGGER = logging.getLogger(__name__)
+
+AlarmHook = Callable[[Dict[str, Any]], None]
+
+
+class AlarmHooks:
+    """Ordered pipeline of side effects for newly stored alarms."""
+
+    def __init__(self) -> None:
+        self._inline: List[Tuple[str, AlarmHook]] = []
+        self._background: List[Tuple[str, AlarmHook]] = []
+        # A single worker keeps background hooks in order across alarms too.
+        self._worker = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="alarm-hooks"
+        )
+
+    @property
+    def names(self) -> List[str]:
+        """Hook names in execution order."""
+        return [name for name, _ in self._inline + self._background]
+
+    def register(self, name: str, hook: AlarmHook, background: bool = False) -> None:
+        """Append *hook*; ``background=True`` runs it off the request thread."""
+        (self._background if background else self._inline).append((name, hook))
+
+    def dispatch(self, alarm: Dict[str, Any]) -> Optional[concurrent.futures.Future]:
+        """Run the hooks for a stored *alarm*.
+
+        Returns once the inline hooks are done; the returned future (if any
+        background hooks are registered) completes after the background ones.
+        A failing hook is logged and does not stop the hooks after it.
+        """
+        for name, hook in self._inline:
+            self._call(name, hook, alarm)
+        if not self._background:
+            return None
+        return self._worker.submit(self._run_background, alarm)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until the background hooks queued so far have run."""
+        self._worker.submit(lambda: None).result(timeout=timeout)
+
+    def shutdown(self) -> None:
+        """Stop the hook worker; registered with ``atexit`` by the app."""
+        self._worker.shutdown(wait=False)
+
+    def _run_background(self, alarm: Dict[str, Any]) -> None:
+        for name, hook in self._background:
+            self._call(name, hook, alarm)
+
+    @staticmethod
+    def _call(name: str, hook: AlarmHook, alarm: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            hook(alarm)
+        except Exception:
+            ALARM_HOOK_ERRORS.inc(name)
+            LOGGER.error(
+                "Alarm hook %s failed for incident %s",
+                name,
+                alarm.get("incident_number"),
+                exc_info=True,
+            )
+        finally:
+            ALARM_HOOK_SECONDS.observe(time.perf_counter() - start, name)
+
+
+__all__ = ["AlarmHook", "AlarmHooks"]
@@ -0,0 +1,589 @@
+"""Streaming iCalendar (RFC 5545) parser for calendar feeds.
+
+Feeds exported from group calendars often span many years, while the
+dashboard only ever shows the next few weeks.  The parser therefore works on
+a stream of lines instead of the whole document: only the text of the
+``VEVENT`` currently being read is held in memory.  Each event is parsed once
+into a :class:`ParsedEvent` and kept in a :class:`CalendarIndex` keyed by the
+digest of its text; refreshing a feed re-parses only events whose text
+changed.  Single events that are already over are not kept at all.
+
+Recurring events (``RRULE``/``EXDATE``) are expanded only up to the end of the
+window.  Supported are ``FREQ=DAILY|WEEKLY|MONTHLY|YEARLY`` with ``INTERVAL``,
+``COUNT``, ``UNTIL``, ``BYDAY`` (including ordinals such as ``2TU`` or
+``-1FR`` for monthly rules), ``BYMONTHDAY``, ``BYMONTH`` and ``WKST``.  Rules
+using other parts yield only their first occurrence.
+"""
+
+from __future__ import annotations
+
+import calendar
+import codecs
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Properties copied from a VEVENT; everything else is skipped while reading.
+_KEPT_PROPERTIES = frozenset({
+    "SUMMARY",
+    "DTSTART",
+    "DTEND",
+    "DESCRIPTION",
+    "LOCATION",
+    "RRULE",
+    "EXDATE",
+    "UID",
+    "RECURRENCE-ID",
+    "SEQUENCE",
+    "LAST-MODIFIED",
+})
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_BYDAY_RE = re.compile(r"^([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)$")
+_SUPPORTED_RULE_PARTS = frozenset({
+    "FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "WKST",
+})
+# Upper bounds that keep malformed or pathological rules from spinning:
+# periods inspected per rule and occurrences produced per event.
+_MAX_PERIODS = 10000
+_MAX_OCCURRENCES = 1000
+
+
+_DATE_RE = re.compile(r"(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})Z?)?")
+
+
+def parse_ical_datetime(value: str) -> Optional[datetime]:
+    """Parse an iCal date or datetime value into a UTC-aware datetime.
+
+    Handles:
+    - All-day dates: ``YYYYMMDD``
+    - UTC datetimes: ``YYYYMMDDTHHMMSSz``
+    - Local datetimes (treated as UTC): ``YYYYMMDDTHHMMSS``
+    """
+    # Called for every event of a multi-year feed, hence no strptime().
+    match = _DATE_RE.fullmatch(value.strip())
+    if match is None:
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    try:
+        if hour is None:
+            return datetime(int(year), int(month), int(day), tzinfo=timezone.utc)
+        return datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Line stream
+# ---------------------------------------------------------------------------
+
+
+def iter_unfolded_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode UTF-8 *chunks* and yield unfolded content lines (RFC 5545 §3.1).
+
+    Only the current, incomplete line is buffered between chunks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    remainder = ""
+    pending: List[str] = []
+
+    def _feed(raw_lines: List[str]) -> Iterator[str]:
+        for raw in raw_lines:
+            if raw.endswith("\r"):
+                raw = raw[:-1]
+            if raw[:1] in (" ", "\t"):
+                if pending:
+                    pending.append(raw[1:])
+                continue
+            if pending:
+                yield "".join(pending)
+            pending[:] = [raw]
+
+    for chunk in chunks:
+        text = remainder + decoder.decode(chunk)
+        lines = text.split("\n")
+        remainder = lines.pop()
+        yield from _feed(lines)
+
+    remainder += decoder.decode(b"", final=True)
+    yield from _feed([remainder] if remainder else [])
+    if pending:
+        yield "".join(pending)
+
+
+def _split_property(line: str) -> Tuple[str, str]:
+    """Return ``(NAME, value)`` of a content line, ignoring parameters."""
+    colon = line.find(":")
+    if colon < 0:
+        return "", ""
+    semicolon = line.find(";", 0, colon)
+    if semicolon >= 0 and '"' in line[semicolon:colon]:
+        # A quoted parameter value (e.g. ALTREP="https://...") may contain ':'.
+        in_quotes = False
+        for pos in range(semicolon, len(line)):
+            char = line[pos]
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ":" and not in_quotes:
+                colon = pos
+                break
+    name_end = semicolon if semicolon >= 0 else colon
+    return line[:name_end].upper(), line[colon + 1:]
+
+
+# ---------------------------------------------------------------------------
+# Event index
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ParsedEvent:
+    """The window-independent content of one VEVENT."""
+
+    summary: str
+    start: datetime
+    duration: Optional[timedelta] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    uid: Optional[str] = None
+    recurrence_id: Optional[datetime] = None
+    sequence: int = 0
+    last_modified: str = ""
+    rrule: Optional[str] = None
+    exdates: FrozenSet[datetime] = frozenset()
+
+    def occurrences(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        excluded: AbstractSet[datetime] = frozenset(),
+    ) -> List[Dict[str, Any]]:
+        """Event dictionaries for every occurrence starting inside the window."""
+        if self.rrule:
+            starts: Iterable[datetime] = (
+                occurrence
+                for occurrence in expand_rrule(self.rrule, self.start, window_start, window_end)
+                if occurrence not in self.exdates and occurrence not in excluded
+            )
+        elif window_start <= self.start <= window_end:
+            starts = (self.start,)
+        else:
+            return []
+
+        occurrences = []
+        for occurrence in starts:
+            if occurrence < window_start:
+                continue
+            event: Dict[str, Any] = {"summary": self.summary, "start": occurrence}
+            if self.duration is not None:
+                event["end"] = occurrence + self.duration
+            if self.description is not None:
+                event["description"] = self.description
+            if self.location is not None:
+                event["location_name"] = self.location
+            occurrences.append(event)
+            if len(occurrences) >= _MAX_OCCURRENCES:
+                break
+        return occurrences
+
+
+def iter_vevent_blocks(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Yield the content lines between each ``BEGIN:VEVENT``/``END:VEVENT`` pair."""
+    block: Optional[List[str]] = None
+    for line in lines:
+        if block is None:
+            if line[:12].upper() == "BEGIN:VEVENT":
+                block = []
+        elif line[:10].upper() == "END:VEVENT":
+            yield block
+            block = None
+        else:
+            block.append(line)
+
+
+def block_digest(block: Sequence[str]) -> bytes:
+    """Digest of a VEVENT's text, ignoring ``DTSTAMP``.
+
+    Many servers stamp every event with the export time, so including it
+    would make each refresh look like a change to every event.
+    """
+    text = "\n".join(line for line in block if line[:7].upper() != "DTSTAMP")
+    return hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=16).digest()
+
+
+def parse_vevent(
+    block: Sequence[str], not_before: Optional[datetime] = None
+) -> Optional[ParsedEvent]:
+    """Parse the lines of one VEVENT.
+
+    Returns None without SUMMARY or a valid DTSTART, and for single
+    (non-recurring, non-override) events starting before *not_before*.
+    """
+    props: Dict[str, Any] = {}
+    nested = 0
+    for line in block:
+        name, value = _split_property(line)
+        if name == "BEGIN":
+            # Sub-components such as VALARM carry their own DESCRIPTION etc.
+            nested += 1
+        elif name == "END":
+            nested = max(0, nested - 1)
+        elif not nested and name in _KEPT_PROPERTIES:
+            if name == "EXDATE":
+                props.setdefault("EXDATE", []).append(value)
+            else:
+                props[name] = value
+
+    summary = props.get("SUMMARY")
+    start = parse_ical_datetime(props.get("DTSTART", ""))
+    if summary is None or start is None:
+        return None
+    if (
+        not_before is not None
+        and start < not_before
+        and "RRULE" not in props
+        and "RECURRENCE-ID" not in props
+    ):
+        return None
+    end = parse_ical_datetime(props.get("DTEND", ""))
+    try:
+        sequence = int(props.get("SEQUENCE", "0"))
+    except ValueError:
+        sequence = 0
+    return ParsedEvent(
+        summary=summary,
+        start=start,
+        duration=end - start if end is not None else None,
+        description=props.get("DESCRIPTION"),
+        location=props.get("LOCATION"),
+        uid=props.get("UID"),
+        recurrence_id=parse_ical_datetime(props.get("RECURRENCE-ID", "")),
+        sequence=sequence,
+        last_modified=props.get("LAST-MODIFIED", "").strip(),
+        rrule=props.get("RRULE"),
+        exdates=frozenset(_parse_exdates(props.get("EXDATE", ()))),
+    )
+
+
+class CalendarIndex:
+    """Parsed VEVENTs of one feed, keyed by the digest of their text.
+
+    Building a new index from a refreshed feed reuses the parsed entry of
+    every VEVENT whose text is unchanged, so only edited or new events are
+    parsed again.  Single events that already lie before the window are
+    stored as ``None`` – they can never become visible again.
+
+    ``parsed`` and ``reused`` count the work done while building.
+    """
+
+    def __init__(
+        self,
+        entries: Optional[Dict[bytes, Optional[ParsedEvent]]] = None,
+        parsed: int = 0,
+        reused: int = 0,
+    ) -> None:
+        self._entries: Dict[bytes, Optional[ParsedEvent]] = entries or {}
+        self.parsed = parsed
+        self.reused = reused
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def build(
+        cls,
+        lines: Iterable[str],
+        window_start: datetime,
+        previous: Optional["CalendarIndex"] = None,
+    ) -> "CalendarIndex":
+        """Index the VEVENTs in *lines*, reusing entries of *previous*."""
+        known = previous._entries if previous is not None else {}
+        entries: Dict[bytes, Optional[ParsedEvent]] = {}
+        parsed = reused = 0
+        for block in iter_vevent_blocks(lines):
+            digest = block_digest(block)
+            if digest in entries:
+                continue
+            if digest in known:
+                entries[digest] = known[digest]
+                reused += 1
+                continue
+            entries[digest] = parse_vevent(block, not_before=window_start)
+            parsed += 1
+        return cls(entries, parsed=parsed, reused=reused)
+
+    def occurrences(self, window_start: datetime, window_end: datetime) -> List[Dict[str, Any]]:
+        """All occurrences starting inside the window, sorted by start.
+
+        Several versions of the same ``UID``/``RECURRENCE-ID`` are resolved
+        to the one with the highest ``SEQUENCE`` (then ``LAST-MODIFIED``);
+        an override replaces the occurrence of its master it was moved from.
+        """
+        current: Dict[Tuple[str, Optional[datetime]], ParsedEvent] = {}
+        anonymous: List[ParsedEvent] = []
+        for event in self._entries.values():
+            if event is None:
+                continue
+            if event.uid is None:
+                anonymous.append(event)
+                continue
+            key = (event.uid, event.recurrence_id)
+            other = current.get(key)
+            if other is None or (event.sequence, event.last_modified) > (
+                other.sequence, other.last_modified
+            ):
+                current[key] = event
+
+        moved: Dict[str, Set[datetime]] = {}
+        for uid, recurrence_id in current:
+            if recurrence_id is not None:
+                moved.setdefault(uid, set()).add(recurrence_id)
+
+        occurrences: List[Dict[str, Any]] = []
+        for (uid, recurrence_id), event in current.items():
+            excluded = moved.get(uid, frozenset()) if recurrence_id is None else frozenset()
+            occurrences.extend(event.occurrences(window_start, window_end, excluded))
+        for event in anonymous:
+            occurrences.extend(event.occurrences(window_start, window_end))
+        occurrences.sort(key=_start_of)
+        return occurrences
+
+
+def _start_of(event: Dict[str, Any]) -> datetime:
+    return event["start"]
+
+
+def parse_ical_events(
+    lines: Iterable[str],
+    window_start: datetime,
+    window_end: datetime,
+) -> List[Dict[str, Any]]:
+    """Return occurrences of all VEVENTs starting within the window.
+
+    Args:
+        lines: Unfolded content lines, e.g. from :func:`iter_unfolded_lines`.
+        window_start: Earliest start time to keep (inclusive).
+        window_end: Latest start time to keep (inclusive).
+
+    Returns:
+        Event dictionaries with ``summary``, ``start`` and, where present,
+        ``end``, ``description`` and ``location_name``; one per occurrence,
+        sorted by start.
+    """
+    return CalendarIndex.build(lines, window_start).occurrences(window_start, window_end)
+
+
+def _parse_exdates(values: Sequence[str]) -> Set[datetime]:
+    excluded = set()
+    for value in values:
+        for item in value.split(","):
+            parsed = parse_ical_datetime(item)
+            if parsed is not None:
+                excluded.add(parsed)
+    return excluded
+
+
+# ---------------------------------------------------------------------------
+# RRULE expansion
+# ---------------------------------------------------------------------------
+
+
+def _parse_rule(rule: str) -> Dict[str, str]:
+    parts = {}
+    for part in rule.split(";"):
+        key, sep, value = part.partition("=")
+        if sep:
+            parts[key.strip().upper()] = value.strip().upper()
+    return parts
+
+
+def _parse_byday(value: str) -> List[Tuple[Optional[int], int]]:
+    result = []
+    for item in value.split(","):
+        match = _BYDAY_RE.match(item.strip())
+        if match is None:
+            raise ValueError(f"invalid BYDAY entry {item!r}")
+        ordinal = int(match.group(1)) if match.group(1) else None
+        result.append((ordinal, _WEEKDAYS[match.group(2)]))
+    return result
+
+
+def _int_list(value: Optional[str]) -> List[int]:
+    return [int(item) for item in value.split(",")] if value else []
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _days_in_month(
+    year: int,
+    month: int,
+    bymonthday: List[int],
+    byday: List[Tuple[Optional[int], int]],
+    default_day: int,
+) -> List[int]:
+    last = calendar.monthrange(year, month)[1]
+    if not bymonthday and not byday:
+        return [default_day] if default_day <= last else []
+
+    monthdays: Optional[Set[int]] = None
+    if bymonthday:
+        monthdays = set()
+        for day in bymonthday:
+            resolved = day if day > 0 else last + 1 + day
+            if 1 <= resolved <= last:
+                monthdays.add(resolved)
+
+    weekdays: Optional[Set[int]] = None
+    if byday:
+        weekdays = set()
+        first_weekday = date(year, month, 1).weekday()
+        for ordinal, weekday in byday:
+            matching = list(range(1 + (weekday - first_weekday) % 7, last + 1, 7))
+            if ordinal is None:
+                weekdays.update(matching)
+            elif 0 < ordinal <= len(matching):
+                weekdays.add(matching[ordinal - 1])
+            elif 0 < -ordinal <= len(matching):
+                weekdays.add(matching[ordinal])
+
+    if monthdays is not None and weekdays is not None:
+        return sorted(monthdays & weekdays)
+    return sorted(monthdays if monthdays is not None else weekdays or ())
+
+
+def expand_rrule(
+    rule: str,
+    dtstart: datetime,
+    window_start: datetime,
+    window_end: datetime,
+) -> Iterator[datetime]:
+    """Yield occurrence start times of *rule* in chronological order.
+
+    Expansion stops at *window_end* (or ``UNTIL``/``COUNT``).  Without
+    ``COUNT`` whole periods before *window_start* are skipped arithmetically,
+    so a weekly rule started years ago costs the same as a new one.
+    Occurrences before *window_start* may still be yielded; callers filter.
+    Unsupported rules yield *dtstart* only.
+    """
+    try:
+        parts = _parse_rule(rule)
+        freq = parts.get("FREQ")
+        interval = max(1, int(parts.get("INTERVAL", "1")))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        until = parse_ical_datetime(parts["UNTIL"]) if "UNTIL" in parts else None
+        byday = _parse_byday(parts["BYDAY"]) if "BYDAY" in parts else []
+        bymonthday = _int_list(parts.get("BYMONTHDAY"))
+        bymonth = set(_int_list(parts.get("BYMONTH")))
+        week_start = _WEEKDAYS.get(parts.get("WKST", "MO"), 0)
+    except (KeyError, ValueError):
+        LOGGER.debug("Ignoring malformed RRULE %r", rule)
+        yield dtstart
+        return
+
+    unsupported = (
+        freq not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+        or not set(parts) <= _SUPPORTED_RULE_PARTS
+        or (freq == "YEARLY" and byday and not bymonth)
+    )
+    if unsupported:
+        LOGGER.debug("Unsupported RRULE %r, using first occurrence only", rule)
+        yield dtstart
+        return
+
+    stop = window_end if until is None else min(window_end, until)
+    start_day = dtstart.date()
+    time_of_day = dtstart.timetz()
+    weekdays = {weekday for _, weekday in byday}
+
+    def _period_days(period: int) -> List[date]:
+        if freq == "DAILY":
+            day = start_day + timedelta(days=period * interval)
+            if weekdays and day.weekday() not in weekdays:
+                return []
+            return [day]
+        if freq == "WEEKLY":
+            week = start_day - timedelta(days=(start_day.weekday() - week_start) % 7)
+            week += timedelta(weeks=period * interval)
+            wanted = weekdays or {start_day.weekday()}
+            return sorted(week + timedelta(days=(wd - week_start) % 7) for wd in wanted)
+        if freq == "MONTHLY":
+            year, month = _add_months(start_day.year, start_day.month, period * interval)
+            return [
+                date(year, month, day)
+                for day in _days_in_month(year, month, bymonthday, byday, start_day.day)
+            ]
+        year = start_day.year + period * interval
+        return [
+            date(year, month, day)
+            for month in sorted(bymonth or {start_day.month})
+            for day in _days_in_month(year, month, bymonthday, byday, start_day.day)
+        ]
+
+    first_period = 0
+    if count is None and window_start > dtstart:
+        gap_days = (window_start.date() - start_day).days
+        if freq == "DAILY":
+            periods = gap_days // interval
+        elif freq == "WEEKLY":
+            periods = gap_days // 7 // interval
+        elif freq == "MONTHLY":
+            periods = ((window_start.year - start_day.year) * 12
+                       + window_start.month - start_day.month) // interval
+        else:
+            periods = (window_start.year - start_day.year) // interval
+        # One period of slack for occurrences spanning the window start.
+        first_period = max(0, periods - 1)
+
+    produced = 0
+    for period in range(first_period, first_period + _MAX_PERIODS):
+        days = _period_days(period)
+        for day in days:
+            if bymonth and freq != "YEARLY" and day.month not in bymonth:
+                continue
+            occurrence = datetime.combine(day, time_of_day)
+            if occurrence < dtstart:
+                continue
+            if occurrence > stop:
+                return
+            yield occurrence
+            produced += 1
+            if count is not None and produced >= count:
+                return
+        if days and datetime.combine(days[-1], time_of_day) > stop:
+            return
+
+
+__all__ = [
+    "CalendarIndex",
+    "ParsedEvent",
+    "block_digest",
+    "expand_rrule",
+    "iter_unfolded_lines",
+    "iter_vevent_blocks",
+    "parse_ical_datetime",
+    "parse_ical_events",
+    "parse_vevent",
+]
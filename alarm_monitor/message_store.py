@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import heapq
 import json
 import logging
 import threading
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .metrics import STORE_PERSIST_SECONDS
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,7 +29,22 @@ _UUID_RE = _re.compile(
 
 
 class MessageStore:
-    """Thread-safe storage for timed dashboard messages with optional persistence."""
+    """Thread-safe storage for timed dashboard messages with optional persistence.
+
+    Messages are kept in an insertion-ordered dict keyed by ``id``, so
+    inserts, lookups and deletes are O(1).  Messages that carry a
+    ``source_id`` (e.g. the ntfy sequence id) are also indexed by it, so
+    re-ingesting the same external message is an O(1) no-op and an update
+    with the same ``source_id`` replaces the entry in place instead of
+    adding a duplicate.  :meth:`apply_events` applies a whole batch of
+    upserts and deletes under one lock acquisition with a single persist.
+
+    Expiry times are parsed once and kept in a min-heap, so finding the next
+    message to expire is O(1) and :meth:`get_active` serves a cached list
+    that is only rebuilt after a change.  :meth:`start_expiry_timer` runs a
+    single thread that sleeps until the next expiry, prunes and persists,
+    and reports the change through a callback (used for SSE updates).
+    """
 
     def __init__(
         self,
@@ -33,7 +52,19 @@ class MessageStore:
         persistence_path: Optional[PathType] = None,
     ) -> None:
         self._lock = threading.Lock()
-        self._messages: List[Dict[str, Any]] = []
+        # id -> message, oldest first (the public order is newest first).
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        # source_id -> ids of the messages carrying it, oldest first.
+        self._by_source_id: Dict[str, List[str]] = {}
+        # id -> expiry (unix seconds) and a heap of (expiry, id); heap entries
+        # whose expiry no longer matches _expiry are stale and skipped.
+        self._expiry: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._active: Optional[List[Dict[str, Any]]] = None
+        self._version = 0
+        self._wakeup = threading.Event()
+        self._timer_stop = threading.Event()
+        self._timer_thread: Optional[threading.Thread] = None
         self._max_ttl_hours = max(1, max_ttl_hours)
         self._persistence_path = Path(persistence_path) if persistence_path else None
 
@@ -64,18 +95,11 @@ class MessageStore:
         }
 
         with self._lock:
-            self._messages.insert(0, message)
-            if len(self._messages) > _MAX_MESSAGES:
-                self._messages.pop()
+            self._insert_locked(message)
             self._persist_locked()
 
-        if on_stored:
-            try:
-                on_stored()
-            except Exception:
-                LOGGER.warning("Error in on_stored callback", exc_info=True)
-
-        return message
+        _notify(on_stored)
+        return dict(message)
 
     def add_with_absolute_expiry(
         self,
@@ -87,98 +111,239 @@ class MessageStore:
         """Add a message with an absolute expiry datetime (e.g. from ntfy).
 
         Returns the stored entry, or None if the message is already expired
-        or the text is empty.
+        or the text is empty.  If a message with the same *source_id* exists
+        and has the same text it is returned unchanged (nothing is persisted
+        and *on_stored* is not called), so replaying a source is idempotent;
+        a changed text updates that entry in place, keeping its id.
         """
-        if not text or not text.strip():
-            return None
-
-        now = datetime.now(timezone.utc)
-        if expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-        if expires_at <= now:
-            return None
-
-        max_expires_at = now + timedelta(hours=self._max_ttl_hours)
-        clamped_expires_at = min(expires_at, max_expires_at)
-
-        message: Dict[str, Any] = {
-            "id": str(uuid.uuid4()),
-            "text": text.strip(),
-            "created_at": now.isoformat(),
-            "expires_at": clamped_expires_at.isoformat(),
-        }
-        normalized_source_id = (source_id or "").strip()
-        if normalized_source_id:
-            message["source_id"] = normalized_source_id
-
         with self._lock:
-            self._messages.insert(0, message)
-            if len(self._messages) > _MAX_MESSAGES:
-                self._messages.pop()
-            self._persist_locked()
-
-        if on_stored:
-            try:
-                on_stored()
-            except Exception:
-                LOGGER.warning("Error in on_stored callback", exc_info=True)
-
+            message, changed = self._upsert_locked(text, expires_at, source_id)
+            if changed:
+                self._persist_locked()
+        if changed:
+            _notify(on_stored)
         return message
 
     def delete_by_source_id(self, source_id: str) -> bool:
         """Delete all messages linked to a source ID. Returns True if any were removed."""
-        normalized_source_id = (source_id or "").strip()
-        if not normalized_source_id:
-            return False
         with self._lock:
-            original_len = len(self._messages)
-            self._messages = [
-                m for m in self._messages if m.get("source_id") != normalized_source_id
-            ]
-            deleted = len(self._messages) < original_len
+            deleted = self._delete_source_locked(source_id)
             if deleted:
                 self._persist_locked()
         return deleted
 
+    def apply_events(
+        self,
+        events: Iterable[Dict[str, Any]],
+        on_changed: Optional[Callable[[], None]] = None,
+    ) -> int:
+        """Apply a batch of changes with one lock acquisition and one persist.
+
+        Each event is a dict with an ``action``:
+
+        * ``"upsert"`` – ``text``, ``expires_at`` (datetime) and optional
+          ``source_id``; same semantics as :meth:`add_with_absolute_expiry`.
+        * ``"delete"`` – ``source_id`` or ``id`` of the message(s) to remove.
+
+        Unknown actions are ignored.  Returns the number of events that
+        changed the store; *on_changed* is called once if it is non-zero.
+        """
+        changes = 0
+        with self._lock:
+            for event in events:
+                action = event.get("action")
+                if action == "upsert":
+                    _, changed = self._upsert_locked(
+                        event.get("text") or "", event["expires_at"], event.get("source_id")
+                    )
+                elif action == "delete" and event.get("source_id"):
+                    changed = self._delete_source_locked(event["source_id"])
+                elif action == "delete" and event.get("id"):
+                    changed = self._remove_locked(str(event["id"]))
+                else:
+                    changed = False
+                changes += changed
+            if changes:
+                self._persist_locked()
+        if changes:
+            _notify(on_changed)
+        return changes
+
     def get_active(self) -> List[Dict[str, Any]]:
-        """Return all non-expired messages, newest first."""
-        now = datetime.now(timezone.utc)
+        """Return all non-expired messages, newest first.
+
+        The list is cached between changes; treat the returned dicts as
+        read-only.
+        """
         with self._lock:
-            return [
-                dict(msg) for msg in self._messages
-                if self._parse_expires_at(msg) > now
-            ]
+            if self._drop_expired_locked(time.time()):
+                self._persist_locked()
+            if self._active is None:
+                self._active = [dict(msg) for msg in reversed(self._messages.values())]
+            return list(self._active)
+
+    @property
+    def version(self) -> int:
+        """Counter incremented on every change of the message list."""
+        return self._version
 
     def delete(self, message_id: str) -> bool:
         """Delete a message by ID.  Returns True if found and removed."""
         if not message_id or not _UUID_RE.match(message_id):
             return False
         with self._lock:
-            original_len = len(self._messages)
-            self._messages = [m for m in self._messages if m.get("id") != message_id]
-            deleted = len(self._messages) < original_len
+            deleted = self._remove_locked(message_id)
             if deleted:
                 self._persist_locked()
         return deleted
 
     def prune_expired(self) -> int:
         """Remove expired messages.  Returns the number removed."""
-        now = datetime.now(timezone.utc)
         with self._lock:
-            before = len(self._messages)
-            self._messages = [
-                m for m in self._messages if self._parse_expires_at(m) > now
-            ]
-            pruned = before - len(self._messages)
+            pruned = self._drop_expired_locked(time.time())
             if pruned > 0:
                 self._persist_locked()
         return pruned
 
+    def next_expiry(self) -> Optional[float]:
+        """Unix time at which the next message expires, or None."""
+        with self._lock:
+            return self._next_expiry_locked()
+
+    # ------------------------------------------------------------------
+    # Expiry timer
+    # ------------------------------------------------------------------
+
+    def start_expiry_timer(self, on_expired: Optional[Callable[[], None]] = None) -> None:
+        """Start the thread that prunes messages as they expire (idempotent).
+
+        *on_expired* is called after expired messages have been removed.
+        """
+        if self._timer_thread and self._timer_thread.is_alive():
+            return
+        self._timer_stop.clear()
+        self._timer_thread = threading.Thread(
+            target=self._expiry_loop, args=(on_expired,), daemon=True, name="message-expiry"
+        )
+        self._timer_thread.start()
+
+    def stop_expiry_timer(self) -> None:
+        """Signal the expiry thread to stop."""
+        self._timer_stop.set()
+        self._wakeup.set()
+
+    def _expiry_loop(self, on_expired: Optional[Callable[[], None]]) -> None:
+        while not self._timer_stop.is_set():
+            next_at = self.next_expiry()
+            timeout = None if next_at is None else max(0.0, next_at - time.time())
+            # Changes set _wakeup, so a message expiring earlier than the
+            # current deadline shortens the wait.
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._timer_stop.is_set():
+                break
+            if self.prune_expired():
+                _notify(on_expired)
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _changed_locked(self) -> None:
+        self._active = None
+        self._version += 1
+        self._wakeup.set()
+
+    def _track_locked(self, message: Dict[str, Any]) -> None:
+        expires = self._parse_expires_at(message).timestamp()
+        self._expiry[message["id"]] = expires
+        heapq.heappush(self._heap, (expires, message["id"]))
+        self._changed_locked()
+
+    def _insert_locked(self, message: Dict[str, Any]) -> None:
+        self._messages[message["id"]] = message
+        if message.get("source_id"):
+            self._by_source_id.setdefault(message["source_id"], []).append(message["id"])
+        self._track_locked(message)
+        if len(self._messages) > _MAX_MESSAGES:
+            self._remove_locked(next(iter(self._messages)))
+
+    def _remove_locked(self, message_id: str) -> bool:
+        message = self._messages.pop(message_id, None)
+        if message is None:
+            return False
+        # The heap entry becomes stale and is skipped lazily.
+        self._expiry.pop(message_id, None)
+        source_id = message.get("source_id")
+        ids = self._by_source_id.get(source_id) if source_id else None
+        if ids is not None:
+            ids.remove(message_id)
+            if not ids:
+                del self._by_source_id[source_id]
+        self._changed_locked()
+        return True
+
+    def _delete_source_locked(self, source_id: Optional[str]) -> bool:
+        ids = self._by_source_id.get((source_id or "").strip())
+        if not ids:
+            return False
+        for message_id in list(ids):
+            self._remove_locked(message_id)
+        return True
+
+    def _upsert_locked(
+        self, text: str, expires_at: datetime, source_id: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        if not text or not text.strip():
+            return None, False
+
+        now = datetime.now(timezone.utc)
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= now:
+            return None, False
+
+        max_expires_at = now + timedelta(hours=self._max_ttl_hours)
+        text = text.strip()
+        expires_iso = min(expires_at, max_expires_at).isoformat()
+        normalized_source_id = (source_id or "").strip()
+
+        ids = self._by_source_id.get(normalized_source_id) if normalized_source_id else None
+        if ids:
+            existing = self._messages[ids[-1]]
+            if existing["text"] == text:
+                return dict(existing), False
+            existing["text"] = text
+            existing["expires_at"] = expires_iso
+            self._track_locked(existing)
+            return dict(existing), True
+
+        message: Dict[str, Any] = {
+            "id": str(uuid.uuid4()),
+            "text": text,
+            "created_at": now.isoformat(),
+            "expires_at": expires_iso,
+        }
+        if normalized_source_id:
+            message["source_id"] = normalized_source_id
+        self._insert_locked(message)
+        return dict(message), True
+
+    def _next_expiry_locked(self) -> Optional[float]:
+        heap = self._heap
+        while heap and self._expiry.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def _drop_expired_locked(self, now: float) -> int:
+        dropped = 0
+        while True:
+            next_at = self._next_expiry_locked()
+            if next_at is None or next_at > now:
+                return dropped
+            _, message_id = heapq.heappop(self._heap)
+            dropped += self._remove_locked(message_id)
+
     @staticmethod
     def _parse_expires_at(message: Dict[str, Any]) -> datetime:
         """Parse expires_at from a message dict.  Returns epoch (past) on failure."""
@@ -200,7 +365,10 @@ class MessageStore:
             with self._persistence_path.open("r", encoding="utf-8") as fh:
                 data = json.load(fh)
             if isinstance(data, list):
-                self._messages = [m for m in data if isinstance(m, dict)]
+                # The file is newest first; insert oldest first.
+                for message in reversed(data):
+                    if isinstance(message, dict) and message.get("id"):
+                        self._insert_locked(message)
         except Exception as exc:
             LOGGER.warning(
                 "Failed to load persisted messages from %s: %s",
@@ -213,9 +381,12 @@ class MessageStore:
             return
         tmp_path = self._persistence_path.with_suffix(".tmp")
         try:
-            with tmp_path.open("w", encoding="utf-8") as fh:
-                json.dump(self._messages, fh, ensure_ascii=False, indent=2)
-            tmp_path.replace(self._persistence_path)
+            with STORE_PERSIST_SECONDS.time("messages"):
+                with tmp_path.open("w", encoding="utf-8") as fh:
+                    json.dump(
+                        list(reversed(self._messages.values())), fh, ensure_ascii=False, indent=2
+                    )
+                tmp_path.replace(self._persistence_path)
         except Exception as exc:
             LOGGER.warning(
                 "Failed to persist messages to %s: %s",
@@ -225,4 +396,12 @@ class MessageStore:
             tmp_path.unlink(missing_ok=True)
 
 
+def _notify(callback: Optional[Callable[[], None]]) -> None:
+    if callback:
+        try:
+            callback()
+        except Exception:
+            LOGGER.warning("Error in message store callback", exc_info=True)
+
+
 __all__ = ["MessageStore"]
@@ -3,17 +3,35 @@
 This module provides functionality to retrieve participant responses from an
 external alarm messenger server. The alarm messenger is notified of emergencies
 by the alarm-mail service, and this module polls for participant confirmations.
+
+Participant lists are fetched by a single :class:`ParticipantPoller` per
+application and shared by all dashboard clients, so the number of kiosks does
+not multiply the requests sent to the messenger server.
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 
+from .metrics import track_outbound
+
 LOGGER = logging.getLogger(__name__)
 
+# Incident number -> emergency UUID mappings kept (oldest evicted first).
+_MAX_CACHED_EMERGENCIES = 64
+_PARTICIPANT_POLL_SECONDS = 10.0
+# An incident nobody asked about for this long is no longer polled.
+_PARTICIPANT_IDLE_SECONDS = 90.0
+# Incidents polled at once; the least recently requested one is dropped.
+_MAX_WATCHED_INCIDENTS = 16
+_FIRST_FETCH_WAIT_SECONDS = 5.0
+
 
 class AlarmMessengerConfig:
     """Configuration for alarm messenger integration."""
@@ -41,13 +59,22 @@ class AlarmMessenger:
             config: Configuration for the messenger service
         """
         self.config = config
+        self._emergency_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def forget(self, incident_number: str) -> None:
+        """Drop the cached emergency UUID of a finished incident."""
+        with self._lock:
+            self._emergency_ids.pop(incident_number, None)
 
     def get_participants(self, incident_number: str) -> Optional[List[Dict[str, Any]]]:
         """Get participants for an emergency by incident number.
 
         First looks up the internal emergency UUID from alarm-messenger by
         querying /api/emergencies?emergencyNumber={incident_number}, then
-        fetches participants for that emergency.
+        fetches participants for that emergency.  The UUID is cached until
+        :meth:`forget` is called (or the messenger answers 404 for it), so
+        repeated calls for the same incident cost a single request.
 
         Args:
             incident_number: The incident number (ENR) from the alarm
@@ -55,24 +82,73 @@ class AlarmMessenger:
         Returns:
             List of participants with responder details, or None if not found/error
         """
+        emergency_id = self._resolve_emergency_id(incident_number)
+        if emergency_id is None:
+            return None
+
+        LOGGER.debug("Step 2: fetching participants for UUID %s", emergency_id)
+        try:
+            # Call the alarm-messenger API to get participants
+            with track_outbound("messenger"):
+                response = requests.get(
+                    f"{self.config.server_url}/api/emergencies/{emergency_id}/participants",
+                    headers={"X-API-Key": self.config.api_key},
+                    timeout=self.config.timeout,
+                )
+                if response.status_code == 404:
+                    # The emergency is gone (or was recreated); resolve again next time.
+                    self.forget(incident_number)
+
+                response.raise_for_status()
+                data = response.json()
+
+            participants = data.get("participants", [])
+            LOGGER.info(
+                "Retrieved %d participants for incident %s",
+                len(participants),
+                incident_number,
+            )
+            return participants
+
+        except requests.exceptions.Timeout:
+            LOGGER.error(
+                "Timeout fetching participants from messenger server: %s",
+                self.config.server_url,
+            )
+            return None
+        except requests.exceptions.RequestException as exc:
+            LOGGER.error("Failed to fetch participants from messenger: %s", exc)
+            return None
+        except Exception as exc:  # pragma: no cover
+            LOGGER.error("Unexpected error fetching participants: %s", exc)
+            return None
+
+    def _resolve_emergency_id(self, incident_number: str) -> Optional[str]:
+        with self._lock:
+            emergency_id = self._emergency_ids.get(incident_number)
+        if emergency_id is not None:
+            return emergency_id
+
         # Look up the internal emergency UUID from alarm-messenger
         LOGGER.debug("Step 1: looking up emergency UUID for incident %s", incident_number)
         try:
-            lookup_response = requests.get(
-                f"{self.config.server_url}/api/emergencies",
-                params={"emergencyNumber": incident_number},
-                headers={"X-API-Key": self.config.api_key},
-                timeout=self.config.timeout,
-            )
-            if lookup_response.status_code == 401:
-                LOGGER.error(
-                    "Participant lookup failed with 401 Unauthorized. "
-                    "alarm-messenger GET /api/emergencies must be accessible with X-API-Key. "
-                    "See alarm-messenger fix: change verifyDeviceToken to verifyApiKey on GET /api/emergencies."
+            with track_outbound("messenger") as call:
+                lookup_response = requests.get(
+                    f"{self.config.server_url}/api/emergencies",
+                    params={"emergencyNumber": incident_number},
+                    headers={"X-API-Key": self.config.api_key},
+                    timeout=self.config.timeout,
                 )
-                return None
-            lookup_response.raise_for_status()
-            response_body = lookup_response.json()
+                if lookup_response.status_code == 401:
+                    call.fail()
+                    LOGGER.error(
+                        "Participant lookup failed with 401 Unauthorized. "
+                        "alarm-messenger GET /api/emergencies must be accessible with X-API-Key. "
+                        "See alarm-messenger fix: change verifyDeviceToken to verifyApiKey on GET /api/emergencies."
+                    )
+                    return None
+                lookup_response.raise_for_status()
+                response_body = lookup_response.json()
 
             # alarm-messenger returns a paginated envelope {"data": [...], "pagination": {...}}
             if isinstance(response_body, dict) and "data" in response_body:
@@ -107,39 +183,153 @@ class AlarmMessenger:
 
         emergency_id = emergencies[0]["id"]
         LOGGER.debug("Step 1 resolved: incident %s → UUID %s", incident_number, emergency_id)
+        with self._lock:
+            self._emergency_ids[incident_number] = emergency_id
+            while len(self._emergency_ids) > _MAX_CACHED_EMERGENCIES:
+                self._emergency_ids.popitem(last=False)
+        return emergency_id
 
-        LOGGER.debug("Step 2: fetching participants for UUID %s", emergency_id)
-        try:
-            # Call the alarm-messenger API to get participants
-            response = requests.get(
-                f"{self.config.server_url}/api/emergencies/{emergency_id}/participants",
-                headers={"X-API-Key": self.config.api_key},
-                timeout=self.config.timeout,
-            )
 
-            response.raise_for_status()
-            data = response.json()
+class ParticipantPoller:
+    """Shared background poller for the participants of active incidents.
 
-            participants = data.get("participants", [])
-            LOGGER.info(
-                "Retrieved %d participants for incident %s",
-                len(participants),
-                incident_number,
-            )
-            return participants
+    Clients read participant lists from memory via :meth:`get`; the first
+    request for an incident (or :meth:`watch` when the alarm arrives) starts
+    polling it every ``interval`` seconds.  Incidents that nobody asked about
+    for ``idle_seconds`` are dropped together with their cached UUID, and at
+    most ``max_incidents`` are polled at once.  Callers must only pass
+    incident numbers of stored alarms.
+    ``on_change`` is invoked whenever a participant list changes, e.g. to
+    push an SSE update; :meth:`snapshot` exposes per-incident versions for
+    that purpose.
+    """
 
-        except requests.exceptions.Timeout:
-            LOGGER.error(
-                "Timeout fetching participants from messenger server: %s",
-                self.config.server_url,
-            )
-            return None
-        except requests.exceptions.RequestException as exc:
-            LOGGER.error("Failed to fetch participants from messenger: %s", exc)
-            return None
-        except Exception as exc:  # pragma: no cover
-            LOGGER.error("Unexpected error fetching participants: %s", exc)
-            return None
+    def __init__(
+        self,
+        messenger: AlarmMessenger,
+        on_change: Optional[Callable[[], None]] = None,
+        interval: float = _PARTICIPANT_POLL_SECONDS,
+        idle_seconds: float = _PARTICIPANT_IDLE_SECONDS,
+        max_incidents: int = _MAX_WATCHED_INCIDENTS,
+    ) -> None:
+        self._messenger = messenger
+        self._on_change = on_change
+        self._interval = interval
+        self._idle_seconds = idle_seconds
+        self._max_incidents = max(1, max_incidents)
+        self._lock = threading.Lock()
+        self._incidents: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the polling thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="participant-poller")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Signal the polling thread to stop."""
+        self._stop_event.set()
+        self._wakeup.set()
+
+    def is_watched(self, incident_number: str) -> bool:
+        """Whether *incident_number* is currently being polled."""
+        with self._lock:
+            return incident_number in self._incidents
+
+    def watch(self, incident_number: str) -> Dict[str, Any]:
+        """Mark *incident_number* as active and poll it soon."""
+        with self._lock:
+            entry = self._incidents.get(incident_number)
+            if entry is None:
+                if len(self._incidents) >= self._max_incidents:
+                    oldest = min(
+                        self._incidents, key=lambda key: self._incidents[key]["last_requested"]
+                    )
+                    del self._incidents[oldest]
+                    self._messenger.forget(oldest)
+                entry = {
+                    "participants": None,
+                    "version": 0,
+                    "fetched": threading.Event(),
+                    "next_poll": 0.0,
+                }
+                self._incidents[incident_number] = entry
+                self._wakeup.set()
+            entry["last_requested"] = time.monotonic()
+        return entry
+
+    def get(
+        self, incident_number: str, wait: float = _FIRST_FETCH_WAIT_SECONDS
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return the current participants of *incident_number* from memory.
+
+        The first request for an incident waits up to *wait* seconds for the
+        initial fetch.  Returns None while no fetch has succeeded yet.
+        """
+        entry = self.watch(incident_number)
+        if not entry["fetched"].is_set():
+            if self._thread is not None and self._thread.is_alive():
+                entry["fetched"].wait(wait)
+            else:
+                self._poll(incident_number, entry)
+        with self._lock:
+            return entry["participants"]
+
+    def snapshot(self) -> Dict[str, Tuple[int, List[Dict[str, Any]]]]:
+        """Version and participants of every incident fetched so far."""
+        with self._lock:
+            return {
+                incident: (entry["version"], entry["participants"])
+                for incident, entry in self._incidents.items()
+                if entry["participants"] is not None
+            }
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            due: List[Tuple[str, Dict[str, Any]]] = []
+            with self._lock:
+                for incident, entry in list(self._incidents.items()):
+                    if now - entry["last_requested"] > self._idle_seconds:
+                        del self._incidents[incident]
+                        self._messenger.forget(incident)
+                    elif now >= entry["next_poll"]:
+                        due.append((incident, entry))
+                next_poll = min(
+                    (entry["next_poll"] for entry in self._incidents.values()), default=None
+                )
+            for incident, entry in due:
+                self._poll(incident, entry)
+            if due:
+                continue
+            self._wakeup.wait(None if next_poll is None else max(0.0, next_poll - now))
+            self._wakeup.clear()
+
+    def _poll(self, incident_number: str, entry: Dict[str, Any]) -> None:
+        try:
+            participants = self._messenger.get_participants(incident_number)
+        except Exception:  # pragma: no cover - defensive
+            LOGGER.error("Unexpected error polling participants", exc_info=True)
+            participants = None
+        changed = False
+        with self._lock:
+            entry["next_poll"] = time.monotonic() + self._interval
+            # On failure the last known list is kept and served.
+            if participants is not None and participants != entry["participants"]:
+                entry["participants"] = participants
+                entry["version"] += 1
+                changed = True
+        entry["fetched"].set()
+        if changed and self._on_change:
+            try:
+                self._on_change()
+            except Exception:
+                LOGGER.warning("Error in participant on_change callback", exc_info=True)
 
 
 def create_messenger(
@@ -164,5 +354,6 @@ def create_messenger(
 __all__ = [
     "AlarmMessenger",
     "AlarmMessengerConfig",
+    "ParticipantPoller",
     "create_messenger",
 ]
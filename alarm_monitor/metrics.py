@@ -0,0 +1,347 @@
+"""Lightweight Prometheus-compatible instrumentation.
+
+Histograms and counters in this module are cheap enough to sit on the hot
+path: every labelled series owns its own small lock that is only held for a
+handful of integer additions, and looking up an existing series is a plain
+dict read.  The number of series per instrument is capped so that label
+values coming from the outside world (e.g. unknown Flask endpoints) cannot
+grow memory without bound – overflowing values are folded into ``other``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Outbound integrations tracked by :func:`track_outbound`.
+INTEGRATIONS: Tuple[str, ...] = (
+    "nominatim",
+    "open-meteo",
+    "dwd",
+    "ntfy",
+    "ical",
+    "ors",
+    "messenger",
+    "cec-client",
+)
+
+_OTHER_LABEL = "other"
+_INF_BUCKET = 'le="+Inf"'
+_MAX_SERIES = 64
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _HistogramSeries:
+    __slots__ = ("lock", "counts", "total", "count")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.lock = threading.Lock()
+        self.counts = [0] * (bucket_count + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class _Instrument:
+    """Shared label handling for histograms and counters.
+
+    ``series_factory`` creates the per-label state of the subclass.  At most ``max_series`` series exist, including the ``other`` series that
+    label values beyond the first ``max_series - 1`` are folded into.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        series_factory: Callable[[], Any],
+        label: Optional[str] = None,
+        label_values: Sequence[str] = (),
+        max_series: int = _MAX_SERIES,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._max_series = max(1, max_series)
+        self._new_series = series_factory
+        self._create_lock = threading.Lock()
+        self._series: Dict[str, Any] = {}
+        for value in label_values:
+            self._series[value] = self._new_series()
+
+    def _get_series(self, label_value: Optional[str]) -> Any:
+        key = label_value if self.label is not None and label_value else ""
+        series = self._series.get(key)
+        if series is not None:
+            return series
+        with self._create_lock:
+            series = self._series.get(key)
+            if series is None:
+                distinct = len(self._series) - (_OTHER_LABEL in self._series)
+                if distinct >= self._max_series - 1:
+                    key = _OTHER_LABEL
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._new_series()
+                    self._series[key] = series
+        return series
+
+    def _labels(self, key: str, extra: str = "") -> str:
+        parts = []
+        if self.label is not None:
+            parts.append(f'{self.label}="{_escape_label(key)}"')
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram(_Instrument):
+    """Cumulative-bucket latency histogram with an optional single label."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label: Optional[str] = None,
+        label_values: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        max_series: int = _MAX_SERIES,
+    ) -> None:
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        super().__init__(
+            name,
+            help_text,
+            partial(_HistogramSeries, len(self.buckets)),
+            label,
+            label_values,
+            max_series,
+        )
+
+    def observe(self, value: float, label_value: Optional[str] = None) -> None:
+        """Record a single observation (in seconds for duration histograms)."""
+        series = self._get_series(label_value)
+        index = bisect_left(self.buckets, value)
+        with series.lock:
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, label_value: Optional[str] = None) -> Iterator[None]:
+        """Context manager observing the wall-clock duration of its body."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def snapshot(self, label_value: Optional[str] = None) -> Tuple[int, float]:
+        """Return ``(count, sum)`` for a series – mainly useful in tests."""
+        key = label_value if self.label is not None and label_value else ""
+        series = self._series.get(key)
+        if series is None:
+            return 0, 0.0
+        with series.lock:
+            return series.count, series.total
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, series in sorted(self._series.items()):
+            with series.lock:
+                counts = list(series.counts)
+                total = series.total
+                count = series.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._labels(key, _INF_BUCKET)} {count}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+class _CounterSeries:
+    __slots__ = ("lock", "value")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.value = 0
+
+
+class Counter(_Instrument):
+    """Monotonic counter with an optional single label."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label: Optional[str] = None,
+        label_values: Sequence[str] = (),
+        max_series: int = _MAX_SERIES,
+    ) -> None:
+        super().__init__(name, help_text, _CounterSeries, label, label_values, max_series)
+
+    def inc(self, label_value: Optional[str] = None, amount: int = 1) -> None:
+        series = self._get_series(label_value)
+        with series.lock:
+            series.value += amount
+
+    def value(self, label_value: Optional[str] = None) -> int:
+        key = label_value if self.label is not None and label_value else ""
+        series = self._series.get(key)
+        return series.value if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, series in sorted(self._series.items()):
+            lines.append(f"{self.name}{self._labels(key)} {series.value}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Application instruments
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "alarm_monitor_http_request_duration_seconds",
+    "Time spent handling HTTP requests per Flask endpoint",
+    label="endpoint",
+)
+
+OUTBOUND_REQUEST_SECONDS = Histogram(
+    "alarm_monitor_outbound_request_duration_seconds",
+    "Duration of calls to external integrations",
+    label="integration",
+    label_values=INTEGRATIONS,
+    max_series=len(INTEGRATIONS) + 1,
+)
+
+OUTBOUND_REQUEST_ERRORS = Counter(
+    "alarm_monitor_outbound_request_errors_total",
+    "Failed calls to external integrations",
+    label="integration",
+    label_values=INTEGRATIONS,
+    max_series=len(INTEGRATIONS) + 1,
+)
+
+STORE_PERSIST_SECONDS = Histogram(
+    "alarm_monitor_store_persist_duration_seconds",
+    "Time spent writing a store to disk",
+    label="store",
+    label_values=("alarms", "settings", "messages"),
+    max_series=4,
+)
+
+ALARM_ENRICHMENT_SECONDS = Histogram(
+    "alarm_monitor_alarm_enrichment_duration_seconds",
+    "Time from alarm acceptance until geocoding and weather enrichment is stored",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+
+ALARM_HOOK_SECONDS = Histogram(
+    "alarm_monitor_alarm_hook_duration_seconds",
+    "Time spent in each post-commit hook of a stored alarm",
+    label="hook",
+    max_series=16,
+)
+
+ALARM_HOOK_ERRORS = Counter(
+    "alarm_monitor_alarm_hook_errors_total",
+    "Post-commit hooks of a stored alarm that raised",
+    label="hook",
+    max_series=16,
+)
+
+_INSTRUMENTS: Tuple[_Instrument, ...] = (
+    HTTP_REQUEST_SECONDS,
+    OUTBOUND_REQUEST_SECONDS,
+    OUTBOUND_REQUEST_ERRORS,
+    STORE_PERSIST_SECONDS,
+    ALARM_ENRICHMENT_SECONDS,
+    ALARM_HOOK_SECONDS,
+    ALARM_HOOK_ERRORS,
+)
+
+
+class OutboundCall:
+    """Handle yielded by :func:`track_outbound` to flag non-exception failures."""
+
+    __slots__ = ("failed",)
+
+    def __init__(self) -> None:
+        self.failed = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+@contextmanager
+def track_outbound(integration: str) -> Iterator[OutboundCall]:
+    """Time a call to an external integration and count it as failed on error.
+
+    Exceptions propagate unchanged.  Callers that detect failures without an
+    exception (e.g. a non-200 status they handle themselves) can call
+    :meth:`OutboundCall.fail` on the yielded handle.
+    """
+    if integration not in INTEGRATIONS:
+        integration = _OTHER_LABEL
+    call = OutboundCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.failed = True
+        raise
+    finally:
+        OUTBOUND_REQUEST_SECONDS.observe(time.perf_counter() - start, integration)
+        if call.failed:
+            OUTBOUND_REQUEST_ERRORS.inc(integration)
+
+
+def render_metrics() -> List[str]:
+    """Return Prometheus text lines for all instruments in this module."""
+    lines: List[str] = []
+    for instrument in _INSTRUMENTS:
+        lines.extend(instrument.render())
+    return lines
+
+
+__all__ = [
+    "ALARM_ENRICHMENT_SECONDS",
+    "ALARM_HOOK_ERRORS",
+    "ALARM_HOOK_SECONDS",
+    "Counter",
+    "DEFAULT_BUCKETS",
+    "HTTP_REQUEST_SECONDS",
+    "Histogram",
+    "INTEGRATIONS",
+    "OUTBOUND_REQUEST_ERRORS",
+    "OUTBOUND_REQUEST_SECONDS",
+    "OutboundCall",
+    "STORE_PERSIST_SECONDS",
+    "render_metrics",
+    "track_outbound",
+]
@@ -1,23 +1,49 @@
-"""Optional background poller for ntfy.sh topics.
+"""Optional background subscriber for ntfy.sh topics.
 
-The poller runs as a permanent daemon thread.  Its topic URL, poll interval,
-and default message TTL are read from the effective application settings on
-every poll cycle, so changes made through the Settings UI take effect
+The poller runs as a permanent daemon thread.  Its topic URLs, mode, poll
+interval, and default message TTL are read from the effective application
+settings on every cycle, so changes made through the Settings UI take effect
 immediately without requiring a restart.
+
+``ntfy_topic_url`` holds one topic per line, optionally followed by a
+per-topic default TTL in minutes (``https://ntfy.sh/fw-uebung 240``).  All
+topics are subscribed over a single multiplexed request
+(``{server}/topic-a,topic-b/json``), so they must live on the same server.
+Each topic keeps its own resume cursor, persisted next to the message store,
+so a restart neither refetches nor loses messages.
+
+Two modes are supported (setting ``ntfy_mode``):
+
+``stream`` (default)
+    Keeps one long-lived ``GET {topic}/json`` connection open and handles the
+    newline-delimited JSON events as they arrive, so messages reach the
+    dashboard within a second.  Events arriving in a burst (e.g. a
+    ``message_clear`` per message) are applied to the store as one batch.  Dropped connections are re-established with
+    exponential backoff and resume after the last received message id
+    (``since=<id>``), so nothing is missed or delivered twice.
+``poll``
+    Fetches ``{topic}/json?poll=1`` every ``ntfy_poll_interval`` seconds; for
+    proxies or servers that do not allow long-lived responses.
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import queue
+import re
 import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Dict, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import requests
 
 from .message_store import MessageStore
+from .metrics import track_outbound
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,13 +51,94 @@ _DEFAULT_POLL_INTERVAL = 60
 _DEFAULT_TTL_MINUTES = 60
 _TRUTHY_DELETE_VALUES = {True, 1, "1", "true", "True", "yes", "on"}
 
+NTFY_MODES = ("stream", "poll")
+DEFAULT_NTFY_MODE = "stream"
+_STREAM_CONNECT_TIMEOUT = 10
+# ntfy sends a keepalive event every 45 seconds by default; a connection
+# silent for longer than this is considered dead and re-established.
+_STREAM_READ_TIMEOUT = 90
+_BACKOFF_INITIAL_SECONDS = 1.0
+_BACKOFF_MAX_SECONDS = 60.0
+# Streamed lines arriving within this interval of the first one are applied
+# to the message store together, with one persist.
+_STREAM_BATCH_SECONDS = 0.1
+_END_OF_STREAM = object()
+# ntfy topic names: letters, digits, "-" and "_", at most 64 characters.
+_TOPIC_NAME_RE = re.compile(r"^[-_A-Za-z0-9]{1,64}$")
+
+PathType = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class NtfyTopic:
+    """One subscribed topic and its optional default message TTL."""
+
+    server: str
+    name: str
+    ttl_minutes: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used for the persisted cursor."""
+        return f"{self.server}/{self.name}"
+
+
+def parse_ntfy_topics(raw: Optional[str]) -> List[NtfyTopic]:
+    """Parse the ``ntfy_topic_url`` setting into a list of topics.
+
+    Entries are separated by newlines or ``;``.  Each entry is a topic URL,
+    optionally followed by whitespace and a default TTL in minutes.  A URL
+    may name several topics the ntfy way (``https://ntfy.sh/a,b``).
+
+    Raises:
+        ValueError: if an entry is malformed or the topics live on
+            different servers (they are fetched over one connection).
+    """
+    topics: List[NtfyTopic] = []
+    seen = set()
+    for entry in re.split(r"[\n;]+", raw or ""):
+        parts = entry.split()
+        if not parts:
+            continue
+        if len(parts) > 2:
+            raise ValueError(f"invalid ntfy topic entry: {entry.strip()!r}")
+        ttl_minutes: Optional[int] = None
+        if len(parts) == 2:
+            try:
+                ttl_minutes = int(parts[1])
+            except ValueError:
+                raise ValueError("ntfy topic TTL must be a whole number of minutes") from None
+            if ttl_minutes < 1:
+                raise ValueError("ntfy topic TTL must be at least 1 minute")
+        parsed = urlparse(parts[0].rstrip("/"))
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise ValueError("ntfy topic URLs must start with http:// or https://")
+        base_path, _, names = parsed.path.rpartition("/")
+        server = f"{parsed.scheme}://{parsed.netloc}{base_path}"
+        for name in names.split(","):
+            if not _TOPIC_NAME_RE.match(name):
+                raise ValueError(f"invalid ntfy topic name: {name!r}")
+            if (server, name) not in seen:
+                seen.add((server, name))
+                topics.append(NtfyTopic(server, name, ttl_minutes))
+    if len({topic.server for topic in topics}) > 1:
+        raise ValueError("all ntfy topics must be on the same server")
+    return topics
 
-class NtfyPoller:
-    """Background thread that polls an ntfy.sh topic for new messages.
 
-    The topic URL, poll interval (in seconds) and default message TTL (in
-    minutes) are retrieved on every iteration via the ``get_effective_settings``
-    callable so that they can be changed at run-time through the Settings UI.
+class NtfyPoller:
+    """Background thread that subscribes to ntfy.sh topics for new messages.
+
+    The topic URLs, mode, poll interval (in seconds) and default message TTL
+    (in minutes) are retrieved on every iteration via the
+    ``get_effective_settings`` callable so that they can be changed at
+    run-time through the Settings UI.
+
+    Every topic has a cursor ``{"time": <unix>, "ids": [...]}``: the time of
+    the newest handled message (or of the last point known to be caught up)
+    and the ids already handled within that second.  A subscription resumes
+    from the oldest cursor; events at or before a topic's own cursor are
+    skipped, so topics that are quieter than others are not replayed twice.
     """
 
     def __init__(
@@ -39,25 +146,35 @@ class NtfyPoller:
         get_effective_settings: Callable[[], Dict],
         message_store: MessageStore,
         on_message: Optional[Callable[[], None]] = None,
+        cursor_path: Optional[PathType] = None,
     ) -> None:
         """Initialise the poller.
 
         Args:
             get_effective_settings: Zero-argument callable that returns the
                 current effective settings dict.  The poller reads
-                ``ntfy_topic_url``, ``ntfy_poll_interval``, and
+                ``ntfy_topic_url``, ``ntfy_mode``, ``ntfy_poll_interval``, and
                 ``message_default_ttl_minutes`` from this dict on each cycle.
             message_store: Destination store for incoming messages.
             on_message: Optional callback invoked after a new message is stored.
                         Useful for triggering SSE notifications.
+            cursor_path: Optional JSON file in which the per-topic cursors
+                         are persisted across restarts.
         """
         self._get_effective_settings = get_effective_settings
         self._message_store = message_store
         self._on_message = on_message
-        self._last_poll_time: Optional[int] = None
         self._last_topic_url: Optional[str] = None
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        self._cursor_path = Path(cursor_path) if cursor_path else None
+        self._cursors: Dict[str, Dict[str, Any]] = self._load_cursors()
+        # Streaming state: current backoff and the open response so
+        # stop()/reconnect() can close it.
+        self._backoff = 0.0
+        self._response_lock = threading.Lock()
+        self._response: Optional[requests.Response] = None
+        self._reconnect_requested = False
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -75,8 +192,15 @@ class NtfyPoller:
         LOGGER.info("ntfy poller thread started")
 
     def stop(self) -> None:
-        """Signal the polling thread to stop."""
+        """Signal the polling thread to stop and close an open stream."""
         self._stop_event.set()
+        self._close_stream()
+
+    def reconnect(self) -> None:
+        """Drop the current stream so changed settings apply immediately."""
+        with self._response_lock:
+            self._reconnect_requested = True
+        self._close_stream()
 
     # ------------------------------------------------------------------
     # Internal polling loop
@@ -84,56 +208,270 @@ class NtfyPoller:
 
     def _run(self) -> None:
         while not self._stop_event.is_set():
-            try:
-                self._poll_once()
-            except Exception:
-                LOGGER.error("Unexpected error in ntfy poller", exc_info=True)
             settings = self._get_effective_settings()
             interval = max(10, int(settings.get("ntfy_poll_interval") or _DEFAULT_POLL_INTERVAL))
-            self._stop_event.wait(interval)
+            if _ntfy_mode(settings) == "poll":
+                try:
+                    self._poll_once()
+                except Exception:
+                    LOGGER.error("Unexpected error in ntfy poller", exc_info=True)
+                self._stop_event.wait(interval)
+                continue
+
+            try:
+                delay = self._stream_once()
+            except Exception:
+                LOGGER.error("Unexpected error in ntfy stream", exc_info=True)
+                delay = self._next_backoff()
+            if delay:
+                self._stop_event.wait(delay)
+
+    def _subscribe(self, settings: Dict, lookback_seconds: int) -> Optional[Dict[str, NtfyTopic]]:
+        """Return the configured topics by name, or None if there are none.
+
+        Cursors of topics that are no longer configured are dropped; new
+        topics start ``lookback_seconds`` in the past so recent messages from
+        just before start-up are not missed.
+        """
+        try:
+            topics = parse_ntfy_topics(settings.get("ntfy_topic_url"))
+        except ValueError as exc:
+            LOGGER.warning("Ignoring invalid ntfy topic configuration: %s", exc)
+            return None
+        if not topics:
+            return None
+
+        topic_url = f"{topics[0].server}/{','.join(topic.name for topic in topics)}"
+        if topic_url != self._last_topic_url:
+            LOGGER.info("ntfy topic URL changed to: %s", topic_url)
+            self._last_topic_url = topic_url
+        keys = {topic.key for topic in topics}
+        changed = False
+        for key in list(self._cursors):
+            if key not in keys:
+                del self._cursors[key]
+                changed = True
+        start = int(time.time()) - lookback_seconds
+        for key in keys:
+            if key not in self._cursors:
+                self._cursors[key] = {"time": start, "ids": []}
+                changed = True
+        if changed:
+            self._persist_cursors()
+        return {topic.name: topic for topic in topics}
+
+    def _since(self, topics: Dict[str, NtfyTopic]) -> str:
+        """Resume point covering every topic: the oldest topic cursor."""
+        oldest = min((self._cursors[topic.key] for topic in topics.values()), key=lambda c: c["time"])
+        # A message id is exact; a timestamp is inclusive and relies on the
+        # per-topic filter to skip what was already handled.
+        return oldest["ids"][-1] if oldest["ids"] else str(oldest["time"])
+
+    def _accept(
+        self,
+        event: Dict,
+        topics: Dict[str, NtfyTopic],
+        default_ttl_minutes: int,
+        actions: List[Dict[str, Any]],
+    ) -> bool:
+        """Queue the store action for *event* unless its topic cursor has
+        already passed it.
+
+        Returns True when a cursor moved.
+        """
+        if not isinstance(event, dict):
+            return False
+        topic = topics.get(str(event.get("topic") or ""))
+        if topic is None:
+            if event.get("topic") is None:
+                self._queue_event(event, default_ttl_minutes, actions)
+            return False
+        cursor = self._cursors[topic.key]
+        try:
+            event_time = int(event.get("time"))
+        except (TypeError, ValueError):
+            event_time = None
+        event_id = str(event.get("id") or "")
+        if event_time is not None and (
+            event_time < cursor["time"] or (event_time == cursor["time"] and event_id in cursor["ids"])
+        ):
+            return False
+
+        self._queue_event(event, topic.ttl_minutes or default_ttl_minutes, actions)
+        if event.get("event") != "message" or event_time is None or not event_id:
+            return False
+        if event_time > cursor["time"]:
+            self._cursors[topic.key] = {"time": event_time, "ids": [event_id]}
+        else:
+            cursor["ids"].append(event_id)
+        return True
+
+    def _advance(self, topics: Dict[str, NtfyTopic], caught_up_to: int) -> bool:
+        """Move all cursors to *caught_up_to* (nothing older is pending)."""
+        changed = False
+        for topic in topics.values():
+            if caught_up_to > self._cursors[topic.key]["time"]:
+                self._cursors[topic.key] = {"time": caught_up_to, "ids": []}
+                changed = True
+        return changed
+
+    def _load_cursors(self) -> Dict[str, Dict[str, Any]]:
+        if self._cursor_path is None or not self._cursor_path.exists():
+            return {}
+        try:
+            with self._cursor_path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return {
+                str(key): {"time": int(value["time"]), "ids": [str(i) for i in value.get("ids", [])]}
+                for key, value in data.items()
+            }
+        except Exception as exc:
+            LOGGER.warning("Failed to load ntfy cursors from %s: %s", self._cursor_path, exc)
+            return {}
+
+    def _persist_cursors(self) -> None:
+        if self._cursor_path is None:
+            return
+        tmp_path = self._cursor_path.with_suffix(".tmp")
+        try:
+            self._cursor_path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as fh:
+                json.dump(self._cursors, fh, indent=2)
+            tmp_path.replace(self._cursor_path)
+        except Exception as exc:
+            LOGGER.warning("Failed to persist ntfy cursors to %s: %s", self._cursor_path, exc)
+            tmp_path.unlink(missing_ok=True)
+
+    def _next_backoff(self) -> float:
+        """Return the next reconnect delay (1 s doubling up to 60 s)."""
+        self._backoff = min(
+            _BACKOFF_MAX_SECONDS, max(_BACKOFF_INITIAL_SECONDS, self._backoff * 2)
+        )
+        return self._backoff
+
+    def _close_stream(self) -> None:
+        with self._response_lock:
+            response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:  # pragma: no cover - best effort
+                LOGGER.debug("Error closing ntfy stream", exc_info=True)
+
+    def _stream_once(self) -> float:
+        """Hold one streaming connection until it ends.
+
+        Returns the number of seconds to wait before the next attempt: the
+        poll interval while no topic is configured, the backoff delay after a
+        failure and 0 after a requested reconnect.
+        """
+        settings = self._get_effective_settings()
+        poll_interval = max(10, int(settings.get("ntfy_poll_interval") or _DEFAULT_POLL_INTERVAL))
+        topics = self._subscribe(settings, lookback_seconds=poll_interval)
+        if not topics:
+            return poll_interval
+
+        since = self._since(topics)
+        with self._response_lock:
+            self._reconnect_requested = False
+        try:
+            with track_outbound("ntfy"):
+                response = requests.get(
+                    f"{self._last_topic_url}/json",
+                    params={"since": since},
+                    stream=True,
+                    timeout=(_STREAM_CONNECT_TIMEOUT, _STREAM_READ_TIMEOUT),
+                )
+                response.raise_for_status()
+        except requests.exceptions.RequestException as exc:
+            delay = self._next_backoff()
+            LOGGER.warning("ntfy stream connect failed (retry in %.0fs): %s", delay, exc)
+            return delay
+
+        with self._response_lock:
+            if self._stop_event.is_set() or self._reconnect_requested:
+                response.close()
+                return 0.0
+            self._response = response
+        LOGGER.info("ntfy stream connected: %s", self._last_topic_url)
+        self._backoff = 0.0
+
+        default_ttl_minutes = max(
+            1, int(settings.get("message_default_ttl_minutes") or _DEFAULT_TTL_MINUTES)
+        )
+        lines: "queue.Queue[Any]" = queue.Queue()
+        threading.Thread(
+            target=_read_stream_lines, args=(response, lines), daemon=True, name="ntfy-stream"
+        ).start()
+        try:
+            while True:
+                batch, end = _collect_batch(lines)
+                moved = False
+                actions: List[Dict[str, Any]] = []
+                for line in batch:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(event, dict) and event.get("event") == "keepalive":
+                        # Everything published before a keepalive has been sent.
+                        moved = self._advance(topics, int(event.get("time") or 0)) or moved
+                    else:
+                        moved = self._accept(event, topics, default_ttl_minutes, actions) or moved
+                self._apply(actions)
+                if moved:
+                    self._persist_cursors()
+                if isinstance(end, Exception):
+                    raise end
+                if end is _END_OF_STREAM:
+                    break
+        except Exception as exc:  # network error, or closed by stop()/reconnect()
+            if not (self._stop_event.is_set() or self._reconnect_requested):
+                delay = self._next_backoff()
+                LOGGER.warning("ntfy stream interrupted (retry in %.0fs): %s", delay, exc)
+                return delay
+        finally:
+            with self._response_lock:
+                self._response = None
+            response.close()
+
+        if self._stop_event.is_set() or self._reconnect_requested:
+            return 0.0
+        # The server ended the response cleanly (e.g. a proxy timeout).
+        return self._next_backoff()
 
     def _poll_once(self) -> None:
-        """Fetch messages from ntfy since the last poll timestamp.
+        """Fetch messages from ntfy since the topic cursors.
 
         If no topic URL is configured the method returns immediately without
         making any network requests.
         """
         settings = self._get_effective_settings()
-        topic_url = (settings.get("ntfy_topic_url") or "").strip()
-        if not topic_url:
+        poll_interval = max(10, int(settings.get("ntfy_poll_interval") or _DEFAULT_POLL_INTERVAL))
+        topics = self._subscribe(settings, lookback_seconds=poll_interval)
+        if not topics:
             return  # Not configured – skip this cycle
 
-        topic_url = topic_url.rstrip("/")
-
-        # Reset history if the topic URL has changed to avoid missing messages
-        if topic_url != self._last_topic_url:
-            LOGGER.info("ntfy topic URL changed to: %s", topic_url)
-            self._last_poll_time = None
-            self._last_topic_url = topic_url
-
         default_ttl_minutes = max(
             1, int(settings.get("message_default_ttl_minutes") or _DEFAULT_TTL_MINUTES)
         )
-        poll_interval = max(10, int(settings.get("ntfy_poll_interval") or _DEFAULT_POLL_INTERVAL))
 
         now = int(time.time())
-        # On the very first poll look back one interval so recent messages
-        # from just before start-up are not missed.
-        since = self._last_poll_time if self._last_poll_time is not None else now - poll_interval
-
-        url = f"{topic_url}/json"
-        params: dict = {"poll": "1", "since": str(since)}
+        url = f"{self._last_topic_url}/json"
+        params: dict = {"poll": "1", "since": self._since(topics)}
 
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
+            with track_outbound("ntfy"):
+                response = requests.get(url, params=params, timeout=15)
+                response.raise_for_status()
         except requests.exceptions.RequestException as exc:
             LOGGER.warning("ntfy poll request failed: %s", exc)
             return
 
-        self._last_poll_time = now
-
-        # ntfy returns newline-delimited JSON (one object per line)
+        # ntfy returns newline-delimited JSON (one object per line); the
+        # whole response is applied to the store as one batch.
+        moved = False
+        actions: List[Dict[str, Any]] = []
         for line in response.text.splitlines():
             line = line.strip()
             if not line:
@@ -142,35 +480,46 @@ class NtfyPoller:
                 event = json.loads(line)
             except Exception:
                 continue
+            moved = self._accept(event, topics, default_ttl_minutes, actions) or moved
+        self._apply(actions)
+        if self._advance(topics, now) or moved:
+            self._persist_cursors()
 
-            event_type = str(event.get("event") or "")
-            if event_type not in {"message", "message_delete", "message_clear"}:
-                continue
+    def _queue_event(
+        self, event: dict, default_ttl_minutes: int, actions: List[Dict[str, Any]]
+    ) -> None:
+        """Translate one ntfy event into a MessageStore action on *actions*."""
+        if not isinstance(event, dict):
+            return
+        event_type = str(event.get("event") or "")
+        if event_type not in {"message", "message_delete", "message_clear"}:
+            return
 
-            source_id = self._resolve_source_id(event)
+        source_id = self._resolve_source_id(event)
 
-            if event_type in {"message_delete", "message_clear"}:
-                if source_id and self._message_store.delete_by_source_id(source_id):
-                    LOGGER.info("Removed ntfy message by source_id=%s", source_id)
-                    self._notify_message_changed()
-                continue
+        if event_type in {"message_delete", "message_clear"} or self._is_deleted_message_event(event):
+            if source_id:
+                actions.append({"action": "delete", "source_id": source_id})
+            return
 
-            if self._is_deleted_message_event(event):
-                if source_id and self._message_store.delete_by_source_id(source_id):
-                    LOGGER.info("Removed ntfy message by delete-flag source_id=%s", source_id)
-                    self._notify_message_changed()
-                continue
+        text = (event.get("message") or "").strip()
+        if not text:
+            return
 
-            text = (event.get("message") or "").strip()
-            if not text:
-                continue
+        actions.append({
+            "action": "upsert",
+            "text": text,
+            "expires_at": self._resolve_expires(event, default_ttl_minutes),
+            "source_id": source_id,
+        })
 
-            expires_at = self._resolve_expires(event, default_ttl_minutes)
-            result = self._message_store.add_with_absolute_expiry(
-                text, expires_at, source_id=source_id, on_stored=self._on_message
-            )
-            if result:
-                LOGGER.info("New ntfy message stored (%.80s)", text)
+    def _apply(self, actions: List[Dict[str, Any]]) -> None:
+        """Apply queued actions with one store lock and one persist."""
+        if not actions:
+            return
+        changes = self._message_store.apply_events(actions, on_changed=self._on_message)
+        if changes:
+            LOGGER.info("Applied %d ntfy message change(s)", changes)
 
     @staticmethod
     def _resolve_expires(event: dict, default_ttl_minutes: int) -> datetime:
@@ -204,19 +553,47 @@ class NtfyPoller:
         deleted_flag = event.get("deleted")
         return deleted_flag in _TRUTHY_DELETE_VALUES
 
-    def _notify_message_changed(self) -> None:
-        """Invoke callback used to notify subscribers about message list changes."""
-        if self._on_message:
-            try:
-                self._on_message()
-            except Exception:
-                LOGGER.warning("Error in on_message callback", exc_info=True)
+
+def _read_stream_lines(response: requests.Response, lines: "queue.Queue[Any]") -> None:
+    """Forward non-empty stream lines to *lines*, then the error or end marker."""
+    try:
+        for line in response.iter_lines():
+            if line:
+                lines.put(line)
+    except Exception as exc:  # network error, or closed by stop()/reconnect()
+        lines.put(exc)
+    else:
+        lines.put(_END_OF_STREAM)
+
+
+def _collect_batch(lines: "queue.Queue[Any]") -> Tuple[List[bytes], Any]:
+    """Wait for the next line and gather those following within the batch interval.
+
+    Returns the lines and, if the stream ended, the exception or
+    ``_END_OF_STREAM`` marker that ended it (otherwise None).
+    """
+    batch: List[bytes] = []
+    item = lines.get()
+    deadline = time.monotonic() + _STREAM_BATCH_SECONDS
+    while item is not _END_OF_STREAM and not isinstance(item, Exception):
+        batch.append(item)
+        try:
+            item = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            return batch, None
+    return batch, item
+
+
+def _ntfy_mode(settings: Dict) -> str:
+    mode = str(settings.get("ntfy_mode") or DEFAULT_NTFY_MODE).strip().lower()
+    return mode if mode in NTFY_MODES else DEFAULT_NTFY_MODE
 
 
 def create_ntfy_poller(
     get_effective_settings: Callable[[], Dict],
     message_store: MessageStore,
     on_message: Optional[Callable[[], None]] = None,
+    cursor_path: Optional[PathType] = None,
 ) -> "NtfyPoller":
     """Return a configured :class:`NtfyPoller`.
 
@@ -228,7 +605,15 @@ def create_ntfy_poller(
         get_effective_settings=get_effective_settings,
         message_store=message_store,
         on_message=on_message,
+        cursor_path=cursor_path,
     )
 
 
-__all__ = ["NtfyPoller", "create_ntfy_poller"]
+__all__ = [
+    "DEFAULT_NTFY_MODE",
+    "NTFY_MODES",
+    "NtfyPoller",
+    "NtfyTopic",
+    "create_ntfy_poller",
+    "parse_ntfy_topics",
+]
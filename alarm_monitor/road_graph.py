@@ -0,0 +1,724 @@
+"""Offline routing over a preprocessed road graph.
+
+The graph is produced from an OpenStreetMap extract by
+``scripts/build_road_graph.py`` and stored as gzip-compressed JSON.  In memory
+it is kept in flat :mod:`array` buffers (compressed sparse rows): the outgoing
+edges of node ``n`` are ``offsets[n]:offsets[n + 1]``, and every edge carries
+its target node, travel time, length, street name and the intermediate shape
+points of the road between the two junctions.
+
+The build script additionally computes a contraction hierarchy: nodes are
+contracted one by one in order of importance, adding shortcut edges that
+preserve shortest paths between the remaining nodes.  A query then only runs
+a bidirectional Dijkstra search that climbs towards more important nodes,
+which settles a few hundred nodes instead of a large part of the district.
+Graphs without a hierarchy are searched with plain A*.
+
+Routes are returned in the same shape as the OpenRouteService directions
+response so ``navigation.js`` can render them unchanged.
+"""
+
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import logging
+import math
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LOGGER = logging.getLogger(__name__)
+
+GRAPH_FORMAT_VERSION = 1
+# Node coordinates are stored as integer microdegrees in the graph file.
+_COORD_SCALE = 1_000_000
+# Grid cell size of the nearest-node index (~1 km).
+_CELL_DEGREES = 0.01
+# Start/end points further than this from any junction are not routed.
+_MAX_SNAP_METERS = 2000.0
+_EARTH_RADIUS_M = 6_371_000.0
+_METERS_PER_DEGREE = math.pi * _EARTH_RADIUS_M / 180.0
+# Witness searches during contraction give up after settling this many nodes;
+# a missed witness only costs an unnecessary shortcut, never correctness.
+_WITNESS_SETTLE_LIMIT = 60
+
+# OpenRouteService step types used in the generated instructions.
+_TURN_LEFT = 0
+_TURN_RIGHT = 1
+_TURN_SHARP_LEFT = 2
+_TURN_SHARP_RIGHT = 3
+_TURN_SLIGHT_LEFT = 4
+_TURN_SLIGHT_RIGHT = 5
+_CONTINUE = 6
+_ARRIVE = 10
+_DEPART = 11
+
+_TURN_PHRASES = {
+    _TURN_LEFT: "Links abbiegen",
+    _TURN_RIGHT: "Rechts abbiegen",
+    _TURN_SHARP_LEFT: "Scharf links abbiegen",
+    _TURN_SHARP_RIGHT: "Scharf rechts abbiegen",
+    _TURN_SLIGHT_LEFT: "Leicht links abbiegen",
+    _TURN_SLIGHT_RIGHT: "Leicht rechts abbiegen",
+    _CONTINUE: "Geradeaus weiterfahren",
+}
+
+# (source, target, duration seconds, distance meters, name, shape points)
+Edge = Tuple[int, int, float, float, str, Sequence[Tuple[float, float]]]
+
+
+class RoadGraphError(Exception):
+    """Raised when a road graph file cannot be loaded."""
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    x = math.sin(dlambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.degrees(math.atan2(x, y)) % 360.0
+
+
+def _turn_type(incoming: float, outgoing: float) -> int:
+    delta = (outgoing - incoming + 540.0) % 360.0 - 180.0  # -180..180, >0 = right
+    magnitude = abs(delta)
+    if magnitude < 20:
+        return _CONTINUE
+    if magnitude < 60:
+        return _TURN_SLIGHT_RIGHT if delta > 0 else _TURN_SLIGHT_LEFT
+    if magnitude < 135:
+        return _TURN_RIGHT if delta > 0 else _TURN_LEFT
+    return _TURN_SHARP_RIGHT if delta > 0 else _TURN_SHARP_LEFT
+
+
+class _UpwardGraph:
+    """One direction of a contraction hierarchy in CSR form.
+
+    ``via[e] >= 0`` is the original edge an entry stands for; shortcuts store
+    ``-(middle node + 1)``.
+    """
+
+    __slots__ = ("offsets", "targets", "weights", "via")
+
+    def __init__(self, offsets: array, targets: array, weights: array, via: array) -> None:
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.via = via
+
+    @classmethod
+    def from_lists(cls, adjacency: Sequence[Sequence[Tuple[int, float, int]]]) -> "_UpwardGraph":
+        offsets = array("I", [0])
+        targets = array("I")
+        weights = array("d")
+        via = array("q")
+        for entries in adjacency:
+            for target, weight, edge in entries:
+                targets.append(target)
+                weights.append(weight)
+                via.append(edge)
+            offsets.append(len(targets))
+        return cls(offsets, targets, weights, via)
+
+    def find(self, node: int, other: int) -> int:
+        """The ``via`` value of the entry ``node -> other``."""
+        for entry in range(self.offsets[node], self.offsets[node + 1]):
+            if self.targets[entry] == other:
+                return self.via[entry]
+        raise KeyError((node, other))
+
+    def to_json(self) -> Dict[str, List[Any]]:
+        return {
+            "offsets": self.offsets.tolist(),
+            "targets": self.targets.tolist(),
+            "weights": [round(value, 3) for value in self.weights],
+            "via": self.via.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, raw: Dict[str, List[Any]]) -> "_UpwardGraph":
+        return cls(
+            array("I", raw["offsets"]),
+            array("I", raw["targets"]),
+            array("d", raw["weights"]),
+            array("q", raw["via"]),
+        )
+
+
+
+class RoadGraph:
+    """Directed road graph in compressed sparse row form."""
+
+    def __init__(
+        self,
+        node_lat: array,
+        node_lon: array,
+        offsets: array,
+        targets: array,
+        durations: array,
+        distances: array,
+        edge_names: array,
+        names: List[str],
+        shape_offsets: array,
+        shape_lat: array,
+        shape_lon: array,
+        hierarchy: Optional[Tuple[_UpwardGraph, _UpwardGraph]] = None,
+    ) -> None:
+        self._lat = node_lat
+        self._lon = node_lon
+        self._offsets = offsets
+        self._targets = targets
+        self._durations = durations
+        self._distances = distances
+        self._edge_names = edge_names
+        self._names = names
+        self._shape_offsets = shape_offsets
+        self._shape_lat = shape_lat
+        self._shape_lon = shape_lon
+        # (forward, backward) upward graphs of the contraction hierarchy
+        self._hierarchy = hierarchy
+
+        # Fastest speed on any edge keeps the A* heuristic admissible.
+        max_speed = 0.0
+        for duration, distance in zip(durations, distances):
+            if duration > 0:
+                max_speed = max(max_speed, distance / duration)
+        self._max_speed = max_speed or 1.0
+
+        incoming = set(targets)
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for node in range(len(node_lat)):
+            if offsets[node + 1] > offsets[node] or node in incoming:
+                self._grid.setdefault(self._cell(node_lat[node], node_lon[node]), []).append(node)
+
+    # ------------------------------------------------------------------
+    # Construction and persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_edges(cls, nodes: Sequence[Tuple[float, float]], edges: Iterable[Edge]) -> "RoadGraph":
+        """Build a graph from ``(lat, lon)`` nodes and directed edges."""
+        by_source: List[List[Edge]] = [[] for _ in nodes]
+        for edge in edges:
+            by_source[edge[0]].append(edge)
+
+        names: List[str] = [""]
+        name_ids: Dict[str, int] = {"": 0}
+        offsets = array("I", [0])
+        targets = array("I")
+        durations = array("f")
+        distances = array("f")
+        edge_names = array("I")
+        shape_offsets = array("I", [0])
+        shape_lat = array("d")
+        shape_lon = array("d")
+        for outgoing in by_source:
+            for _source, target, duration, distance, name, shape in outgoing:
+                targets.append(target)
+                # Rounded like in the graph file so a hierarchy computed
+                # before saving matches the edges after loading.
+                durations.append(round(duration, 1))
+                distances.append(round(distance, 1))
+                if name not in name_ids:
+                    name_ids[name] = len(names)
+                    names.append(name)
+                edge_names.append(name_ids[name])
+                for lat, lon in shape:
+                    shape_lat.append(lat)
+                    shape_lon.append(lon)
+                shape_offsets.append(len(shape_lat))
+            offsets.append(len(targets))
+
+        return cls(
+            array("d", (lat for lat, _ in nodes)),
+            array("d", (lon for _, lon in nodes)),
+            offsets,
+            targets,
+            durations,
+            distances,
+            edge_names,
+            names,
+            shape_offsets,
+            shape_lat,
+            shape_lon,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "RoadGraph":
+        """Load a graph written by :meth:`save`.
+
+        Raises:
+            RoadGraphError: If the file is missing, unreadable or has an
+                unsupported format.
+        """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                raw = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise RoadGraphError(f"Cannot read road graph {path}: {exc}") from exc
+        if not isinstance(raw, dict) or raw.get("format") != GRAPH_FORMAT_VERSION:
+            raise RoadGraphError(f"Unsupported road graph format in {path}")
+
+        try:
+            hierarchy = None
+            if raw.get("hierarchy"):
+                hierarchy = (
+                    _UpwardGraph.from_json(raw["hierarchy"]["forward"]),
+                    _UpwardGraph.from_json(raw["hierarchy"]["backward"]),
+                )
+            return cls(
+                array("d", (value / _COORD_SCALE for value in raw["node_lat"])),
+                array("d", (value / _COORD_SCALE for value in raw["node_lon"])),
+                array("I", raw["offsets"]),
+                array("I", raw["targets"]),
+                array("f", raw["durations"]),
+                array("f", raw["distances"]),
+                array("I", raw["edge_names"]),
+                list(raw["names"]),
+                array("I", raw["shape_offsets"]),
+                array("d", (value / _COORD_SCALE for value in raw["shape_lat"])),
+                array("d", (value / _COORD_SCALE for value in raw["shape_lon"])),
+                hierarchy,
+            )
+        except (KeyError, TypeError, ValueError, OverflowError) as exc:
+            raise RoadGraphError(f"Invalid road graph {path}: {exc}") from exc
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the graph as gzip-compressed JSON."""
+        payload = {
+            "format": GRAPH_FORMAT_VERSION,
+            "node_lat": [round(value * _COORD_SCALE) for value in self._lat],
+            "node_lon": [round(value * _COORD_SCALE) for value in self._lon],
+            "offsets": self._offsets.tolist(),
+            "targets": self._targets.tolist(),
+            "durations": [round(value, 1) for value in self._durations],
+            "distances": [round(value, 1) for value in self._distances],
+            "edge_names": self._edge_names.tolist(),
+            "names": self._names,
+            "shape_offsets": self._shape_offsets.tolist(),
+            "shape_lat": [round(value * _COORD_SCALE) for value in self._shape_lat],
+            "shape_lon": [round(value * _COORD_SCALE) for value in self._shape_lon],
+            "hierarchy": None,
+        }
+        if self._hierarchy is not None:
+            forward, backward = self._hierarchy
+            payload["hierarchy"] = {"forward": forward.to_json(), "backward": backward.to_json()}
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+
+    def contract(self) -> None:
+        """Compute the contraction hierarchy used by :meth:`shortest_path`.
+
+        Nodes are contracted in order of their edge difference (shortcuts
+        added minus edges removed, plus already contracted neighbours for an
+        even spread), re-evaluated lazily.  Takes seconds to minutes for a
+        district and belongs in the offline build.
+        """
+        node_count = len(self._lat)
+        out_adj: List[Dict[int, float]] = [{} for _ in range(node_count)]
+        in_adj: List[Dict[int, float]] = [{} for _ in range(node_count)]
+        # (u, x) -> original edge index, or -(middle node + 1) for shortcuts
+        edge_via: Dict[Tuple[int, int], int] = {}
+        for node in range(node_count):
+            for edge in range(self._offsets[node], self._offsets[node + 1]):
+                target = self._targets[edge]
+                duration = float(self._durations[edge])
+                if target == node or duration >= out_adj[node].get(target, math.inf):
+                    continue
+                out_adj[node][target] = duration
+                in_adj[target][node] = duration
+                edge_via[(node, target)] = edge
+
+        def _shortcuts(node: int) -> List[Tuple[int, int, float]]:
+            needed: List[Tuple[int, int, float]] = []
+            outgoing = out_adj[node]
+            if not outgoing:
+                return needed
+            max_out = max(outgoing.values())
+            for source, weight_in in in_adj[node].items():
+                limit = weight_in + max_out
+                witness = _witness_search(out_adj, source, node, limit)
+                for target, weight_out in outgoing.items():
+                    if target == source:
+                        continue
+                    through = weight_in + weight_out
+                    if witness.get(target, math.inf) > through:
+                        needed.append((source, target, through))
+            return needed
+
+        contracted_neighbours = [0] * node_count
+
+        def _priority(node: int) -> int:
+            removed = len(in_adj[node]) + len(out_adj[node])
+            return len(_shortcuts(node)) - removed + contracted_neighbours[node]
+
+        queue = [(_priority(node), node) for node in range(node_count)]
+        heapq.heapify(queue)
+        forward: List[List[Tuple[int, float, int]]] = [[] for _ in range(node_count)]
+        backward: List[List[Tuple[int, float, int]]] = [[] for _ in range(node_count)]
+        while queue:
+            _, node = heapq.heappop(queue)
+            priority = _priority(node)
+            if queue and priority > queue[0][0]:
+                heapq.heappush(queue, (priority, node))
+                continue
+
+            for source, target, weight in _shortcuts(node):
+                if weight < out_adj[source].get(target, math.inf):
+                    out_adj[source][target] = weight
+                    in_adj[target][source] = weight
+                    edge_via[(source, target)] = -(node + 1)
+
+            # Freeze the remaining edges: all neighbours are contracted later
+            # and therefore rank higher.
+            for target, weight in out_adj[node].items():
+                forward[node].append((target, weight, edge_via[(node, target)]))
+                del in_adj[target][node]
+                contracted_neighbours[target] += 1
+            for source, weight in in_adj[node].items():
+                backward[node].append((source, weight, edge_via[(source, node)]))
+                del out_adj[source][node]
+                contracted_neighbours[source] += 1
+            out_adj[node] = {}
+            in_adj[node] = {}
+
+        self._hierarchy = (_UpwardGraph.from_lists(forward), _UpwardGraph.from_lists(backward))
+
+    @property
+    def has_hierarchy(self) -> bool:
+        return self._hierarchy is not None
+
+    @property
+    def node_count(self) -> int:
+        return len(self._lat)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._targets)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def nearest_node(self, lat: float, lon: float) -> Optional[int]:
+        """Return the routable node closest to the point, or None if too far."""
+        cell_lat, cell_lon = self._cell(lat, lon)
+        lon_scale = math.cos(math.radians(lat))
+        best: Optional[int] = None
+        best_distance = (_MAX_SNAP_METERS / _METERS_PER_DEGREE) ** 2
+        # The snap radius spans at most two cells in every direction.
+        for d_lat in range(-2, 3):
+            for d_lon in range(-2, 3):
+                for node in self._grid.get((cell_lat + d_lat, cell_lon + d_lon), ()):
+                    n_lat = self._lat[node] - lat
+                    n_lon = (self._lon[node] - lon) * lon_scale
+                    distance = n_lat * n_lat + n_lon * n_lon
+                    if distance < best_distance:
+                        best = node
+                        best_distance = distance
+        return best
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """Return the edge indices of the fastest path, or None if unreachable."""
+        if source == target:
+            return []
+        if self._hierarchy is not None:
+            return self._hierarchy_path(source, target)
+        return self._astar_path(source, target)
+
+    def route(
+        self, start_lat: float, start_lon: float, end_lat: float, end_lon: float
+    ) -> Optional[Dict[str, Any]]:
+        """Route between two points; returns an ORS-shaped response or None."""
+        source = self.nearest_node(start_lat, start_lon)
+        target = self.nearest_node(end_lat, end_lon)
+        if source is None or target is None:
+            return None
+        path = self.shortest_path(source, target)
+        if path is None:
+            return None
+        return self._build_response(source, path)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _astar_path(self, source: int, target: int) -> Optional[List[int]]:
+        lat, lon = self._lat, self._lon
+        offsets, targets, durations = self._offsets, self._targets, self._durations
+        target_lat = lat[target]
+        target_lon = lon[target]
+        # Equirectangular distance is accurate to well below a meter per km at
+        # district scale and much cheaper than haversine in the inner loop.
+        lon_scale = math.cos(math.radians(target_lat))
+        seconds_per_degree = _METERS_PER_DEGREE / self._max_speed
+        sqrt = math.sqrt
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        best = [math.inf] * len(lat)
+        best[source] = 0.0
+        via: Dict[int, Tuple[int, int]] = {}  # node -> (previous node, edge)
+        queue: List[Tuple[float, float, int]] = [(0.0, 0.0, source)]
+        while queue:
+            _, cost, node = heappop(queue)
+            if node == target:
+                break
+            if cost > best[node]:
+                continue  # stale queue entry
+            for edge in range(offsets[node], offsets[node + 1]):
+                nxt = targets[edge]
+                new_cost = cost + durations[edge]
+                if new_cost < best[nxt]:
+                    best[nxt] = new_cost
+                    via[nxt] = (node, edge)
+                    d_lat = lat[nxt] - target_lat
+                    d_lon = (lon[nxt] - target_lon) * lon_scale
+                    estimate = sqrt(d_lat * d_lat + d_lon * d_lon) * seconds_per_degree
+                    heappush(queue, (new_cost + estimate, new_cost, nxt))
+        else:
+            return None
+
+        path: List[int] = []
+        node = target
+        while node != source:
+            node, edge = via[node]
+            path.append(edge)
+        path.reverse()
+        return path
+
+    def _hierarchy_path(self, source: int, target: int) -> Optional[List[int]]:
+        forward, backward = self._hierarchy
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        inf = math.inf
+        forward_dist = {source: 0.0}
+        backward_dist = {target: 0.0}
+        forward_parent: Dict[int, Tuple[int, int]] = {}
+        backward_parent: Dict[int, Tuple[int, int]] = {}
+        forward_queue = [(0.0, source)]
+        backward_queue = [(0.0, target)]
+        best = inf
+        meeting = -1
+        while True:
+            forward_key = forward_queue[0][0] if forward_queue else inf
+            backward_key = backward_queue[0][0] if backward_queue else inf
+            # Neither search can improve on the best meeting point anymore.
+            if min(forward_key, backward_key) >= best:
+                break
+            if forward_key <= backward_key:
+                graph, dist, parent, queue, other = (
+                    forward, forward_dist, forward_parent, forward_queue, backward_dist
+                )
+            else:
+                graph, dist, parent, queue, other = (
+                    backward, backward_dist, backward_parent, backward_queue, forward_dist
+                )
+            cost, node = heappop(queue)
+            if cost > dist[node]:
+                continue
+            total = cost + other.get(node, inf)
+            if total < best:
+                best = total
+                meeting = node
+            offsets, targets, weights, vias = graph.offsets, graph.targets, graph.weights, graph.via
+            for entry in range(offsets[node], offsets[node + 1]):
+                nxt = targets[entry]
+                new_cost = cost + weights[entry]
+                if new_cost < dist.get(nxt, inf):
+                    dist[nxt] = new_cost
+                    parent[nxt] = (node, vias[entry])
+                    heappush(queue, (new_cost, nxt))
+        if meeting < 0:
+            return None
+
+        # Hierarchy edges (u, x, via) from source to meeting node to target
+        chain: List[Tuple[int, int, int]] = []
+        node = meeting
+        while node != source:
+            previous, via = forward_parent[node]
+            chain.append((previous, node, via))
+            node = previous
+        chain.reverse()
+        node = meeting
+        while node != target:
+            following, via = backward_parent[node]
+            chain.append((node, following, via))
+            node = following
+
+        path: List[int] = []
+        for u, x, via in chain:
+            self._unpack(u, x, via, path)
+        return path
+
+    def _unpack(self, u: int, x: int, via: int, path: List[int]) -> None:
+        """Append the original edges a hierarchy edge stands for."""
+        forward, backward = self._hierarchy
+        stack = [(u, x, via)]
+        while stack:
+            u, x, via = stack.pop()
+            if via >= 0:
+                path.append(via)
+                continue
+            middle = -via - 1
+            # The middle node was contracted first, so u -> middle is stored
+            # in its backward and middle -> x in its forward upward graph.
+            stack.append((middle, x, forward.find(middle, x)))
+            stack.append((u, middle, backward.find(middle, u)))
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / _CELL_DEGREES), math.floor(lon / _CELL_DEGREES))
+
+    def _edge_points(self, edge: int) -> List[Tuple[float, float]]:
+        start, end = self._shape_offsets[edge], self._shape_offsets[edge + 1]
+        points = [(self._shape_lat[i], self._shape_lon[i]) for i in range(start, end)]
+        target = self._targets[edge]
+        points.append((self._lat[target], self._lon[target]))
+        return points
+
+    def _build_response(self, source: int, path: List[int]) -> Dict[str, Any]:
+        coordinates: List[List[float]] = [[self._lon[source], self._lat[source]]]
+        steps: List[Dict[str, Any]] = []
+        total_distance = 0.0
+        total_duration = 0.0
+        previous_bearing: Optional[float] = None
+        previous_name: Optional[str] = None
+
+        for edge in path:
+            name = self._names[self._edge_names[edge]]
+            first_index = len(coordinates) - 1
+            last_lat, last_lon = coordinates[-1][1], coordinates[-1][0]
+            points = self._edge_points(edge)
+            entry_bearing = _bearing(last_lat, last_lon, points[0][0], points[0][1])
+            for lat, lon in points:
+                coordinates.append([lon, lat])
+            distance = float(self._distances[edge])
+            duration = float(self._durations[edge])
+            total_distance += distance
+            total_duration += duration
+
+            if previous_bearing is None:
+                step_type = _DEPART
+            elif name == previous_name:
+                step_type = None  # same street: extend the current step
+            else:
+                step_type = _turn_type(previous_bearing, entry_bearing)
+
+            if step_type is None:
+                step = steps[-1]
+                step["distance"] += distance
+                step["duration"] += duration
+                step["way_points"][1] = len(coordinates) - 1
+            else:
+                steps.append({
+                    "distance": distance,
+                    "duration": duration,
+                    "type": step_type,
+                    "instruction": self._instruction(step_type, name),
+                    "name": name or "-",
+                    "way_points": [first_index, len(coordinates) - 1],
+                })
+
+            before_lat, before_lon = coordinates[-2][1], coordinates[-2][0]
+            previous_bearing = _bearing(before_lat, before_lon, points[-1][0], points[-1][1])
+            previous_name = name
+
+        last_index = len(coordinates) - 1
+        steps.append({
+            "distance": 0.0,
+            "duration": 0.0,
+            "type": _ARRIVE,
+            "instruction": "Ziel erreicht",
+            "name": "-",
+            "way_points": [last_index, last_index],
+        })
+        for step in steps:
+            step["distance"] = round(step["distance"], 1)
+            step["duration"] = round(step["duration"], 1)
+
+        summary = {"distance": round(total_distance, 1), "duration": round(total_duration, 1)}
+        return {
+            "routes": [{
+                "summary": summary,
+                "segments": [dict(summary, steps=steps)],
+                "geometry": {"type": "LineString", "coordinates": coordinates},
+                "way_points": [0, last_index],
+            }],
+            "metadata": {"engine": "local"},
+        }
+
+    @staticmethod
+    def _instruction(step_type: int, name: str) -> str:
+        if step_type == _DEPART:
+            return f"Abfahrt auf {name}" if name else "Abfahrt"
+        phrase = _TURN_PHRASES[step_type]
+        return f"{phrase} auf {name}" if name else phrase
+
+
+def _witness_search(
+    out_adj: Sequence[Dict[int, float]], source: int, excluded: int, limit: float
+) -> Dict[int, float]:
+    """Bounded Dijkstra from *source* that avoids the node being contracted."""
+    dist = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = 0
+    while queue:
+        cost, node = heapq.heappop(queue)
+        if cost > dist[node]:
+            continue
+        if cost > limit or settled >= _WITNESS_SETTLE_LIMIT:
+            break
+        settled += 1
+        for target, weight in out_adj[node].items():
+            if target == excluded:
+                continue
+            new_cost = cost + weight
+            if new_cost < dist.get(target, math.inf):
+                dist[target] = new_cost
+                heapq.heappush(queue, (new_cost, target))
+    return dist
+
+
+def load_road_graph(path: Optional[str]) -> Optional[RoadGraph]:
+    """Load the configured road graph; returns None when unset or unusable."""
+    if not path:
+        return None
+    try:
+        graph = RoadGraph.load(path)
+    except RoadGraphError as exc:
+        LOGGER.error("Offline routing disabled: %s", exc)
+        return None
+    LOGGER.info(
+        "Loaded road graph with %d nodes and %d edges from %s",
+        graph.node_count,
+        graph.edge_count,
+        path,
+    )
+    return graph
+
+
+__all__ = [
+    "GRAPH_FORMAT_VERSION",
+    "RoadGraph",
+    "RoadGraphError",
+    "haversine_m",
+    "load_road_graph",
+]
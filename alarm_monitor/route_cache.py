@@ -0,0 +1,187 @@
+"""OpenRouteService route cache with proactive computation for new alarms."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from .metrics import track_outbound
+
+LOGGER = logging.getLogger(__name__)
+
+ORS_DIRECTIONS_URL = (
+    "https://api.openrouteservice.org/v2/directions/driving-car?geometry_format=geojson"
+)
+# Coordinates are rounded to this many decimals for the cache key (~11 m),
+# so GPS jitter in the geocoded destination still hits the same entry.
+_KEY_PRECISION = 4
+
+RouteKey = Tuple[float, float, float, float]
+
+
+class RoutingError(Exception):
+    """Raised when OpenRouteService could not deliver a route."""
+
+
+def fetch_route(
+    api_key: str,
+    start_lat: float,
+    start_lon: float,
+    end_lat: float,
+    end_lon: float,
+    timeout: float = 15,
+) -> Dict[str, Any]:
+    """Request a driving route from OpenRouteService.
+
+    Raises:
+        RoutingError: If the service is unreachable or answers with an error.
+    """
+    body = {
+        "coordinates": [[start_lon, start_lat], [end_lon, end_lat]],
+        "instructions": True,
+        "language": "de",
+    }
+    try:
+        with track_outbound("ors") as call:
+            response = requests.post(
+                ORS_DIRECTIONS_URL,
+                json=body,
+                headers={
+                    "Authorization": api_key,
+                    "Content-Type": "application/json",
+                },
+                timeout=timeout,
+            )
+            if response.status_code != 200:
+                call.fail()
+    except Exception as exc:
+        LOGGER.warning("ORS request failed: %s", exc)
+        raise RoutingError("Routing service unavailable") from exc
+
+    if response.status_code != 200:
+        LOGGER.warning("ORS returned non-200 status: %s", response.status_code)
+        raise RoutingError("Routing service error")
+
+    try:
+        return response.json()
+    except Exception as exc:
+        LOGGER.warning("Failed to parse ORS response: %s", exc)
+        return {}
+
+
+def route_key(start_lat: float, start_lon: float, end_lat: float, end_lon: float) -> RouteKey:
+    """Return the cache key for a route between two rounded coordinates."""
+    return (
+        round(start_lat, _KEY_PRECISION),
+        round(start_lon, _KEY_PRECISION),
+        round(end_lat, _KEY_PRECISION),
+        round(end_lon, _KEY_PRECISION),
+    )
+
+
+class RouteCache:
+    """Thread-safe LRU cache of routes keyed by rounded start/end coordinates.
+
+    Concurrent requests for the same uncached route share a single
+    OpenRouteService call.  Failed or empty responses are not cached.
+    """
+
+    def __init__(self, ttl_minutes: int = 24 * 60, max_entries: int = 64) -> None:
+        self._lock = threading.Lock()
+        self._routes: "OrderedDict[RouteKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[RouteKey, threading.Event] = {}
+        self._ttl = ttl_minutes * 60.0
+        self._max_entries = max_entries
+
+    def get_route(
+        self,
+        api_key: str,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+    ) -> Dict[str, Any]:
+        """Return the route from the cache or fetch (and cache) it.
+
+        Raises:
+            RoutingError: If the route had to be fetched and the request failed.
+        """
+        key = route_key(start_lat, start_lon, end_lat, end_lon)
+        with self._lock:
+            cached = self._lookup_locked(key)
+            if cached is not None:
+                return cached
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                pending = threading.Event()
+                self._in_flight[key] = pending
+
+        if not owner:
+            # Another request is already fetching this route; share its result
+            # and only fetch ourselves if that request failed.
+            pending.wait(timeout=30)
+            with self._lock:
+                cached = self._lookup_locked(key)
+            if cached is not None:
+                return cached
+            pending = None
+        return self._fetch_and_store(key, api_key, start_lat, start_lon, end_lat, end_lon, pending)
+
+    def prefetch(
+        self,
+        api_key: str,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+    ) -> Optional[Dict[str, Any]]:
+        """Compute a route ahead of the first client request; never raises."""
+        try:
+            return self.get_route(api_key, start_lat, start_lon, end_lat, end_lon)
+        except RoutingError:
+            return None
+
+    def _lookup_locked(self, key: RouteKey) -> Optional[Dict[str, Any]]:
+        entry = self._routes.get(key)
+        if entry is None:
+            return None
+        fetched_at, data = entry
+        if time.monotonic() - fetched_at >= self._ttl:
+            del self._routes[key]
+            return None
+        self._routes.move_to_end(key)
+        return data
+
+    def _fetch_and_store(
+        self,
+        key: RouteKey,
+        api_key: str,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+        pending: Optional[threading.Event],
+    ) -> Dict[str, Any]:
+        try:
+            data = fetch_route(api_key, start_lat, start_lon, end_lat, end_lon)
+            if data:
+                with self._lock:
+                    self._routes[key] = (time.monotonic(), data)
+                    self._routes.move_to_end(key)
+                    while len(self._routes) > self._max_entries:
+                        self._routes.popitem(last=False)
+            return data
+        finally:
+            if pending is not None:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+                pending.set()
+
+
+__all__ = ["RouteCache", "RoutingError", "fetch_route", "route_key"]
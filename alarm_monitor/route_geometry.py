@@ -0,0 +1,232 @@
+"""Compact route responses for the navigation page.
+
+OpenRouteService (and the local road graph) return full-resolution geometry
+plus metadata the browser never looks at.  :func:`compact_route` reduces a
+directions response to the fields ``navigation.js`` reads, simplifies the
+line with Douglas-Peucker at a tolerance matching the map zoom and can
+deliver it as an encoded polyline instead of a coordinate array.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Encoded polylines use 5 decimals (~1.1 m), the default of navigation.js.
+POLYLINE_PRECISION = 5
+DEFAULT_ZOOM = 16
+MAX_ZOOM = 20
+# Ground resolution of a 256 px Web Mercator tile at zoom 0 on the equator.
+_METERS_PER_PIXEL_Z0 = 156_543.03
+_METERS_PER_DEGREE = math.pi * 6_371_000.0 / 180.0
+
+Coordinates = List[List[float]]
+
+
+def tolerance_for_zoom(zoom: int, latitude: float) -> float:
+    """Return the simplification tolerance in meters for a map zoom level.
+
+    Points closer than one screen pixel to the simplified line are dropped;
+    Leaflet would merge them while rendering anyway.
+    """
+    return _METERS_PER_PIXEL_Z0 * math.cos(math.radians(latitude)) / (2 ** zoom)
+
+
+def encode_polyline(coordinates: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """Encode ``[lon, lat]`` pairs with the Google polyline algorithm."""
+    factor = 10 ** precision
+    chunks: List[str] = []
+    previous_lat = previous_lon = 0
+    for point in coordinates:
+        lat = round(point[1] * factor)
+        lon = round(point[0] * factor)
+        for delta in (lat - previous_lat, lon - previous_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous_lat, previous_lon = lat, lon
+    return "".join(chunks)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> Coordinates:
+    """Decode a Google polyline into ``[lon, lat]`` pairs."""
+    factor = 10 ** precision
+    coordinates: Coordinates = []
+    index = lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20 or index >= length:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
+
+
+def simplify(
+    coordinates: Sequence[Sequence[float]],
+    tolerance_m: float,
+    keep: Sequence[int] = (),
+) -> List[int]:
+    """Douglas-Peucker simplification of ``[lon, lat]`` pairs.
+
+    Returns the sorted indices of the points to keep.  The first and last
+    point and every index in *keep* always survive, so step way points can be
+    mapped onto the simplified line.
+    """
+    count = len(coordinates)
+    if count <= 2:
+        return list(range(count))
+
+    # Project onto a local plane in meters; exact enough for a district.
+    scale_x = _METERS_PER_DEGREE * math.cos(math.radians(coordinates[0][1]))
+    xs = [point[0] * scale_x for point in coordinates]
+    ys = [point[1] * _METERS_PER_DEGREE for point in coordinates]
+    tolerance_sq = tolerance_m * tolerance_m
+
+    anchors = sorted({0, count - 1, *(index for index in keep if 0 <= index < count)})
+    kept = [False] * count
+    for index in anchors:
+        kept[index] = True
+
+    stack = [(first, last) for first, last in zip(anchors, anchors[1:]) if last - first > 1]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        length_sq = dx * dx + dy * dy
+        farthest = -1
+        farthest_sq = tolerance_sq
+        for index in range(first + 1, last):
+            px, py = xs[index] - ax, ys[index] - ay
+            if length_sq > 0:
+                t = (px * dx + py * dy) / length_sq
+                t = 0.0 if t < 0 else 1.0 if t > 1 else t
+                px -= t * dx
+                py -= t * dy
+            distance_sq = px * px + py * py
+            if distance_sq > farthest_sq:
+                farthest, farthest_sq = index, distance_sq
+        if farthest >= 0:
+            kept[farthest] = True
+            if farthest - first > 1:
+                stack.append((first, farthest))
+            if last - farthest > 1:
+                stack.append((farthest, last))
+
+    return [index for index in range(count) if kept[index]]
+
+
+def _route_parts(
+    data: Dict[str, Any],
+) -> Optional[Tuple[Coordinates, Dict[str, Any], List[Any]]]:
+    """Return ``(coordinates, summary, segments)`` of the first route."""
+    if isinstance(data.get("routes"), list) and data["routes"]:
+        route = data["routes"][0]
+        geometry = route.get("geometry")
+        if isinstance(geometry, str):
+            coordinates = decode_polyline(geometry)
+        elif isinstance(geometry, dict):
+            coordinates = geometry.get("coordinates")
+        else:
+            coordinates = geometry
+        properties = route
+    elif isinstance(data.get("features"), list) and data["features"]:
+        feature = data["features"][0]
+        coordinates = (feature.get("geometry") or {}).get("coordinates")
+        properties = feature.get("properties") or {}
+    else:
+        return None
+    if not isinstance(coordinates, list) or not coordinates:
+        return None
+    segments = properties.get("segments")
+    return coordinates, properties.get("summary") or {}, segments if isinstance(segments, list) else []
+
+
+def compact_route(
+    data: Dict[str, Any],
+    zoom: int = DEFAULT_ZOOM,
+    encoded: bool = False,
+) -> Dict[str, Any]:
+    """Reduce a directions response to what the navigation page renders.
+
+    Accepts the OpenRouteService JSON and GeoJSON formats as well as
+    :meth:`RoadGraph.route` results and always returns the JSON shape
+    (``routes[0]`` with ``summary``, ``segments[].steps`` and ``geometry``).
+    Step ``way_points`` are remapped onto the simplified line.  Responses
+    without a usable geometry are returned unchanged.
+    """
+    parts = _route_parts(data)
+    if parts is None:
+        return data
+    coordinates, summary, segments = parts
+
+    segments = [segment for segment in segments if isinstance(segment, dict)]
+    step_lists = [segment.get("steps") or [] for segment in segments]
+    way_points = [
+        index
+        for steps in step_lists
+        for step in steps
+        for index in (step.get("way_points") or [])[:2]
+        if isinstance(index, int)
+    ]
+    kept = simplify(coordinates, tolerance_for_zoom(zoom, coordinates[0][1]), way_points)
+    last = len(kept) - 1
+    line = [
+        [round(coordinates[index][0], POLYLINE_PRECISION), round(coordinates[index][1], POLYLINE_PRECISION)]
+        for index in kept
+    ]
+
+    compact_segments = []
+    for segment, steps in zip(segments, step_lists):
+        compact_steps = []
+        for step in steps:
+            compact_step = {
+                "instruction": step.get("instruction"),
+                "distance": step.get("distance"),
+                "duration": step.get("duration"),
+            }
+            indices = [index for index in (step.get("way_points") or [])[:2] if isinstance(index, int)]
+            if indices:
+                compact_step["way_points"] = [min(bisect_left(kept, index), last) for index in indices]
+            compact_steps.append(compact_step)
+        compact_segments.append({
+            "distance": segment.get("distance"),
+            "duration": segment.get("duration"),
+            "steps": compact_steps,
+        })
+
+    route: Dict[str, Any] = {
+        "summary": {"distance": summary.get("distance"), "duration": summary.get("duration")},
+        "segments": compact_segments,
+    }
+    if encoded:
+        route["geometry"] = encode_polyline(line)
+        route["geometry_precision"] = POLYLINE_PRECISION
+    else:
+        route["geometry"] = {"type": "LineString", "coordinates": line}
+    return {"routes": [route]}
+
+
+__all__ = [
+    "DEFAULT_ZOOM",
+    "MAX_ZOOM",
+    "POLYLINE_PRECISION",
+    "compact_route",
+    "decode_polyline",
+    "encode_polyline",
+    "simplify",
+    "tolerance_for_zoom",
+]
@@ -9,13 +9,18 @@ import re
 import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
-import requests as http_requests
 from flask import Blueprint, Response, current_app, jsonify, redirect, request, send_file, stream_with_context, url_for
 
-from ..alarm_processor import _serialize_history_entry, process_alarm
+from ..alarm_processor import _serialize_history_entry, process_alarm, process_alarm_batch
+from ..alarm_schema import AlarmValidationError
 from ..app import _limiter
+from ..metrics import render_metrics
+from ..ntfy_client import DEFAULT_NTFY_MODE, NTFY_MODES, parse_ntfy_topics
+from ..route_cache import RoutingError
+from ..route_geometry import DEFAULT_ZOOM, MAX_ZOOM, compact_route
+from ..static_assets import DEFAULT_CREST, apply_cache_policy, file_digest, static_url
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,6 +36,8 @@ _MESSAGE_ID_RE = re.compile(
 # ---------------------------------------------------------------------------
 
 _MAX_LOGO_BYTES = 2 * 1024 * 1024  # 2 MB
+# Largest backlog accepted by POST /api/alarm/batch (the default history size).
+_MAX_BATCH_ALARMS = 100
 
 _MIME_TO_EXT: Dict[str, str] = {
     "image/png": ".png",
@@ -80,6 +87,14 @@ def _get_custom_logo_path() -> Optional[Path]:
     return None
 
 
+def _logo_url() -> str:
+    """Content-versioned URL of the current logo, cacheable until it changes."""
+    logo_path = _get_custom_logo_path()
+    if logo_path is None:
+        return static_url(DEFAULT_CREST)
+    return url_for("api.api_logo", v=file_digest(logo_path))
+
+
 # ---------------------------------------------------------------------------
 # Helpers – access shared state from app config
 # ---------------------------------------------------------------------------
@@ -96,8 +111,12 @@ def _get_settings_store():
     return current_app.config["SETTINGS_STORE"]
 
 
-def _get_messenger():
-    return current_app.config.get("ALARM_MESSENGER")
+def _get_participant_poller():
+    return current_app.config.get("PARTICIPANT_POLLER")
+
+
+def _get_alarm_hooks():
+    return current_app.config["ALARM_HOOKS"]
 
 
 def _get_subscribers():
@@ -116,13 +135,24 @@ def _get_warnings_cache():
     return current_app.config["WARNINGS_CACHE"]
 
 
+def _get_calendar_cache():
+    return current_app.config["CALENDAR_CACHE"]
+
+
+def _get_route_cache():
+    return current_app.config["ROUTE_CACHE"]
+
+
 def _get_message_store():
     return current_app.config.get("MESSAGE_STORE")
 
 
-def _get_effective_settings() -> Dict[str, Any]:
-    from ..app import get_effective_settings
-    return get_effective_settings(_get_settings_store(), _get_config())
+def _get_tracer():
+    return current_app.config["ALARM_TRACER"]
+
+
+def _get_effective_settings() -> Mapping[str, Any]:
+    return _get_settings_store().effective()
 
 
 def _build_idle_response(last_alarm: Optional[Dict[str, Any]]) -> Dict[str, Any]:
@@ -198,8 +228,6 @@ def receive_alarm():
     from ..app import _executor, _increment_metric
     config = _get_config()
     store = _get_store()
-    subscribers = _get_subscribers()
-    subscribers_lock = _get_subscribers_lock()
 
     api_key = request.headers.get("X-API-Key") or ""
     if not config.api_key or not hmac.compare_digest(api_key, config.api_key):
@@ -207,29 +235,41 @@ def receive_alarm():
         return jsonify({"error": "Unauthorized"}), 401
 
     alarm_data = request.get_json()
-    if not alarm_data:
-        LOGGER.warning("Received empty alarm data")
+    if not alarm_data or not isinstance(alarm_data, dict):
+        LOGGER.warning("Received empty or non-object alarm data")
         return jsonify({"error": "Invalid request"}), 400
 
     _increment_metric("alarms_received")
+    tracer = _get_tracer()
+    trace = tracer.begin(alarm_data.get("incident_number"))
 
     try:
-        stored = process_alarm(alarm_data, store, config, _get_effective_settings, _executor)
+        stored = process_alarm(
+            alarm_data,
+            store,
+            config,
+            _get_effective_settings,
+            _executor,
+            trace=trace,
+            route_cache=_get_route_cache(),
+        )
         if stored:
             _increment_metric("alarms_stored")
-            cec_watcher = current_app.config.get("CEC_WATCHER")
-            if cec_watcher is not None:
-                cec_watcher.handle_alarm_stored()
-            with subscribers_lock:
-                for evt in subscribers:
-                    evt.set()
+            tracer.commit(trace)
+            # SSE push runs inline; CEC wake and participant polling are
+            # handed to the hook worker.
+            _get_alarm_hooks().dispatch(alarm_data)
+            trace.mark("sse_notified")
         response = jsonify({"status": "ok"})
         response.headers["Cache-Control"] = "no-store"
         return response, 200
+    except AlarmValidationError as exc:
+        LOGGER.warning("Invalid alarm payload: %s", exc)
+        # Validation errors are intentionally surfaced to callers so they can
+        # correct the payload; "errors" lists every violated constraint.
+        return jsonify({"error": str(exc), "errors": exc.errors}), 400
     except ValueError as exc:
         LOGGER.warning("Invalid alarm payload: %s", exc)
-        # Validation errors from validate_alarm_payload() are intentionally surfaced
-        # to callers so they can correct the payload.
         error_message = str(exc)
         return jsonify({"error": error_message}), 400
     except Exception:
@@ -237,6 +277,58 @@ def receive_alarm():
         return jsonify({"error": "Internal server error"}), 500
 
 
+@api_bp.route("/api/alarm/batch", methods=["POST"])
+@_limiter.limit("10 per minute")
+def receive_alarm_batch():
+    """Receive a replayed backlog of alarms from alarm-mail in one request."""
+    from ..app import _executor, _increment_metric
+    config = _get_config()
+
+    api_key = request.headers.get("X-API-Key") or ""
+    if not config.api_key or not hmac.compare_digest(api_key, config.api_key):
+        LOGGER.warning("Unauthorized API access attempt")
+        return jsonify({"error": "Unauthorized"}), 401
+
+    alarms = request.get_json(silent=True)
+    if not isinstance(alarms, list) or not alarms:
+        return jsonify({"error": "Request body must be a non-empty JSON array of alarms"}), 400
+    if len(alarms) > _MAX_BATCH_ALARMS:
+        return jsonify({"error": f"At most {_MAX_BATCH_ALARMS} alarms per batch"}), 400
+
+    _increment_metric("alarms_received", len(alarms))
+    try:
+        result = process_alarm_batch(
+            alarms,
+            _get_store(),
+            config,
+            _get_effective_settings,
+            _executor,
+            route_cache=_get_route_cache(),
+        )
+    except AlarmValidationError as exc:
+        LOGGER.warning("Invalid alarm batch: %s", exc)
+        return jsonify({"error": str(exc), "errors": exc.errors}), 400
+    except Exception:
+        LOGGER.error("Error processing alarm batch", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+    if result.stored:
+        _increment_metric("alarms_stored", len(result.stored))
+        # One notification for the whole backlog: the hooks run once for
+        # the alarm the dashboards show now.
+        latest = _get_store().latest()
+        if latest is not None:
+            _get_alarm_hooks().dispatch(latest["alarm"])
+    response = jsonify({
+        "status": "ok",
+        "stored": [alarm["incident_number"] for alarm in result.stored],
+        "duplicates": result.duplicates,
+        "filtered": result.filtered,
+    })
+    response.headers["Cache-Control"] = "no-store"
+    return response, 200
+
+
 @api_bp.route("/api/alarm")
 def api_alarm():
     config = _get_config()
@@ -280,9 +372,18 @@ def api_alarm():
 
 @api_bp.route("/api/stream")
 def api_stream():
-    """Server-Sent Events endpoint for real-time alarm updates."""
+    """Server-Sent Events endpoint for real-time alarm and message updates.
+
+    Events are typed: ``alarm``/``idle`` when the alarm state changed,
+    ``messages`` with the full list of active messages whenever it changed
+    (and once after connecting), ``participants`` with the list of one
+    incident whenever the shared participant poller saw it change,
+    ``heartbeat`` every 30 seconds otherwise.
+    """
     from flask import jsonify as _jsonify
     store = _get_store()
+    message_store = _get_message_store()
+    participant_poller = _get_participant_poller()
     subscribers = _get_subscribers()
     subscribers_lock = _get_subscribers_lock()
 
@@ -295,13 +396,38 @@ def api_stream():
         evt = threading.Event()
         with subscribers_lock:
             subscribers.append(evt)
+        last_messages_version = None
+        last_alarm_event = None
+        participant_versions: Dict[str, int] = {}
+
+        def _messages_event() -> str:
+            nonlocal last_messages_version
+            last_messages_version = message_store.version
+            return "data: " + json.dumps(
+                {"type": "messages", "messages": message_store.get_active()}
+            ) + "\n\n"
+
         try:
             yield "data: " + json.dumps({"type": "connected"}) + "\n\n"
+            if message_store is not None:
+                yield _messages_event()
             while True:
                 try:
                     triggered = evt.wait(timeout=30)
                     evt.clear()
                     if triggered:
+                        if message_store is not None and message_store.version != last_messages_version:
+                            yield _messages_event()
+                        if participant_poller is not None:
+                            for incident, (version, participants) in participant_poller.snapshot().items():
+                                if participant_versions.get(incident) == version:
+                                    continue
+                                participant_versions[incident] = version
+                                yield "data: " + json.dumps({
+                                    "type": "participants",
+                                    "incident_number": incident,
+                                    "participants": participants,
+                                }) + "\n\n"
                         alarm_payload = store.latest()
                         if alarm_payload is not None:
                             received_at = alarm_payload.get("received_at")
@@ -316,7 +442,11 @@ def api_stream():
                             })
                         else:
                             event_data = json.dumps({"type": "idle"})
-                        yield "data: " + event_data + "\n\n"
+                        # Triggers shared with message changes must not
+                        # re-send an unchanged alarm state.
+                        if event_data != last_alarm_event:
+                            last_alarm_event = event_data
+                            yield "data: " + event_data + "\n\n"
                     else:
                         yield "data: " + json.dumps({"type": "heartbeat"}) + "\n\n"
                 except (BrokenPipeError, ConnectionResetError, GeneratorExit):
@@ -336,22 +466,69 @@ def api_stream():
 
 @api_bp.route("/api/alarm/participants/<incident_number>")
 def api_participants(incident_number: str):
-    """Get participants for an alarm by incident number."""
-    messenger = _get_messenger()
+    """Get participants for an alarm by incident number.
+
+    Served from the shared participant poller; only the first request for an
+    incident waits for the messenger server.  Unknown incidents yield 404.
+    """
+    participant_poller = _get_participant_poller()
 
     if not _INCIDENT_NUMBER_RE.match(incident_number):
         return jsonify({"error": "Invalid incident number"}), 400
 
-    if not messenger:
+    if not participant_poller:
         return jsonify({"error": "Messenger not configured"}), 503
 
-    participants = messenger.get_participants(incident_number)
+    # Only stored alarms are polled, so made-up numbers cost no upstream calls.
+    if not (
+        participant_poller.is_watched(incident_number)
+        or _get_store().has_incident_number(incident_number)
+    ):
+        return jsonify({"error": "Unknown incident"}), 404
+
+    participants = participant_poller.get(incident_number)
     if participants is None:
         return jsonify({"error": "Failed to fetch participants"}), 500
 
     return jsonify({"participants": participants})
 
 
+@api_bp.route("/api/alarm/<incident_number>/rendered", methods=["POST"])
+@_limiter.limit("120 per minute")
+def api_alarm_rendered(incident_number: str):
+    """Render beacon sent by dashboards once an alarm is visible on screen."""
+    if not _INCIDENT_NUMBER_RE.match(incident_number):
+        return jsonify({"error": "Invalid incident number"}), 400
+
+    if not _get_tracer().mark(incident_number, "rendered"):
+        return jsonify({"error": "Unknown incident"}), 404
+
+    return "", 204
+
+
+@api_bp.route("/api/alarm/traces")
+def api_alarm_traces():
+    """Return pipeline timing spans for the most recent incidents."""
+    resp = jsonify({"traces": _get_tracer().recent()})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@api_bp.route("/api/alarm/traces/<incident_number>")
+def api_alarm_trace(incident_number: str):
+    """Return pipeline timing spans for a single incident."""
+    if not _INCIDENT_NUMBER_RE.match(incident_number):
+        return jsonify({"error": "Invalid incident number"}), 400
+
+    trace = _get_tracer().get(incident_number)
+    if trace is None:
+        return jsonify({"error": "Trace not found"}), 404
+
+    resp = jsonify(trace)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
 @api_bp.route("/api/history")
 def api_history():
     store = _get_store()
@@ -381,10 +558,18 @@ def api_history():
 
 @api_bp.route("/api/route")
 def api_route():
-    """Proxy routing requests to OpenRouteService."""
+    """Proxy routing requests to OpenRouteService through the shared route cache.
+
+    When a local road graph is configured it answers instead if no ORS key is
+    set or OpenRouteService is unreachable.  The response is reduced to the
+    fields the navigation page uses and its geometry simplified for the map
+    zoom given as ``zoom`` (default 16); ``geometry=polyline`` returns the
+    line as an encoded polyline.
+    """
     config = _get_config()
+    road_graph = current_app.config.get("ROAD_GRAPH")
 
-    if not config.ors_api_key:
+    if not config.ors_api_key and road_graph is None:
         return jsonify({"error": "Routing not configured"}), 503
 
     try:
@@ -395,36 +580,32 @@ def api_route():
     except (KeyError, ValueError, TypeError):
         return jsonify({"error": "start_lat, start_lon, end_lat, end_lon are required numeric parameters"}), 400
 
-    body = {
-        "coordinates": [[start_lon, start_lat], [end_lon, end_lat]],
-        "instructions": True,
-        "language": "de",
-    }
-    try:
-        ors_response = http_requests.post(
-            "https://api.openrouteservice.org/v2/directions/driving-car?geometry_format=geojson",
-            json=body,
-            headers={
-                "Authorization": config.ors_api_key,
-                "Content-Type": "application/json",
-            },
-            timeout=15,
-        )
-    except Exception as exc:
-        LOGGER.warning("ORS request failed: %s", exc)
-        return jsonify({"error": "Routing service unavailable"}), 502
+    zoom = DEFAULT_ZOOM
+    raw_zoom = request.args.get("zoom")
+    if raw_zoom:
+        try:
+            zoom = max(0, min(MAX_ZOOM, int(raw_zoom)))
+        except ValueError:
+            zoom = DEFAULT_ZOOM
+    encoded = request.args.get("geometry") == "polyline"
 
-    if ors_response.status_code != 200:
-        LOGGER.warning("ORS returned non-200 status: %s", ors_response.status_code)
-        return jsonify({"error": "Routing service error"}), 502
+    data = None
+    if config.ors_api_key:
+        try:
+            data = _get_route_cache().get_route(
+                config.ors_api_key, start_lat, start_lon, end_lat, end_lon
+            )
+        except RoutingError as exc:
+            if road_graph is None:
+                return jsonify({"error": str(exc)}), 502
+            LOGGER.warning("%s, falling back to the local road graph", exc)
 
-    try:
-        data = ors_response.json()
-    except Exception as exc:
-        LOGGER.warning("Failed to parse ORS response: %s", exc)
-        data = {}
+    if data is None:
+        data = road_graph.route(start_lat, start_lon, end_lat, end_lon)
+        if data is None:
+            return jsonify({"error": "No route found in local road graph"}), 502
 
-    resp = jsonify(data)
+    resp = jsonify(compact_route(data, zoom=zoom, encoded=encoded))
     resp.headers["Cache-Control"] = "no-store"
     return resp
 
@@ -447,6 +628,7 @@ def api_get_settings():
         "calendar_urls": calendar_urls_str,
         "ntfy_topic_url": effective_settings.get("ntfy_topic_url") or "",
         "ntfy_poll_interval": effective_settings.get("ntfy_poll_interval", 60),
+        "ntfy_mode": effective_settings.get("ntfy_mode", DEFAULT_NTFY_MODE),
         "message_default_ttl_minutes": effective_settings.get("message_default_ttl_minutes", 60),
         "dwd_warnings_mock": effective_settings.get("dwd_warnings_mock", False),
         "show_last_alarm": effective_settings.get("show_last_alarm", True),
@@ -540,6 +722,10 @@ def api_update_settings():
 
     if "ntfy_topic_url" in data:
         ntfy_url = str(data["ntfy_topic_url"]).strip() if data["ntfy_topic_url"] else ""
+        try:
+            parse_ntfy_topics(ntfy_url)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
         updates["ntfy_topic_url"] = ntfy_url if ntfy_url else None
 
     if "ntfy_poll_interval" in data and data["ntfy_poll_interval"] not in (None, ""):
@@ -551,6 +737,12 @@ def api_update_settings():
         except (TypeError, ValueError):
             return jsonify({"error": "ntfy_poll_interval must be an integer"}), 400
 
+    if "ntfy_mode" in data and data["ntfy_mode"] not in (None, ""):
+        mode = str(data["ntfy_mode"]).strip().lower()
+        if mode not in NTFY_MODES:
+            return jsonify({"error": "ntfy_mode must be 'stream' or 'poll'"}), 400
+        updates["ntfy_mode"] = mode
+
     if "message_default_ttl_minutes" in data and data["message_default_ttl_minutes"] not in (None, ""):
         try:
             ttl = int(data["message_default_ttl_minutes"])
@@ -611,7 +803,11 @@ def api_update_settings():
         schedules = normalize_schedules(data["hdmi_cec_schedules"])
         updates["hdmi_cec_schedules"] = schedules
 
+    # Subscribers (ntfy poller, CEC watcher) react to the changed keys.
     settings_store.update(updates)
+    if "calendar_urls" in updates:
+        from ..app import _executor
+        _get_calendar_cache().prefetch(updates["calendar_urls"], executor=_executor)
     LOGGER.info("Settings updated: %s", updates)
 
     resp = jsonify({"status": "ok", "settings": updates})
@@ -624,11 +820,13 @@ def api_logo():
     """Serve the custom fire-department logo, or redirect to the built-in default."""
     logo_path = _get_custom_logo_path()
     if logo_path is None:
-        return redirect(url_for("static", filename="img/crest.png"))
+        return redirect(static_url(DEFAULT_CREST))
 
     ext = logo_path.suffix.lower()
     mime = {v: k for k, v in _MIME_TO_EXT.items()}.get(ext, "image/png")
-    return send_file(str(logo_path), mimetype=mime)
+    digest = file_digest(logo_path)
+    response = send_file(str(logo_path), mimetype=mime, etag=digest, max_age=0)
+    return apply_cache_policy(response, digest)
 
 
 @api_bp.route("/api/settings/logo", methods=["POST"])
@@ -728,8 +926,13 @@ def api_delete_logo():
 
 @api_bp.route("/api/calendar")
 def api_calendar():
-    """Return upcoming calendar events from configured iCal URLs."""
-    from ..calendar_service import fetch_calendar_events
+    """Return upcoming calendar events from configured iCal URLs.
+
+    Always answered from the in-memory calendar cache; due feeds are
+    refreshed in the background.  ``feeds`` reports the health of each
+    configured feed (host only, never the full URL).
+    """
+    from ..app import _executor
     effective_settings = _get_effective_settings()
     calendar_urls = effective_settings.get("calendar_urls", [])
 
@@ -738,13 +941,14 @@ def api_calendar():
         resp.headers["Cache-Control"] = "no-store"
         return resp
 
-    try:
-        events = fetch_calendar_events(calendar_urls)
-    except Exception:
-        LOGGER.error("Failed to fetch calendar events", exc_info=True)
-        events = []
+    calendar_cache = _get_calendar_cache()
+    events = calendar_cache.get_events(calendar_urls, executor=_executor)
 
-    resp = jsonify({"events": events, "configured": True})
+    resp = jsonify({
+        "events": events,
+        "configured": True,
+        "feeds": calendar_cache.health(calendar_urls),
+    })
     resp.headers["Cache-Control"] = "no-store"
     return resp
 
@@ -826,6 +1030,10 @@ def api_delete_message(message_id: str):
     if not deleted:
         return jsonify({"error": "Message not found"}), 404
 
+    with _get_subscribers_lock():
+        for evt in _get_subscribers():
+            evt.set()
+
     resp = jsonify({"status": "ok"})
     resp.headers["Cache-Control"] = "no-store"
     return resp
@@ -839,7 +1047,7 @@ def api_metrics():
     Returns 404 if ALARM_MONITOR_METRICS_TOKEN is not configured.
     """
     import os
-    from ..app import _metrics, _metrics_lock
+    from ..app import _executor_queue_depth, _metrics, _metrics_lock
 
     metrics_token = os.environ.get("ALARM_MONITOR_METRICS_TOKEN", "")
     if not metrics_token:
@@ -875,5 +1083,15 @@ def api_metrics():
     lines.append("# TYPE alarm_monitor_history_size gauge")
     lines.append(f"alarm_monitor_history_size {store.history_count()}")
 
+    lines.append("# HELP alarm_monitor_executor_queue_depth Background tasks waiting for a worker")
+    lines.append("# TYPE alarm_monitor_executor_queue_depth gauge")
+    lines.append(f"alarm_monitor_executor_queue_depth {_executor_queue_depth()}")
+
+    lines.extend(render_metrics())
+    lines.extend(_get_tracer().render_metrics())
+    lines.extend(
+        _get_calendar_cache().render_metrics(_get_effective_settings().get("calendar_urls", []))
+    )
+
     text = "\n".join(lines) + "\n"
     return text, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
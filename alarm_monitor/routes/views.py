@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import logging
 
-from flask import Blueprint, current_app, render_template, url_for
+from flask import Blueprint, current_app, render_template
 
 LOGGER = logging.getLogger(__name__)
 
@@ -15,16 +15,19 @@ def _get_config():
     return current_app.config["APP_CONFIG"]
 
 
+def _crest_url() -> str:
+    from .api import _logo_url
+    return _logo_url()
+
+
 def _get_effective_settings():
-    from ..app import get_effective_settings
-    settings_store = current_app.config["SETTINGS_STORE"]
-    return get_effective_settings(settings_store, _get_config())
+    return current_app.config["SETTINGS_STORE"].effective()
 
 
 @views_bp.route("/")
 def dashboard() -> str:
     config = _get_config()
-    crest_url = url_for("api.api_logo")
+    crest_url = _crest_url()
     effective_settings = _get_effective_settings()
     return render_template(
         "dashboard.html",
@@ -42,7 +45,7 @@ def dashboard() -> str:
 @views_bp.route("/navigation")
 def navigation_page() -> str:
     config = _get_config()
-    crest_url = url_for("api.api_logo")
+    crest_url = _crest_url()
     effective_settings = _get_effective_settings()
     return render_template(
         "navigation.html",
@@ -59,7 +62,7 @@ def navigation_page() -> str:
 @views_bp.route("/history")
 def history_page() -> str:
     config = _get_config()
-    crest_url = url_for("api.api_logo")
+    crest_url = _crest_url()
     effective_settings = _get_effective_settings()
     return render_template(
         "history.html",
@@ -73,7 +76,7 @@ def history_page() -> str:
 @views_bp.route("/mobile")
 def mobile_dashboard() -> str:
     config = _get_config()
-    crest_url = url_for("api.api_logo")
+    crest_url = _crest_url()
     effective_settings = _get_effective_settings()
     return render_template(
         "mobile.html",
@@ -89,7 +92,7 @@ def settings_page() -> str:
     """Settings configuration page."""
     from ..app import generate_csrf_token
     config = _get_config()
-    crest_url = url_for("api.api_logo")
+    crest_url = _crest_url()
     effective_settings = _get_effective_settings()
     csrf_token = generate_csrf_token(config.settings_password) if config.settings_password else ""
     return render_template(
@@ -1204,6 +1204,11 @@ async function fetchCalendarEvents() {
     }
 }
 
+// Set while /api/stream delivers "messages" events; the idle view then no
+// longer fetches /api/messages itself.
+let messagesStreamActive = false;
+let idleMessagesCache = [];
+
 async function fetchMessages() {
     try {
         const response = await fetch('/api/messages');
@@ -1238,6 +1243,9 @@ function updateIdleMessages(messages) {
     if (!idleMessagesEl || !idleMessagesListEl) {
         return;
     }
+    if (messages) {
+        idleMessagesCache = messages;
+    }
 
     if (!messages || messages.length === 0) {
         idleMessagesEl.classList.add('hidden');
@@ -1292,8 +1300,13 @@ function updateIdleClock() {
 setInterval(updateIdleClock, 1000);
 updateIdleClock();
 
+// Re-render the remaining-time labels; list changes arrive via SSE.
 setInterval(() => {
-    fetchMessages().then(updateIdleMessages);
+    if (messagesStreamActive) {
+        updateIdleMessages(idleMessagesCache);
+    } else {
+        fetchMessages().then(updateIdleMessages);
+    }
 }, 60000);
 
 function formatTimestamp(value) {
@@ -1981,7 +1994,7 @@ function showLeafletMap(lat, lon, locationLabel) {
 
 function updateMap(coordinates, location) {
     if (!mapPanel) {
-        return;
+        return false;
     }
 
     mapPanel.classList.remove('hidden');
@@ -1994,7 +2007,7 @@ function updateMap(coordinates, location) {
 
     if (!coordinates) {
         showMapPlaceholder('Keine Koordinaten verfügbar.');
-        return;
+        return false;
     }
 
     const { lat, lon } = coordinates;
@@ -2002,16 +2015,40 @@ function updateMap(coordinates, location) {
     const lonNum = Number(lon);
     if (!Number.isFinite(latNum) || !Number.isFinite(lonNum)) {
         showMapPlaceholder('Übermittelte Koordinaten sind ungültig.');
-        return;
+        return false;
     }
 
     if (!isLeafletAvailable()) {
         showMapPlaceholder('Kartendienst derzeit nicht verfügbar. Bitte Zugriff auf OpenStreetMap prüfen.');
-        return;
+        return false;
     }
 
     showLeafletMap(latNum, lonNum, location);
     requestAlarmViewFit();
+    return true;
+}
+
+const renderBeaconsSent = new Set();
+
+/**
+ * Tell the server that the map for an incident is on screen (once per page load).
+ * Used for end-to-end alarm latency tracing.
+ * @param {string} incidentNumber - Incident number of the displayed alarm.
+ * @returns {void}
+ */
+function sendRenderBeacon(incidentNumber) {
+    if (!incidentNumber || renderBeaconsSent.has(incidentNumber)) {
+        return;
+    }
+    renderBeaconsSent.add(incidentNumber);
+    // Wait for the next frame so the beacon reflects what is actually painted.
+    requestAnimationFrame(() => {
+        const url = `/api/alarm/${encodeURIComponent(incidentNumber)}/rendered`;
+        if (navigator.sendBeacon && navigator.sendBeacon(url)) {
+            return;
+        }
+        fetch(url, { method: 'POST', keepalive: true }).catch(() => {});
+    });
 }
 
 /**
@@ -2067,7 +2104,10 @@ function updateDashboard(data) {
         const navigationAvailable = hasValidCoordinates(coordinates);
         setNavigationTarget(navigationAvailable ? coordinates : null, navigationLabel);
         setNavigationAvailability(navigationAvailable);
-        updateMap(coordinates, alarm.location);
+        const mapShown = updateMap(coordinates, alarm.location);
+        if (mapShown) {
+            sendRenderBeacon(alarm.incident_number);
+        }
         
         // Update participants for the current alarm
         if (alarm.incident_number) {
@@ -2091,7 +2131,9 @@ function updateDashboard(data) {
         updateIdleHeaderWeather(data.weather);
         updateIdleMainPanel(data.last_alarm, data.warnings, data.show_last_alarm);
         fetchCalendarEvents().then(updateIdleCalendar);
-        fetchMessages().then(updateIdleMessages);
+        if (!messagesStreamActive) {
+            fetchMessages().then(updateIdleMessages);
+        }
         updateAlarmDetails(null);
         if (mapPanel) {
             mapPanel.classList.add('hidden');
@@ -2243,6 +2285,19 @@ poll();
             resetHeartbeatTimer();
             try {
                 var data = JSON.parse(event.data);
+                if (data && data.type === 'messages') {
+                    messagesStreamActive = true;
+                    updateIdleMessages(data.messages || []);
+                    return;
+                }
+                if (data && data.type === 'participants') {
+                    // Pushed by the server-side participant poller
+                    if (data.incident_number === currentIncidentNumber) {
+                        showParticipantsColumn();
+                        updateParticipantsDisplay(data.participants || []);
+                    }
+                    return;
+                }
                 if (data && (data.type === 'alarm' || data.type === 'idle' || data.type === 'connected')) {
                     if (data.type === 'alarm' || data.type === 'idle') {
                         updateDashboard(data.type === 'alarm' ? data : { mode: 'idle', alarm: null });
@@ -2254,6 +2309,7 @@ poll();
         };
 
         es.onerror = function () {
+            messagesStreamActive = false;
             if (es.readyState === EventSource.CLOSED) {
                 showBanner();
                 if (heartbeatTimeout) {
@@ -2418,8 +2474,15 @@ function startParticipantsPolling(incidentNumber) {
     // Fetch immediately
     fetchParticipants(incidentNumber).then(handleParticipantsResponse);
     
-    // Then poll every 10 seconds
+    // Then poll every 10 seconds.  While the stream is connected, changes are
+    // pushed via SSE and a request every 30 seconds only keeps the incident
+    // active in the server-side poller.
+    let pollTick = 0;
     participantsPollInterval = setInterval(() => {
+        pollTick += 1;
+        if (messagesStreamActive && pollTick % 3 !== 0) {
+            return;
+        }
         if (currentIncidentNumber === incidentNumber) {
             fetchParticipants(incidentNumber).then(handleParticipantsResponse);
         }
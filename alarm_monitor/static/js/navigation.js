@@ -318,6 +318,7 @@ async function requestRoute(start, destination) {
         start_lon: start.lon,
         end_lat: destination.lat,
         end_lon: destination.lon,
+        geometry: 'polyline',
     });
 
     let response;
@@ -182,6 +182,8 @@
                 if (ntfyUrlEl) { ntfyUrlEl.value = data.ntfy_topic_url || ''; }
                 const ntfyIntervalEl = document.getElementById('ntfy_poll_interval');
                 if (ntfyIntervalEl) { ntfyIntervalEl.value = data.ntfy_poll_interval || ''; }
+                const ntfyModeEl = document.getElementById('ntfy_mode');
+                if (ntfyModeEl) { ntfyModeEl.value = data.ntfy_mode || 'stream'; }
                 const msgTtlEl = document.getElementById('message_default_ttl_minutes');
                 if (msgTtlEl) { msgTtlEl.value = data.message_default_ttl_minutes || ''; }
 
@@ -235,6 +237,7 @@
             calendar_urls: formData.get('calendar_urls') || '',
             ntfy_topic_url: formData.get('ntfy_topic_url') || '',
             ntfy_poll_interval: formData.get('ntfy_poll_interval') || '',
+            ntfy_mode: formData.get('ntfy_mode') || 'stream',
             message_default_ttl_minutes: formData.get('message_default_ttl_minutes') || '',
             dwd_warnings_mock: formData.get('dwd_warnings_mock') === 'on',
             show_last_alarm: formData.get('show_last_alarm') === 'on',
@@ -0,0 +1,217 @@
+"""Content-addressed serving of static files.
+
+Static files are identified by a short SHA-256 digest of their content.  The
+digest doubles as a strong ``ETag`` and as the ``?v=`` cache-busting token:
+a request whose ``v`` matches the current digest can be cached by the browser
+forever (``immutable``), everything else falls back to a short max-age and
+conditional revalidation.  Digests are cached per file and only recomputed
+when the file's size or modification time changes.
+
+Text assets can be precompressed at build time (``scripts/precompress_static.py``
+writes ``.br`` and ``.gz`` files next to the originals).  A variant is served
+when the client accepts its encoding and the variant is not older than its
+source, so an edited file is never shadowed by a stale compressed copy.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli  # type: ignore[import]
+except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
+    brotli = None
+
+from flask import Flask, Response, current_app, request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CREST = "img/crest.png"
+
+COMPRESSIBLE_SUFFIXES = frozenset({".css", ".html", ".js", ".json", ".map", ".mjs", ".svg", ".txt"})
+# Preferred first; each entry is (Content-Encoding, file suffix).
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+_MIN_COMPRESS_BYTES = 1024
+# Variants that do not save at least this fraction are not written.
+_MAX_COMPRESSED_RATIO = 0.9
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_DIGEST_LENGTH = 16
+_CHUNK_SIZE = 64 * 1024
+
+_digest_lock = threading.Lock()
+_digest_cache: Dict[str, Tuple[int, int, str]] = {}
+
+
+def file_digest(path: Path) -> str:
+    """Return the content digest of *path*, recomputed only when it changes."""
+    stat = path.stat()
+    key = str(path)
+    with _digest_lock:
+        cached = _digest_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()[:_DIGEST_LENGTH]
+    with _digest_lock:
+        _digest_cache[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def static_digest(filename: str) -> Optional[str]:
+    """Digest of a file below the app's static folder, or None if missing."""
+    static_folder = current_app.static_folder
+    if not static_folder:
+        return None
+    joined = safe_join(static_folder, filename)
+    if joined is None:
+        return None
+    path = Path(joined)
+    if not path.is_file():
+        return None
+    return file_digest(path)
+
+
+def static_url(filename: str) -> str:
+    """URL of a static file versioned by its content digest."""
+    digest = static_digest(filename)
+    if digest is None:
+        return url_for("static", filename=filename)
+    return url_for("static", filename=filename, v=digest)
+
+
+def apply_cache_policy(response: Response, digest: str) -> Response:
+    """Mark *response* immutable if the request asked for exactly *digest*."""
+    if request.args.get("v") == digest:
+        response.cache_control.no_cache = None
+        response.headers.pop("Expires", None)
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def _fresh_variants(source: Path) -> List[Tuple[str, str]]:
+    """Return the ``(encoding, suffix)`` pairs with an up-to-date variant file."""
+    if source.suffix not in COMPRESSIBLE_SUFFIXES:
+        return []
+    source_mtime = source.stat().st_mtime_ns
+    variants = []
+    for encoding, suffix in ENCODINGS:
+        variant = source.with_name(source.name + suffix)
+        try:
+            if variant.stat().st_mtime_ns >= source_mtime:
+                variants.append((encoding, suffix))
+        except OSError:
+            continue
+    return variants
+
+
+def _serve_static(filename: str) -> Response:
+    digest = static_digest(filename)
+    if digest is None:
+        raise NotFound()
+    static_folder: str = current_app.static_folder  # type: ignore[assignment]
+    source = Path(safe_join(static_folder, filename))  # type: ignore[arg-type]
+    variants = _fresh_variants(source)
+
+    served_name, etag, content_encoding = filename, digest, None
+    for encoding, suffix in variants:
+        if request.accept_encodings[encoding]:
+            served_name = filename + suffix
+            # Each representation needs its own strong validator.
+            etag = f"{digest}-{suffix[1:]}"
+            content_encoding = encoding
+            break
+
+    response = send_from_directory(
+        static_folder,
+        served_name,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        download_name=source.name,
+        etag=etag,
+        max_age=current_app.get_send_file_max_age(filename),
+    )
+    if content_encoding is not None:
+        response.headers["Content-Encoding"] = content_encoding
+    if variants:
+        response.vary.add("Accept-Encoding")
+    return apply_cache_policy(response, digest)
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        # mtime=0 keeps the output reproducible across builds.
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def precompress_static(static_dir: Path) -> Dict[str, int]:
+    """Write ``.br``/``.gz`` variants for compressible files below *static_dir*.
+
+    Existing up-to-date variants are left alone.  Returns counters for the
+    written, skipped and unsupported cases so build logs stay informative.
+    """
+    stats = {"written": 0, "up_to_date": 0, "not_worth_it": 0}
+    if brotli is None:
+        LOGGER.warning("brotli is not installed – only gzip variants are generated")
+    for source in _iter_compressible(static_dir):
+        data = source.read_bytes()
+        if len(data) < _MIN_COMPRESS_BYTES:
+            stats["not_worth_it"] += 1
+            continue
+        fresh = {encoding for encoding, _ in _fresh_variants(source)}
+        for encoding, suffix in ENCODINGS:
+            variant = source.with_name(source.name + suffix)
+            if encoding in fresh:
+                stats["up_to_date"] += 1
+                continue
+            compressed = _compress(data, encoding)
+            if compressed is None:
+                continue
+            if len(compressed) > len(data) * _MAX_COMPRESSED_RATIO:
+                variant.unlink(missing_ok=True)
+                stats["not_worth_it"] += 1
+                continue
+            variant.write_bytes(compressed)
+            stats["written"] += 1
+    return stats
+
+
+def _iter_compressible(static_dir: Path) -> Iterable[Path]:
+    for path in sorted(static_dir.rglob("*")):
+        if path.is_file() and path.suffix in COMPRESSIBLE_SUFFIXES:
+            yield path
+
+
+def register_static_assets(app: Flask) -> None:
+    """Replace Flask's static view with the content-addressed one."""
+    app.view_functions["static"] = _serve_static
+
+
+__all__ = [
+    "COMPRESSIBLE_SUFFIXES",
+    "DEFAULT_CREST",
+    "ENCODINGS",
+    "IMMUTABLE_MAX_AGE",
+    "apply_cache_policy",
+    "file_digest",
+    "precompress_static",
+    "register_static_assets",
+    "static_digest",
+    "static_url",
+]
@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
+import copy
 import json
 import logging
 import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+from .metrics import STORE_PERSIST_SECONDS
 
 LOGGER = logging.getLogger(__name__)
 
 
 PathType = Union[str, "Path"]
+# Receives the new effective settings snapshot and the keys that changed.
+SettingsSubscriber = Callable[[Mapping[str, Any], FrozenSet[str]], None]
+_MISSING = object()
 
 
 class AlarmStore:
@@ -36,18 +43,34 @@ class AlarmStore:
 
     def update(self, payload: Dict[str, Any]) -> None:
         with self._lock:
-            payload = dict(payload)
-            payload["received_at"] = datetime.now(timezone.utc)
-            self._history.insert(0, dict(payload))
-            if len(self._history) > self._max_history:
-                self._history.pop()
-            incident_number = (payload.get("alarm") or {}).get("incident_number")
-            if incident_number:
-                self._incident_numbers.add(str(incident_number))
-            if self._alarm is None or self._is_newer(payload, self._alarm):
-                self._alarm = payload
+            self._insert_locked(payload, datetime.now(timezone.utc))
             self._persist_locked()
 
+    def update_many(self, payloads: List[Dict[str, Any]]) -> None:
+        """Store several alarms in one transaction with a single persist.
+
+        The result equals calling :meth:`update` for each payload in order.
+        """
+        if not payloads:
+            return
+        received_at = datetime.now(timezone.utc)
+        with self._lock:
+            for payload in payloads:
+                self._insert_locked(payload, received_at)
+            self._persist_locked()
+
+    def _insert_locked(self, payload: Dict[str, Any], received_at: datetime) -> None:
+        payload = dict(payload)
+        payload["received_at"] = received_at
+        self._history.insert(0, dict(payload))
+        if len(self._history) > self._max_history:
+            self._history.pop()
+        incident_number = (payload.get("alarm") or {}).get("incident_number")
+        if incident_number:
+            self._incident_numbers.add(str(incident_number))
+        if self._alarm is None or self._is_newer(payload, self._alarm):
+            self._alarm = payload
+
     def update_enrichment(
         self,
         incident_number: str,
@@ -55,18 +78,31 @@ class AlarmStore:
         weather: Optional[Dict[str, Any]],
     ) -> None:
         """Update coordinates and weather for an existing alarm entry by incident number."""
+        self.update_enrichment_many({incident_number: (coordinates, weather)})
+
+    def update_enrichment_many(
+        self,
+        enrichments: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+    ) -> None:
+        """Apply ``incident_number -> (coordinates, weather)`` with a single persist."""
+        if not enrichments:
+            return
         with self._lock:
             if self._alarm is not None:
                 alarm_inner = self._alarm.get("alarm")
-                if isinstance(alarm_inner, dict) and alarm_inner.get("incident_number") == incident_number:
+                if isinstance(alarm_inner, dict) and alarm_inner.get("incident_number") in enrichments:
+                    coordinates, weather = enrichments[alarm_inner["incident_number"]]
                     self._alarm["coordinates"] = coordinates
                     self._alarm["weather"] = weather
+            pending = set(enrichments)
             for entry in self._history:
-                alarm_inner = entry.get("alarm")
-                if isinstance(alarm_inner, dict) and alarm_inner.get("incident_number") == incident_number:
-                    entry["coordinates"] = coordinates
-                    entry["weather"] = weather
+                if not pending:
                     break
+                alarm_inner = entry.get("alarm")
+                if isinstance(alarm_inner, dict) and alarm_inner.get("incident_number") in pending:
+                    incident_number = alarm_inner["incident_number"]
+                    entry["coordinates"], entry["weather"] = enrichments[incident_number]
+                    pending.discard(incident_number)
             self._persist_locked()
 
     def latest(self) -> Optional[Dict[str, Any]]:
@@ -200,9 +236,10 @@ class AlarmStore:
 
         tmp_path = self._persistence_path.with_suffix(".tmp")
         try:
-            with tmp_path.open("w", encoding="utf-8") as handle:
-                json.dump(data, handle, ensure_ascii=False, indent=2)
-            tmp_path.replace(self._persistence_path)
+            with STORE_PERSIST_SECONDS.time("alarms"):
+                with tmp_path.open("w", encoding="utf-8") as handle:
+                    json.dump(data, handle, ensure_ascii=False, indent=2)
+                tmp_path.replace(self._persistence_path)
         except Exception as exc:  # pragma: no cover - defensive
             LOGGER.warning(
                 "Failed to persist alarm history to %s: %s",
@@ -234,16 +271,37 @@ class AlarmStore:
 
 
 class SettingsStore:
-    """Thread-safe storage for user-configurable settings with persistence."""
+    """Thread-safe storage for user-configurable settings with persistence.
+
+    Besides the raw stored values the store keeps the *effective* settings:
+    stored values merged over *defaults*, rebuilt only by :meth:`update`
+    and handed out as a read-only snapshot.  Readers on hot paths (alarm
+    requests, the ntfy and CEC threads) therefore never copy or lock.
+    Callbacks registered with :meth:`subscribe` learn which effective keys
+    changed right after an update.
+    """
 
-    def __init__(self, persistence_path: Optional[PathType] = None) -> None:
+    def __init__(
+        self,
+        persistence_path: Optional[PathType] = None,
+        defaults: Optional[Mapping[str, Any]] = None,
+    ) -> None:
         self._lock = threading.Lock()
         self._settings: Dict[str, Any] = {}
         self._persistence_path = Path(persistence_path) if persistence_path else None
+        self._defaults: Optional[Dict[str, Any]] = dict(defaults) if defaults is not None else None
+        self._version = 0
+        self._subscribers: List[SettingsSubscriber] = []
 
         if self._persistence_path is not None:
             self._persistence_path.parent.mkdir(parents=True, exist_ok=True)
             self._load_persisted_settings()
+        self._effective: Mapping[str, Any] = self._merge_locked()
+
+    @property
+    def version(self) -> int:
+        """Counter incremented whenever the effective settings change."""
+        return self._version
 
     def get_all(self) -> Dict[str, Any]:
         """Return all stored settings."""
@@ -255,11 +313,62 @@ class SettingsStore:
         with self._lock:
             return self._settings.get(key, default)
 
+    def effective(self) -> Mapping[str, Any]:
+        """Return the current read-only snapshot of the effective settings.
+
+        Without *defaults* the snapshot simply contains the stored values.
+        Nested lists belong to the snapshot and must not be modified.
+        """
+        return self._effective
+
+    def subscribe(self, callback: SettingsSubscriber) -> Callable[[], None]:
+        """Call *callback(snapshot, changed_keys)* after effective settings change.
+
+        Callbacks run on the updating thread after the lock is released and
+        should return quickly.  Returns a function that unsubscribes again.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return _unsubscribe
+
     def update(self, settings: Dict[str, Any]) -> None:
         """Update settings with new values."""
         with self._lock:
             self._settings.update(settings)
             self._persist_locked()
+            previous = self._effective
+            snapshot = self._merge_locked()
+            changed = frozenset(
+                key
+                for key in snapshot.keys() | previous.keys()
+                if snapshot.get(key, _MISSING) != previous.get(key, _MISSING)
+            )
+            if not changed:
+                return
+            self._effective = snapshot
+            self._version += 1
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot, changed)
+            except Exception:  # pragma: no cover - defensive
+                LOGGER.exception("Settings subscriber %r failed", callback)
+
+    def _merge_locked(self) -> Mapping[str, Any]:
+        if self._defaults is None:
+            merged = copy.deepcopy(self._settings)
+        else:
+            merged = {
+                key: copy.deepcopy(self._settings.get(key, default))
+                for key, default in self._defaults.items()
+            }
+        return MappingProxyType(merged)
 
     def _load_persisted_settings(self) -> None:
         if self._persistence_path is None:
@@ -285,9 +394,10 @@ class SettingsStore:
 
         tmp_path = self._persistence_path.with_suffix(".tmp")
         try:
-            with tmp_path.open("w", encoding="utf-8") as handle:
-                json.dump(self._settings, handle, ensure_ascii=False, indent=2)
-            tmp_path.replace(self._persistence_path)
+            with STORE_PERSIST_SECONDS.time("settings"):
+                with tmp_path.open("w", encoding="utf-8") as handle:
+                    json.dump(self._settings, handle, ensure_ascii=False, indent=2)
+                tmp_path.replace(self._persistence_path)
         except Exception as exc:  # pragma: no cover - defensive
             LOGGER.warning(
                 "Failed to persist settings to %s: %s",
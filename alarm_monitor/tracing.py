@@ -0,0 +1,163 @@
+"""End-to-end latency tracing for the alarm pipeline.
+
+Each accepted alarm gets an :class:`AlarmTrace` that records named spans as
+offsets (in seconds) from the moment ``POST /api/alarm`` accepted the request –
+through validation, storage, SSE fan-out, enrichment and finally the render
+beacon sent by the dashboards.  Traces are kept for a bounded number of recent
+incidents and each span is recorded only the first time it occurs, so kiosks
+that keep re-sending beacons neither grow memory nor displace earlier spans.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Pipeline stages in the order they normally occur.
+SPANS: Tuple[str, ...] = (
+    "received",
+    "validated",
+    "stored",
+    "sse_notified",
+    "geocoded",
+    "weather",
+    "enriched",
+    "rendered",
+)
+
+_MAX_INCIDENTS = 50
+_QUANTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+class AlarmTrace:
+    """Timing spans for a single incident, one offset per span name."""
+
+    def __init__(self, incident_number: str) -> None:
+        self.incident_number = incident_number
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.monotonic()
+        self._lock = threading.Lock()
+        self._spans: Dict[str, float] = {"received": 0.0}
+
+    def mark(self, span: str) -> None:
+        """Record *span* at the current time.
+
+        Unknown span names and repeats of an already recorded span are ignored.
+        """
+        if span not in SPANS:
+            return
+        offset = time.monotonic() - self._origin
+        with self._lock:
+            self._spans.setdefault(span, offset)
+
+    def first_offsets(self) -> Dict[str, float]:
+        """Return the offset of the first occurrence of every recorded span."""
+        with self._lock:
+            return dict(self._spans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [
+                {"span": span, "offset_seconds": round(offset, 6)}
+                for span, offset in self._spans.items()
+            ]
+        return {
+            "incident_number": self.incident_number,
+            "started_at": self.started_at.isoformat(),
+            "spans": spans,
+        }
+
+
+def _percentile(sorted_values: Sequence[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty sequence."""
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(quantile * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class AlarmTracer:
+    """Thread-safe registry of traces for the most recent incidents."""
+
+    def __init__(self, max_incidents: int = _MAX_INCIDENTS) -> None:
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, AlarmTrace]" = OrderedDict()
+        self._max_incidents = max(1, max_incidents)
+
+    def begin(self, incident_number: Any) -> AlarmTrace:
+        """Start a trace for an incoming alarm.
+
+        The trace is not visible until :meth:`commit` is called, so rejected
+        or duplicate alarms never show up in the registry.
+        """
+        return AlarmTrace(str(incident_number or ""))
+
+    def commit(self, trace: AlarmTrace) -> None:
+        """Register *trace* once its alarm has been stored."""
+        if not trace.incident_number:
+            return
+        with self._lock:
+            self._traces[trace.incident_number] = trace
+            self._traces.move_to_end(trace.incident_number)
+            while len(self._traces) > self._max_incidents:
+                self._traces.popitem(last=False)
+
+    def mark(self, incident_number: str, span: str) -> bool:
+        """Record *span* for a committed incident.  Returns False if unknown."""
+        with self._lock:
+            trace = self._traces.get(incident_number)
+        if trace is None:
+            return False
+        trace.mark(span)
+        return True
+
+    def get(self, incident_number: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            trace = self._traces.get(incident_number)
+        return trace.to_dict() if trace is not None else None
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Return all retained traces, newest first."""
+        with self._lock:
+            traces = list(self._traces.values())
+        return [trace.to_dict() for trace in reversed(traces)]
+
+    def percentiles(self) -> Dict[str, Dict[str, Any]]:
+        """Summarise the first-occurrence offset of each span across incidents."""
+        with self._lock:
+            traces = list(self._traces.values())
+        samples: Dict[str, List[float]] = {}
+        for trace in traces:
+            for span, offset in trace.first_offsets().items():
+                samples.setdefault(span, []).append(offset)
+
+        summary: Dict[str, Dict[str, Any]] = {}
+        for span in SPANS:
+            values = sorted(samples.get(span, []))
+            if not values:
+                continue
+            summary[span] = {
+                "count": len(values),
+                "sum": sum(values),
+                "quantiles": {q: _percentile(values, q) for q in _QUANTILES},
+            }
+        return summary
+
+    def render_metrics(self) -> List[str]:
+        """Prometheus summary lines for the retained incidents."""
+        name = "alarm_monitor_alarm_pipeline_seconds"
+        lines = [
+            f"# HELP {name} Offset of each pipeline stage from alarm receipt (recent incidents)",
+            f"# TYPE {name} summary",
+        ]
+        for span, stats in self.percentiles().items():
+            for quantile, value in stats["quantiles"].items():
+                lines.append(f'{name}{{span="{span}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{name}_sum{{span="{span}"}} {stats["sum"]:.6f}')
+            lines.append(f'{name}_count{{span="{span}"}} {stats["count"]}')
+        return lines
+
+
+__all__ = ["AlarmTrace", "AlarmTracer", "SPANS"]
@@ -9,6 +9,8 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from .metrics import track_outbound
+
 LOGGER = logging.getLogger(__name__)
 
 _local = threading.local()
@@ -47,12 +49,13 @@ def fetch_weather(
     LOGGER.debug(
         "Fetching weather for lat=%s lon=%s via %s", lat, lon, base_url
     )
-    response = _s.get(base_url, params=params, timeout=10)
-    if response.status_code != 200:
-        raise WeatherServiceError(
-            f"Weather API request failed with status {response.status_code}: {response.text}"
-        )
-    data = response.json()
+    with track_outbound("open-meteo"):
+        response = _s.get(base_url, params=params, timeout=10)
+        if response.status_code != 200:
+            raise WeatherServiceError(
+                f"Weather API request failed with status {response.status_code}: {response.text}"
+            )
+        data = response.json()
 
     current_raw = data.get("current_weather")
     if isinstance(current_raw, dict):
@@ -0,0 +1,1048 @@
+#!/usr/bin/env python3
+"""Load-test the alarm ingest and fan-out paths against local stub services.
+
+The benchmark starts :func:`alarm_monitor.app.create_app` on a real socket
+with Nominatim, open-meteo, DWD, ntfy and alarm-messenger replaced by a local
+stub server, drives the scenarios selected on the command line and writes the
+results as JSON so that runs from different commits can be compared::
+
+    python scripts/benchmark.py --output before.json
+    git checkout feature-branch
+    python scripts/benchmark.py --output after.json --compare before.json
+
+Latencies are reported in milliseconds (p50/p95/p99), throughput in requests
+per second.  RSS values are those of the benchmark process, which hosts both
+the application and the load generators.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urlparse
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from alarm_monitor.activation import activation_matcher  # noqa: E402
+from alarm_monitor.alarm_schema import ALARM_VALIDATOR  # noqa: E402
+from alarm_monitor.app import _executor, _limiter, create_app  # noqa: E402
+from alarm_monitor.calendar_service import download_calendar  # noqa: E402
+from alarm_monitor.config import AppConfig  # noqa: E402
+from alarm_monitor.road_graph import RoadGraph  # noqa: E402
+from alarm_monitor.route_geometry import compact_route, decode_polyline  # noqa: E402
+
+API_KEY = "benchmark-key"
+RESULT_FORMAT_VERSION = 1
+# Metrics compared by --compare; for all of them lower is better except
+# throughput.
+COMPARED_LATENCIES = ("p50", "p95", "p99")
+
+
+# ---------------------------------------------------------------------------
+# Statistics helpers
+# ---------------------------------------------------------------------------
+
+
+def percentile(sorted_values: Sequence[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(quantile * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarise_latencies(samples: Sequence[float]) -> Dict[str, float]:
+    """Return p50/p95/p99/max/mean of *samples* (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered) if ordered else 0.0
+    return {
+        "p50": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99": round(percentile(ordered, 0.99) * 1000, 3),
+        "max": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+        "mean": round(mean * 1000, 3),
+    }
+
+
+def rss_kib() -> Dict[str, int]:
+    """Current and peak resident set size of this process in KiB."""
+    current = 0
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1])
+                    break
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024  # macOS reports bytes
+    return {"rss_kib": current, "peak_rss_kib": int(peak)}
+
+
+@dataclass
+class Recorder:
+    """Thread-safe collection of latency samples and error counts."""
+
+    samples: List[float] = field(default_factory=list)
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def result(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self.samples)
+            errors = self.errors
+        return {
+            "requests": len(samples),
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": summarise_latencies(samples),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Stub upstream services
+# ---------------------------------------------------------------------------
+
+_STUB_PARTICIPANTS = {
+    "participants": [
+        {
+            "id": f"response-{index}",
+            "deviceId": f"device-{index}",
+            "platform": "android",
+            "respondedAt": "2026-01-01T12:00:00.000Z",
+            "responder": {"firstName": "Max", "lastName": f"Muster{index}"},
+        }
+        for index in range(8)
+    ]
+}
+
+_STUB_WEATHER = {
+    "current_weather": {
+        "temperature": 12.3,
+        "windspeed": 8.4,
+        "winddirection": 220,
+        "weathercode": 3,
+        "time": "2026-01-01T12:00",
+    },
+    "hourly": {
+        "time": ["2026-01-01T12:00"],
+        "precipitation": [0.0],
+        "precipitation_probability": [10],
+        "rain": [0.0],
+        "showers": [0.0],
+        "snowfall": [0.0],
+    },
+}
+
+
+@functools.lru_cache(maxsize=4)
+def calendar_feed(years: int) -> bytes:
+    """A multi-year iCal export as produced by typical group calendars.
+
+    One dated event per day for *years* years up to now plus one year ahead,
+    each with a folded description and a reminder, and a weekly drill given
+    as ``RRULE`` starting at the beginning of the export.
+    """
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    first = today - timedelta(days=365 * years)
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Benchmark//Export//DE"]
+    day = first
+    index = 0
+    while day < today + timedelta(days=365):
+        start = day + timedelta(hours=18 + index % 3)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:bench-{index}@example.org",
+            f"DTSTAMP:{first:%Y%m%dT%H%M%SZ}",
+            f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+            f"DTEND:{start + timedelta(hours=2):%Y%m%dT%H%M%SZ}",
+            f"SUMMARY:Dienst {index}",
+            "DESCRIPTION:Ausbildung Atemschutz und Technische Hilfeleistung\\, bitte",
+            " persönliche Schutzausrüstung mitbringen. Treffpunkt Gerätehaus.",
+            "LOCATION:Feuerwehrhaus\\, Musterstraße 1",
+            "BEGIN:VALARM",
+            "ACTION:DISPLAY",
+            "DESCRIPTION:Erinnerung",
+            "TRIGGER:-PT1H",
+            "END:VALARM",
+            "END:VEVENT",
+        ]
+        day += timedelta(days=1)
+        index += 1
+    lines += [
+        "BEGIN:VEVENT",
+        "UID:bench-weekly@example.org",
+        f"DTSTART:{first + timedelta(hours=19):%Y%m%dT%H%M%SZ}",
+        f"DTEND:{first + timedelta(hours=21):%Y%m%dT%H%M%SZ}",
+        "SUMMARY:Übungsabend",
+        "RRULE:FREQ=WEEKLY",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+def road_grid(size: int) -> RoadGraph:
+    """A *size* x *size* street grid with 100 m blocks and mixed speeds.
+
+    Every fifth street is a 100 km/h through road, the rest are 30 km/h
+    residential streets, so A* has to trade distance against speed.
+    """
+    step = 0.0009  # ~100 m in latitude
+    nodes = [(50.0 + row * step, 9.0 + col * step * 1.55) for row in range(size) for col in range(size)]
+    edges = []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            for neighbour, name, fast in (
+                (node + 1 if col + 1 < size else None, f"Straße {row}", row % 5 == 0),
+                (node + size if row + 1 < size else None, f"Weg {col}", col % 5 == 0),
+            ):
+                if neighbour is None:
+                    continue
+                duration = 100.0 / ((100 if fast else 30) / 3.6)
+                edges.append((node, neighbour, duration, 100.0, name, ()))
+                edges.append((neighbour, node, duration, 100.0, name, ()))
+    return RoadGraph.from_edges(nodes, edges)
+
+
+def ors_route(kilometers: int) -> Dict[str, Any]:
+    """An OpenRouteService-style response for a winding *kilometers* km route.
+
+    Geometry has a point every ~12 m with centimetre GPS noise, like rural
+    roads in ORS output, and a turn instruction every kilometre.
+    """
+    points = kilometers * 80
+    coordinates = [
+        [
+            round(9.0 + index * 0.00012 + 0.0004 * math.sin(index / 25), 6),
+            round(50.0 + 0.003 * math.sin(index / 60) + 0.0000003 * (index % 7), 6),
+        ]
+        for index in range(points)
+    ]
+    steps = [
+        {
+            "distance": 1000.0,
+            "duration": 60.0,
+            "type": 1,
+            "instruction": f"Rechts abbiegen auf Kreisstraße {index}",
+            "name": f"Kreisstraße {index}",
+            "way_points": [index * 80, min((index + 1) * 80, points - 1)],
+        }
+        for index in range(kilometers)
+    ]
+    summary = {"distance": kilometers * 1000.0, "duration": kilometers * 60.0}
+    return {
+        "bbox": [9.0, 50.0, 9.2, 50.1],
+        "routes": [{
+            "summary": summary,
+            "segments": [dict(summary, steps=steps)],
+            "bbox": [9.0, 50.0, 9.2, 50.1],
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+            "way_points": [0, points - 1],
+        }],
+        "metadata": {
+            "attribution": "openrouteservice.org | OpenStreetMap contributors",
+            "service": "routing",
+            "timestamp": 0,
+            "query": {"coordinates": [coordinates[0], coordinates[-1]], "profile": "driving-car"},
+            "engine": {"version": "8.0.0", "build_date": "2024-01-01T00:00:00Z"},
+        },
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serve canned responses for every upstream integration by path prefix."""
+
+    protocol_version = "HTTP/1.1"
+    latency_seconds = 0.0
+    calendar_years = 5
+
+    def log_message(self, *_args: Any) -> None:  # pragma: no cover - silence
+        return
+
+    def _send_json(self, payload: Any, content_type: str = "application/json") -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        path = urlparse(self.path).path
+        if path.startswith("/nominatim"):
+            self._send_json([{"lat": "51.2345", "lon": "9.8765"}])
+        elif path.startswith("/weather"):
+            self._send_json(_STUB_WEATHER)
+        elif path.startswith("/dwd"):
+            self._send_json({"warnings": {}, "vorabInformation": {}})
+        elif path.startswith("/ntfy/"):
+            self._send_json(b"", content_type="application/x-ndjson")
+        elif path == "/messenger/api/emergencies":
+            self._send_json({"data": [{"id": "emergency-uuid"}], "pagination": {}})
+        elif path.startswith("/messenger/api/emergencies/"):
+            self._send_json(_STUB_PARTICIPANTS)
+        elif path == "/calendar.ics":
+            self._send_json(calendar_feed(self.calendar_years), content_type="text/calendar")
+        else:
+            self.send_error(404)
+
+
+class StubServices:
+    """Threaded HTTP server standing in for all external integrations."""
+
+    def __init__(self, latency_seconds: float = 0.0, calendar_years: int = 5) -> None:
+        handler = type(
+            "_Handler",
+            (_StubHandler,),
+            {"latency_seconds": latency_seconds, "calendar_years": calendar_years},
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Application under test
+# ---------------------------------------------------------------------------
+
+
+class BenchmarkContext:
+    """Runs the Flask app on a local port wired to :class:`StubServices`."""
+
+    def __init__(
+        self,
+        workdir: Path,
+        stubs: StubServices,
+        rate_limits: bool = False,
+        verbose: bool = False,
+    ) -> None:
+        self.workdir = workdir
+        self.stubs = stubs
+        config = AppConfig(
+            api_key=API_KEY,
+            settings_password="benchmark-password",
+            history_file=str(workdir / "history.json"),
+            settings_file=str(workdir / "settings.json"),
+            messages_file=str(workdir / "messages.json"),
+            nominatim_base_url=f"{stubs.base_url}/nominatim",
+            weather_base_url=f"{stubs.base_url}/weather",
+            dwd_warnings_url=f"{stubs.base_url}/dwd/warnings.json",
+            ntfy_topic_url=f"{stubs.base_url}/ntfy/benchmark",
+            messenger_server_url=f"{stubs.base_url}/messenger",
+            messenger_api_key="benchmark-messenger-key",
+            default_latitude=51.0,
+            default_longitude=9.0,
+            default_location_name="Benchmark",
+        )
+        self._limiter_was_enabled = _limiter.enabled
+        if not verbose:
+            for name in ("alarm_monitor", "werkzeug"):
+                logging.getLogger(name).setLevel(logging.WARNING)
+        self.app = create_app(config)
+        _limiter.enabled = rate_limits
+        self._server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def drain(self, timeout: float = 60.0) -> float:
+        """Wait until queued background enrichment has finished.
+
+        One barrier task per worker is queued behind the existing work; they
+        can only meet once every worker is free.  Returns the seconds waited.
+        """
+        workers = _executor._max_workers
+        barrier = threading.Barrier(workers + 1, timeout=timeout)
+        started = time.perf_counter()
+        for _ in range(workers):
+            _executor.submit(barrier.wait)
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        return time.perf_counter() - started
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        poller = self.app.config.get("NTFY_POLLER")
+        if poller is not None:
+            poller.stop()
+        _limiter.enabled = self._limiter_was_enabled
+
+    def post_alarm(self, session: requests.Session, incident_number: str) -> requests.Response:
+        return session.post(
+            f"{self.base_url}/api/alarm",
+            json=alarm_payload(incident_number),
+            headers={"X-API-Key": API_KEY},
+            timeout=30,
+        )
+
+
+def alarm_payload(incident_number: str) -> Dict[str, Any]:
+    return {
+        "incident_number": incident_number,
+        "keyword": "F3Y",
+        "subject": "Benchmark",
+        "location": f"Musterstraße {incident_number[-3:]}, Musterstadt",
+        "groups": ["LF20-MST"],
+    }
+
+
+def _incident_numbers(prefix: str) -> Iterator[str]:
+    run = uuid.uuid4().hex[:8]
+    counter = 0
+    while True:
+        counter += 1
+        yield f"{prefix}{run}{counter:05d}"
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+ScenarioFn = Callable[[BenchmarkContext, argparse.Namespace], Dict[str, Any]]
+SCENARIOS: Dict[str, ScenarioFn] = {}
+
+
+def scenario(name: str) -> Callable[[ScenarioFn], ScenarioFn]:
+    """Register a benchmark scenario under *name*."""
+
+    def decorator(func: ScenarioFn) -> ScenarioFn:
+        SCENARIOS[name] = func
+        return func
+
+    return decorator
+
+
+@scenario("ingest")
+def run_ingest(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Burst of concurrent ``POST /api/alarm`` requests."""
+    recorder = Recorder()
+    numbers = _incident_numbers("I")
+    numbers_lock = threading.Lock()
+    local = threading.local()
+
+    def _post(_: int) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        with numbers_lock:
+            incident_number = next(numbers)
+        start = time.perf_counter()
+        try:
+            response = ctx.post_alarm(session, incident_number)
+        except requests.RequestException:
+            recorder.error()
+            return
+        recorder.add(time.perf_counter() - start)
+        if response.status_code != 200:
+            recorder.error()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(_post, range(args.alarms)))
+    result = recorder.result(time.perf_counter() - started)
+    result["enrichment_drain_seconds"] = round(ctx.drain(), 3)
+    return result
+
+
+class _SseSubscriber(threading.Thread):
+    """Background SSE client recording when each incident first arrives.
+
+    A plain socket is used instead of ``requests`` so that :meth:`close` can
+    unblock the reader from another thread via ``shutdown()``.  Chunk-size
+    lines of the chunked transfer encoding simply never start with ``data:``.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        super().__init__(daemon=True)
+        parsed = urlparse(base_url)
+        self._address = (parsed.hostname or "127.0.0.1", parsed.port or 80)
+        self.connected = threading.Event()
+        self.arrivals: Dict[str, float] = {}
+        self.arrived = threading.Condition()
+        self._sock: Optional[socket.socket] = None
+
+    def run(self) -> None:
+        try:
+            self._sock = socket.create_connection(self._address, timeout=120)
+            self._sock.sendall(
+                b"GET /api/stream HTTP/1.1\r\nHost: benchmark\r\nAccept: text/event-stream\r\n\r\n"
+            )
+            for raw in self._sock.makefile("rb"):
+                line = raw.decode("utf-8", "replace").strip()
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                if event.get("type") == "connected":
+                    self.connected.set()
+                    continue
+                alarm = event.get("alarm") or {}
+                incident_number = alarm.get("incident_number")
+                if event.get("type") == "alarm" and incident_number:
+                    with self.arrived:
+                        self.arrivals.setdefault(incident_number, time.perf_counter())
+                        self.arrived.notify_all()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.connected.set()
+
+    def wait_for(self, incident_number: str, timeout: float) -> Optional[float]:
+        deadline = time.monotonic() + timeout
+        with self.arrived:
+            while incident_number not in self.arrivals:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.arrived.wait(remaining)
+            return self.arrivals[incident_number]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+
+
+@scenario("fanout")
+def run_fanout(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Time from ``POST /api/alarm`` until every SSE subscriber sees the alarm."""
+    subscribers = [_SseSubscriber(ctx.base_url) for _ in range(args.subscribers)]
+    for subscriber in subscribers:
+        subscriber.start()
+    for subscriber in subscribers:
+        subscriber.connected.wait(timeout=10)
+
+    recorder = Recorder()
+    session = requests.Session()
+    numbers = _incident_numbers("F")
+    started = time.perf_counter()
+    try:
+        for _ in range(args.fanout_alarms):
+            incident_number = next(numbers)
+            sent = time.perf_counter()
+            try:
+                ctx.post_alarm(session, incident_number)
+            except requests.RequestException:
+                recorder.error()
+                continue
+            for subscriber in subscribers:
+                arrived = subscriber.wait_for(incident_number, timeout=10)
+                if arrived is None:
+                    recorder.error()
+                else:
+                    recorder.add(arrived - sent)
+    finally:
+        for subscriber in subscribers:
+            subscriber.close()
+    result = recorder.result(time.perf_counter() - started)
+    result["subscribers"] = args.subscribers
+    return result
+
+
+@scenario("polling")
+def run_polling(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Concurrent ``GET /api/alarm`` pollers while alarms keep arriving."""
+    recorder = Recorder()
+    stop = threading.Event()
+
+    def _poll() -> None:
+        session = requests.Session()
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                response = session.get(f"{ctx.base_url}/api/alarm", timeout=30)
+            except requests.RequestException:
+                recorder.error()
+                continue
+            recorder.add(time.perf_counter() - start)
+            if response.status_code != 200:
+                recorder.error()
+
+    def _ingest() -> None:
+        session = requests.Session()
+        numbers = _incident_numbers("P")
+        while not stop.wait(1.0):
+            try:
+                ctx.post_alarm(session, next(numbers))
+            except requests.RequestException:
+                pass
+
+    threads = [threading.Thread(target=_poll, daemon=True) for _ in range(args.pollers)]
+    threads.append(threading.Thread(target=_ingest, daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    result = recorder.result(time.perf_counter() - started)
+    result["pollers"] = args.pollers
+    return result
+
+
+@scenario("calendar")
+def run_calendar(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Download and parse a multi-year iCal export, as the calendar cache does.
+
+    The first download builds the event index from scratch and is reported
+    as ``cold_ms``; the timed downloads reuse the previous index like the
+    cache's periodic refreshes do.
+    """
+    url = f"{ctx.stubs.base_url}/calendar.ics"
+    cold_started = time.perf_counter()
+    download = download_calendar(url)
+    cold_ms = (time.perf_counter() - cold_started) * 1000
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    for _ in range(args.calendar_fetches):
+        start = time.perf_counter()
+        try:
+            download = download_calendar(url, index=download.index)
+        except requests.RequestException:
+            recorder.error()
+            continue
+        recorder.add(time.perf_counter() - start)
+    result = recorder.result(time.perf_counter() - started)
+
+    # Allocation peak of a single cold fetch, measured outside the timed
+    # loop because tracing slows allocation-heavy code considerably.
+    tracemalloc.start()
+    try:
+        download_calendar(url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result["feed_bytes"] = len(calendar_feed(args.calendar_years))
+    result["events_in_window"] = len(download.events)
+    result["reused_events"] = download.index.reused if download.index else 0
+    result["cold_ms"] = round(cold_ms, 3)
+    result["parse_peak_kib"] = peak // 1024
+    return result
+
+
+@scenario("routing")
+def run_routing(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Answer station-to-incident queries from the offline road graph.
+
+    The synthetic grid is contracted, saved and loaded like a real graph
+    file built by ``scripts/build_road_graph.py``; contraction and loading
+    are reported as ``contract_seconds`` and ``load_ms``.  Queries start at a
+    fixed "station" near one corner and end at pseudo-random nodes across
+    the grid.
+    """
+    path = ctx.workdir / "road_graph.json.gz"
+    grid = road_grid(args.road_grid)
+    contract_started = time.perf_counter()
+    grid.contract()
+    contract_seconds = time.perf_counter() - contract_started
+    grid.save(path)
+    load_started = time.perf_counter()
+    graph = RoadGraph.load(path)
+    load_ms = (time.perf_counter() - load_started) * 1000
+
+    step = 0.0009
+    station = (50.0 + 3 * step, 9.0 + 3 * step * 1.55)
+    recorder = Recorder()
+    started = time.perf_counter()
+    for query in range(args.route_queries):
+        row = (query * 7919) % args.road_grid
+        col = (query * 104729) % args.road_grid
+        start = time.perf_counter()
+        route = graph.route(station[0], station[1], 50.0 + row * step, 9.0 + col * step * 1.55)
+        if route is None:
+            recorder.error()
+            continue
+        recorder.add(time.perf_counter() - start)
+    result = recorder.result(time.perf_counter() - started)
+    result["nodes"] = graph.node_count
+    result["edges"] = graph.edge_count
+    result["graph_bytes"] = path.stat().st_size
+    result["contract_seconds"] = round(contract_seconds, 2)
+    result["load_ms"] = round(load_ms, 3)
+    return result
+
+
+@scenario("route_payload")
+def run_route_payload(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Compact a 25 km directions response as ``/api/route`` does.
+
+    The timed operation is :func:`compact_route` with polyline output.  The
+    result also lists the payload size and the time to parse it (JSON plus
+    polyline decoding, as a stand-in for the browser) before and after.
+    """
+    raw = ors_route(25)
+    recorder = Recorder()
+    started = time.perf_counter()
+    for _ in range(args.route_queries):
+        start = time.perf_counter()
+        compact_route(raw, encoded=True)
+        recorder.add(time.perf_counter() - start)
+    result = recorder.result(time.perf_counter() - started)
+
+    raw_body = json.dumps(raw, separators=(",", ":"))
+    compact_body = json.dumps(compact_route(raw), separators=(",", ":"))
+    polyline_body = json.dumps(compact_route(raw, encoded=True), separators=(",", ":"))
+
+    def _parse_ms(body: str) -> float:
+        start = time.perf_counter()
+        for _ in range(20):
+            geometry = json.loads(body)["routes"][0]["geometry"]
+            if isinstance(geometry, str):
+                decode_polyline(geometry)
+        return (time.perf_counter() - start) * 1000 / 20
+
+    result["points_raw"] = len(raw["routes"][0]["geometry"]["coordinates"])
+    result["points_compact"] = len(json.loads(compact_body)["routes"][0]["geometry"]["coordinates"])
+    result["raw_bytes"] = len(raw_body)
+    result["compact_bytes"] = len(compact_body)
+    result["polyline_bytes"] = len(polyline_body)
+    result["raw_parse_ms"] = round(_parse_ms(raw_body), 3)
+    result["polyline_parse_ms"] = round(_parse_ms(polyline_body), 3)
+    return result
+
+
+def _naive_activation_match(groups: Sequence[str], alarm: Dict[str, Any]) -> bool:
+    """The filter loop ``process_alarm`` used before the compiled matcher."""
+    codes = {code.upper() for code in alarm.get("dispatch_group_codes") or [] if isinstance(code, str)}
+    texts = [str(item).upper() for item in alarm.get("dispatch_groups") or []]
+    for target in groups:
+        target_upper = target.upper()
+        if target_upper in codes or any(target_upper in text for text in texts):
+            return True
+    return False
+
+
+@scenario("activation")
+def run_activation(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Filter alarms against a large list of AAO activation groups.
+
+    The timed operation is the compiled matcher of ``process_alarm``
+    (including the cache lookup per alarm).  ``naive_mean_us`` is the mean
+    of the previous filters × texts substring loop on the same alarms; every
+    fourth alarm is addressed to a configured group.
+    """
+    groups = [f"FF Ort {index:03d} LZ" for index in range(args.activation_groups)]
+    alarms = []
+    for index in range(200):
+        target = groups[(index * 37) % len(groups)] if index % 4 == 0 else f"RD Wache {index}"
+        alarms.append({
+            "dispatch_group_codes": [f"RD{index:04d}", f"KBM{index % 7}"],
+            "dispatch_groups": [f"Leitstelle Kreis; {target}", "Rettungsdienst Nord", "KBM Bereich 2"],
+        })
+
+    recorder = Recorder()
+    for alarm in alarms:
+        if activation_matcher(groups).matches(alarm) != _naive_activation_match(groups, alarm):
+            recorder.error()
+    started = time.perf_counter()
+    for _ in range(10):
+        for alarm in alarms:
+            start = time.perf_counter()
+            activation_matcher(groups).matches(alarm)
+            recorder.add(time.perf_counter() - start)
+    result = recorder.result(time.perf_counter() - started)
+
+    naive_started = time.perf_counter()
+    for alarm in alarms:
+        _naive_activation_match(groups, alarm)
+    result["naive_mean_us"] = round((time.perf_counter() - naive_started) * 1e6 / len(alarms), 1)
+    result["groups"] = len(groups)
+    return result
+
+
+@scenario("validation")
+def run_validation(ctx: BenchmarkContext, args: argparse.Namespace) -> Dict[str, Any]:
+    """Validate alarm payloads as every ``POST /api/alarm`` (and retry) does.
+
+    Payloads are full alarm-mail messages; every tenth one is invalid in
+    several fields, so collecting all errors is part of the measurement.
+    """
+    valid = {
+        "incident_number": "2024-000123",
+        "keyword": "F3Y",
+        "keyword_secondary": "Person in Gefahr",
+        "subject": "Alarm",
+        "location": "Hauptstraße 1, 36037 Fulda",
+        "diagnosis": "Wohnungsbrand, Personen vermisst",
+        "remark": "Zufahrt über Hinterhof",
+        "timestamp": "2024-05-01T12:00:00+02:00",
+        "timestamp_display": "01.05.2024 12:00",
+        "groups": ["FF Fulda", "RD Fulda"],
+        "aao_groups": [f"AAO {index}" for index in range(8)],
+        "dispatch_group_codes": [f"WIL{index:02d}" for index in range(12)],
+        "dispatch_groups": [f"FF Ort {index} LZ" for index in range(12)],
+        "latitude": 50.55,
+        "longitude": 9.68,
+        "location_details": {"street": "Hauptstraße", "house_number": "1", "city": "Fulda"},
+    }
+    invalid = dict(valid, keyword=5, latitude=95, aao_groups=["ok", 1], longitude=None)
+    payloads = [invalid if index % 10 == 0 else valid for index in range(100)]
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    for _ in range(max(1, args.validations // len(payloads))):
+        for payload in payloads:
+            start = time.perf_counter()
+            ALARM_VALIDATOR.errors(payload)
+            recorder.add(time.perf_counter() - start)
+    result = recorder.result(time.perf_counter() - started)
+    result["invalid_share"] = 0.1
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every selected scenario against a fresh app and return the report."""
+    report: Dict[str, Any] = {
+        "format_version": RESULT_FORMAT_VERSION,
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "parameters": {
+                "alarms": args.alarms,
+                "concurrency": args.concurrency,
+                "subscribers": args.subscribers,
+                "fanout_alarms": args.fanout_alarms,
+                "pollers": args.pollers,
+                "duration": args.duration,
+                "calendar_years": args.calendar_years,
+                "calendar_fetches": args.calendar_fetches,
+                "road_grid": args.road_grid,
+                "route_queries": args.route_queries,
+                "activation_groups": args.activation_groups,
+                "validations": args.validations,
+                "stub_latency_ms": args.stub_latency_ms,
+            },
+        },
+        "scenarios": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        stubs = StubServices(
+            latency_seconds=args.stub_latency_ms / 1000.0,
+            calendar_years=args.calendar_years,
+        )
+        stubs.start()
+        with tempfile.TemporaryDirectory(prefix="alarm-monitor-bench-") as tmp:
+            ctx = BenchmarkContext(
+                Path(tmp), stubs, rate_limits=args.rate_limits, verbose=args.verbose
+            )
+            ctx.start()
+            try:
+                rss_before = rss_kib()
+                result = SCENARIOS[name](ctx, args)
+                rss_after = rss_kib()
+            finally:
+                ctx.drain()
+                ctx.stop()
+                stubs.stop()
+        result["rss_kib_before"] = rss_before["rss_kib"]
+        result["rss_kib_after"] = rss_after["rss_kib"]
+        result["peak_rss_kib"] = rss_after["peak_rss_kib"]
+        report["scenarios"][name] = result
+        print(_format_result(name, result), flush=True)
+    return report
+
+
+def _format_result(name: str, result: Dict[str, Any]) -> str:
+    latency = result["latency_ms"]
+    return (
+        f"{name:<10} n={result['requests']:<6} err={result['errors']:<4} "
+        f"p50={latency['p50']:.2f}ms p95={latency['p95']:.2f}ms p99={latency['p99']:.2f}ms "
+        f"rps={result['throughput_rps']:.1f} rss={result['rss_kib_after']}KiB"
+    )
+
+
+def compare_reports(
+    baseline: Dict[str, Any], current: Dict[str, Any], max_regression_pct: float
+) -> List[str]:
+    """Return human readable regressions of *current* against *baseline*.
+
+    A latency percentile regresses when it grew by more than
+    *max_regression_pct* percent; throughput regresses when it dropped by
+    more than that.  Scenarios missing from either report are skipped.
+    """
+    regressions: List[str] = []
+    for name, result in current.get("scenarios", {}).items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        checks = [
+            (f"latency {key}", previous["latency_ms"][key], result["latency_ms"][key], False)
+            for key in COMPARED_LATENCIES
+        ]
+        checks.append(("throughput", previous["throughput_rps"], result["throughput_rps"], True))
+        for label, old, new, higher_is_better in checks:
+            if not old:
+                continue
+            change_pct = (new - old) / old * 100.0
+            worse = -change_pct if higher_is_better else change_pct
+            marker = "REGRESSION" if worse > max_regression_pct else "ok"
+            line = f"{name:<10} {label:<12} {old:>10.2f} -> {new:>10.2f} ({change_pct:+.1f}%) {marker}"
+            print(line)
+            if worse > max_regression_pct:
+                regressions.append(line)
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run (repeatable, default: all)",
+    )
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON report to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=20.0,
+        help="percent a metric may worsen before --compare fails (default: 20)",
+    )
+    parser.add_argument("--alarms", type=int, default=200, help="alarms per ingest burst")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent ingest clients")
+    parser.add_argument("--subscribers", type=int, default=15, help="SSE subscribers (max 20)")
+    parser.add_argument("--fanout-alarms", type=int, default=30, help="alarms sent in the fanout scenario")
+    parser.add_argument("--pollers", type=int, default=10, help="concurrent GET /api/alarm clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds the polling scenario runs")
+    parser.add_argument(
+        "--calendar-years", type=int, default=5, help="years of history in the calendar feed"
+    )
+    parser.add_argument(
+        "--calendar-fetches", type=int, default=20, help="feed downloads in the calendar scenario"
+    )
+    parser.add_argument(
+        "--road-grid", type=int, default=100, help="streets per side of the routing grid"
+    )
+    parser.add_argument(
+        "--route-queries",
+        type=int,
+        default=200,
+        help="queries in the routing scenario and compactions in route_payload",
+    )
+    parser.add_argument(
+        "--activation-groups",
+        type=int,
+        default=500,
+        help="configured activation groups in the activation scenario",
+    )
+    parser.add_argument(
+        "--validations", type=int, default=20000, help="payloads checked in the validation scenario"
+    )
+    parser.add_argument(
+        "--stub-latency-ms",
+        type=float,
+        default=0.0,
+        help="artificial latency added to every stub upstream response",
+    )
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="keep Flask-Limiter enabled (disabled by default so bursts are not throttled)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="keep the application's INFO logging")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Flask-Limiter warns about in-memory storage on every create_app().
+    warnings.filterwarnings("ignore", category=UserWarning, module="flask_limiter")
+    report = run_benchmarks(args)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.max_regression:.0f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("ALARM_MONITOR_JSON_LOGGING", "false")
+    sys.exit(main())
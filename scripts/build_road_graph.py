@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Build the offline routing graph from an OpenStreetMap XML extract.
+
+The extract should cover the district plus a margin around it, e.g. cut from a
+Geofabrik download with osmium::
+
+    osmium extract -b 9.0,50.7,9.8,51.2 hessen-latest.osm.pbf -o district.osm
+    python scripts/build_road_graph.py district.osm instance/road_graph.json.gz
+
+Plain, ``.gz`` and ``.bz2`` compressed ``.osm`` files are accepted.  Only
+roads usable by emergency vehicles are kept; chains of way nodes between two
+junctions are collapsed into a single edge whose intermediate points are
+stored as shape geometry, which keeps the graph small enough for a Raspberry
+Pi.  The contraction hierarchy for fast queries is computed here as well
+(``--no-contract`` skips it; queries then fall back to A*).  Point
+``ALARM_MONITOR_ROAD_GRAPH_FILE`` at the output file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import gzip
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from alarm_monitor.road_graph import Edge, RoadGraph, haversine_m  # noqa: E402
+
+# Default speeds in km/h by highway class when no usable maxspeed is tagged.
+HIGHWAY_SPEEDS: Dict[str, float] = {
+    "motorway": 120,
+    "motorway_link": 60,
+    "trunk": 100,
+    "trunk_link": 50,
+    "primary": 80,
+    "primary_link": 50,
+    "secondary": 70,
+    "secondary_link": 50,
+    "tertiary": 60,
+    "tertiary_link": 40,
+    "unclassified": 50,
+    "residential": 30,
+    "living_street": 10,
+    "service": 20,
+    "track": 15,
+}
+_MAXSPEED_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(mph)?\s*$")
+
+
+@dataclass
+class Way:
+    node_ids: List[int]
+    speed_kmh: float
+    forward: bool
+    backward: bool
+    name: str
+
+
+def open_extract(path: Path) -> IO[bytes]:
+    """Open an OSM XML file, transparently decompressing .gz and .bz2."""
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def way_speed(tags: Dict[str, str]) -> Optional[float]:
+    """Return the travel speed in km/h, or None if the way is not drivable."""
+    highway = tags.get("highway")
+    if highway not in HIGHWAY_SPEEDS:
+        return None
+    if tags.get("access") in {"no", "private"} and highway != "service":
+        return None
+    speed = HIGHWAY_SPEEDS[highway]
+    match = _MAXSPEED_RE.match(tags.get("maxspeed", ""))
+    if match:
+        tagged = float(match.group(1)) * (1.609 if match.group(2) else 1.0)
+        if tagged > 0:
+            speed = tagged
+    return speed
+
+
+def way_directions(tags: Dict[str, str]) -> Tuple[bool, bool]:
+    """Return ``(forward, backward)`` drivability of a way."""
+    oneway = tags.get("oneway", "")
+    if oneway in {"yes", "true", "1"}:
+        return True, False
+    if oneway == "-1":
+        return False, True
+    if oneway == "no":
+        return True, True
+    if tags.get("junction") in {"roundabout", "circular"} or tags.get("highway") == "motorway":
+        return True, False
+    return True, True
+
+
+def parse_osm(stream: IO[bytes]) -> Tuple[Dict[int, Tuple[float, float]], List[Way]]:
+    """Read node coordinates and drivable ways from an OSM XML stream."""
+    nodes: Dict[int, Tuple[float, float]] = {}
+    ways: List[Way] = []
+    for _, element in ET.iterparse(stream, events=("end",)):
+        if element.tag == "node":
+            nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+        elif element.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+            speed = way_speed(tags)
+            if speed is not None:
+                forward, backward = way_directions(tags)
+                ways.append(Way(
+                    node_ids=[int(nd.get("ref")) for nd in element.iter("nd")],
+                    speed_kmh=speed,
+                    forward=forward,
+                    backward=backward,
+                    name=tags.get("name") or tags.get("ref") or "",
+                ))
+        elif element.tag in {"relation", "tag", "nd", "member"}:
+            continue
+        element.clear()
+    return nodes, ways
+
+
+def build_graph(nodes: Dict[int, Tuple[float, float]], ways: Sequence[Way]) -> RoadGraph:
+    """Collapse the ways into a junction graph."""
+    usage: Dict[int, int] = {}
+    for way in ways:
+        for position, node_id in enumerate(way.node_ids):
+            # Way endpoints always become junctions.
+            endpoint = position in (0, len(way.node_ids) - 1)
+            usage[node_id] = usage.get(node_id, 0) + (2 if endpoint else 1)
+
+    index: Dict[int, int] = {}
+    coordinates: List[Tuple[float, float]] = []
+    edges: List[Edge] = []
+
+    def _junction(node_id: int) -> int:
+        if node_id not in index:
+            index[node_id] = len(coordinates)
+            coordinates.append(nodes[node_id])
+        return index[node_id]
+
+    for way in ways:
+        node_ids = [node_id for node_id in way.node_ids if node_id in nodes]
+        if len(node_ids) < 2:
+            continue
+        speed_ms = way.speed_kmh / 3.6
+        start = 0
+        for position in range(1, len(node_ids)):
+            if position != len(node_ids) - 1 and usage.get(node_ids[position], 0) < 2:
+                continue
+            chain = [nodes[node_id] for node_id in node_ids[start:position + 1]]
+            distance = sum(
+                haversine_m(a[0], a[1], b[0], b[1]) for a, b in zip(chain, chain[1:])
+            )
+            duration = distance / speed_ms
+            source = _junction(node_ids[start])
+            target = _junction(node_ids[position])
+            shape = chain[1:-1]
+            if way.forward:
+                edges.append((source, target, duration, distance, way.name, shape))
+            if way.backward:
+                edges.append((target, source, duration, distance, way.name, shape[::-1]))
+            start = position
+
+    return RoadGraph.from_edges(coordinates, edges)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("extract", type=Path, help="OSM XML extract (.osm, .osm.gz, .osm.bz2)")
+    parser.add_argument("output", type=Path, help="graph file to write (.json.gz)")
+    parser.add_argument(
+        "--no-contract",
+        action="store_true",
+        help="skip the contraction hierarchy (faster build, slower queries)",
+    )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    with open_extract(args.extract) as stream:
+        nodes, ways = parse_osm(stream)
+    graph = build_graph(nodes, ways)
+    if not args.no_contract:
+        graph.contract()
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    graph.save(args.output)
+    print(
+        f"Wrote {args.output}: {graph.node_count} junctions, {graph.edge_count} edges "
+        f"from {len(ways)} ways in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -90,6 +90,7 @@ SCREENSHOT_SETTINGS: dict[str, Any] = {
         "https://calendar.google.com/calendar/ical/example%40group.calendar.google.com/private-abc123/basic.ics",
     ],
     "ntfy_topic_url": "https://ntfy.sh/musterstadt-fw",
+    "ntfy_mode": "stream",
     "ntfy_poll_interval": 60,
     "message_default_ttl_minutes": 60,
 }
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Precompress static assets into .br/.gz variants served by the app.
+
+Run after changing files in alarm_monitor/static/ (the Docker build runs it
+automatically).  Brotli variants need the ``brotli`` package from
+requirements.txt; without it only gzip variants are written.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from alarm_monitor.static_assets import precompress_static  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "static_dir",
+        nargs="?",
+        type=Path,
+        default=ROOT / "alarm_monitor" / "static",
+        help="static directory to process (default: alarm_monitor/static)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    stats = precompress_static(args.static_dir)
+    print(
+        f"{stats['written']} variant(s) written, {stats['up_to_date']} up to date, "
+        f"{stats['not_worth_it']} skipped"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Tests for the compiled activation-group matcher."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from alarm_monitor.activation import ActivationMatcher, activation_matcher
+from alarm_monitor.alarm_processor import process_alarm
+
+
+def _naive_matches(groups, alarm) -> bool:
+    codes = {code.upper() for code in alarm.get("dispatch_group_codes") or [] if isinstance(code, str)}
+    dispatch_groups = alarm.get("dispatch_groups")
+    if isinstance(dispatch_groups, list):
+        texts = [str(item).upper() for item in dispatch_groups]
+    elif isinstance(dispatch_groups, str):
+        texts = [dispatch_groups.upper()]
+    else:
+        texts = []
+    return any(
+        group.upper() in codes or any(group.upper() in text for text in texts)
+        for group in groups
+    )
+
+
+def test_matches_codes_and_substrings_case_insensitively() -> None:
+    matcher = ActivationMatcher(["wil26", "FF Musterstadt", "HER", "SHE"])
+
+    assert matcher.matches({"dispatch_group_codes": ["WIL26"]})
+    assert matcher.matches({"dispatch_groups": ["RD Kreis", "ff musterstadt-nord"]})
+    assert matcher.matches({"dispatch_groups": "USHERS"})
+    assert not matcher.matches({"dispatch_group_codes": ["WIL2"], "dispatch_groups": ["WI L26"]})
+    assert not matcher.matches({})
+
+
+def test_matcher_agrees_with_naive_filter_loop() -> None:
+    rng = random.Random(3)
+    alphabet = "ABCDEÄ 12"
+    for _ in range(300):
+        groups = ["".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        alarm = {
+            "dispatch_group_codes": ["".join(rng.choices(alphabet, k=3))],
+            "dispatch_groups": ["".join(rng.choices(alphabet.lower(), k=rng.randint(0, 12)))],
+        }
+        assert ActivationMatcher(groups).matches(alarm) == _naive_matches(groups, alarm), (groups, alarm)
+
+
+def test_activation_matcher_is_cached_per_group_list() -> None:
+    groups = ["WIL26", "WIL41"]
+
+    assert activation_matcher(groups) is activation_matcher(list(groups))
+    assert activation_matcher(["WIL26"]) is not activation_matcher(groups)
+    assert activation_matcher([]) is None
+
+
+def test_process_alarm_drops_alarms_for_other_groups() -> None:
+    store = MagicMock()
+    store.has_incident_number.return_value = False
+    settings = {"activation_groups": ["WIL26"]}
+
+    stored = process_alarm(
+        {"incident_number": "4711", "dispatch_group_codes": ["WIL41"]}, store, None, lambda: settings
+    )
+
+    assert not stored
+    store.update.assert_not_called()
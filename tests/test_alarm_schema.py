@@ -0,0 +1,77 @@
+"""Tests for the compiled alarm payload validator."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from alarm_monitor.alarm_processor import validate_alarm_payload
+from alarm_monitor.alarm_schema import (
+    ALARM_VALIDATOR,
+    AlarmValidationError,
+    FieldSpec,
+    compile_schema,
+)
+
+
+def _valid_alarm() -> dict:
+    return {
+        "incident_number": "2024-0815",
+        "keyword": "F3Y",
+        "location": "Hauptstraße 1, Musterstadt",
+        "dispatch_group_codes": ["WIL26", "WIL41"],
+        "dispatch_groups": "FF Musterstadt",
+        "latitude": "50.1",
+        "longitude": 9.2,
+        "location_details": {"street": "Hauptstraße", "floor": None},
+    }
+
+
+def test_valid_payload_has_no_errors() -> None:
+    assert ALARM_VALIDATOR.errors(_valid_alarm()) == []
+    validate_alarm_payload(_valid_alarm())
+
+
+def test_all_violations_are_collected_in_schema_order() -> None:
+    alarm = {
+        "incident_number": "bad number!",
+        "keyword": 5,
+        "aao_groups": ["ok", 7, "x" * 201],
+        "dispatch_groups": {"not": "a list"},
+        "latitude": 91,
+        "location_details": {"street": 1},
+    }
+
+    with pytest.raises(AlarmValidationError) as info:
+        validate_alarm_payload(alarm)
+
+    assert info.value.errors == [
+        "incident_number must be 1–50 characters matching ^[A-Za-z0-9\\-_]+$",
+        "keyword must be a string",
+        "aao_groups[1] must be a string",
+        "aao_groups[2] must not exceed 200 characters",
+        "dispatch_groups must be a list or string",
+        "latitude must be between -90 and 90",
+        "location_details.street must be a string or null",
+        "latitude and longitude must be provided together",
+    ]
+    assert isinstance(info.value, ValueError)
+    assert str(info.value).startswith("incident_number must be 1–50 characters")
+
+
+@pytest.mark.parametrize("incident_number", [None, "", 0])
+def test_missing_incident_number_is_required(incident_number) -> None:
+    alarm = {"keyword": "F3Y"}
+    if incident_number is not None:
+        alarm["incident_number"] = incident_number
+
+    assert ALARM_VALIDATOR.errors(alarm) == ["incident_number is required"]
+
+
+def test_unknown_field_kind_is_rejected_at_compile_time() -> None:
+    with pytest.raises(ValueError, match="Unknown field kind"):
+        compile_schema([FieldSpec("keyword", "text")])
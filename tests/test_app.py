@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import json
 import threading
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import sys
@@ -13,9 +16,11 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 import pytest
 
+from alarm_monitor.alarm_processor import process_alarm_batch
 from alarm_monitor.config import AppConfig
 from alarm_monitor import app as app_module
 from alarm_monitor.app import generate_csrf_token
+from alarm_monitor.storage import AlarmStore
 
 
 API_KEY = "test-secret-key"
@@ -167,6 +172,7 @@ def test_post_alarm_without_incident_number_rejected(client, flask_app) -> None:
     assert response.status_code == 400
     data = response.get_json()
     assert "incident_number is required" in data["error"]
+    assert data["errors"] == ["incident_number is required"]
     store = flask_app.config["ALARM_STORE"]
     assert store.history() == []
 
@@ -482,6 +488,41 @@ def test_post_settings_invalid_coordinates(client) -> None:
     assert "error" in data
 
 
+def test_post_settings_rejects_unknown_ntfy_mode(client) -> None:
+    """POST /api/settings should only accept ntfy_mode 'stream' or 'poll'."""
+    headers = {
+        "X-Settings-Password": SETTINGS_PASSWORD,
+        "X-CSRF-Token": generate_csrf_token(SETTINGS_PASSWORD),
+    }
+
+    response = client.post("/api/settings", json={"ntfy_mode": "websocket"}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.post("/api/settings", json={"ntfy_mode": "poll"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/settings").get_json()["ntfy_mode"] == "poll"
+
+
+def test_post_settings_validates_ntfy_topics(client) -> None:
+    """POST /api/settings should reject ntfy topics spread over several servers."""
+    headers = {
+        "X-Settings-Password": SETTINGS_PASSWORD,
+        "X-CSRF-Token": generate_csrf_token(SETTINGS_PASSWORD),
+    }
+    topics = "https://ntfy.sh/fw-wache\nhttps://ntfy.sh/fw-uebung 240"
+
+    response = client.post(
+        "/api/settings",
+        json={"ntfy_topic_url": topics + "\nhttps://other.example/fw"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+    response = client.post("/api/settings", json={"ntfy_topic_url": topics}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/settings").get_json()["ntfy_topic_url"] == topics
+
+
 # ---------------------------------------------------------------------------
 # GET /api/alarm/participants – incident_number validation (SEC-3)
 # ---------------------------------------------------------------------------
@@ -513,6 +554,25 @@ def test_api_participants_valid_incident_number_without_messenger(client) -> Non
     assert response.status_code == 503
 
 
+def test_api_participants_polls_only_stored_incidents(client, flask_app) -> None:
+    """Unknown incident numbers return 404 and are never handed to the poller."""
+    poller = MagicMock()
+    poller.is_watched.return_value = False
+    poller.get.return_value = [{"id": "p1"}]
+    flask_app.config["PARTICIPANT_POLLER"] = poller
+    flask_app.config["ALARM_STORE"].update(
+        {"alarm": {"incident_number": "4711"}, "coordinates": None, "weather": None}
+    )
+
+    assert client.get("/api/alarm/participants/9999").status_code == 404
+    poller.get.assert_not_called()
+
+    response = client.get("/api/alarm/participants/4711")
+    assert response.status_code == 200
+    assert response.get_json() == {"participants": [{"id": "p1"}]}
+    poller.get.assert_called_once_with("4711")
+
+
 # ---------------------------------------------------------------------------
 # GET /api/stream – Server-Sent Events
 # ---------------------------------------------------------------------------
@@ -526,6 +586,29 @@ def test_api_stream_content_type(client) -> None:
     assert "text/event-stream" in resp.content_type
 
 
+def test_api_stream_pushes_message_list(client, flask_app) -> None:
+    """GET /api/stream should send the active messages after connecting and on change."""
+    message_store = flask_app.config["MESSAGE_STORE"]
+    message_store.add("Vor dem Verbinden", ttl_minutes=60)
+
+    resp = client.get("/api/stream")
+    chunks = iter(resp.response)
+    events = [json.loads(next(chunks).decode().removeprefix("data: ")) for _ in range(2)]
+    assert [event["type"] for event in events] == ["connected", "messages"]
+    assert [m["text"] for m in events[1]["messages"]] == ["Vor dem Verbinden"]
+
+    def _notify() -> None:
+        with flask_app.config["SSE_SUBSCRIBERS_LOCK"]:
+            for evt in flask_app.config["SSE_SUBSCRIBERS"]:
+                evt.set()
+
+    message_store.add("Neu", ttl_minutes=60, on_stored=_notify)
+    update = json.loads(next(chunks).decode().removeprefix("data: "))
+    assert update["type"] == "messages"
+    assert [m["text"] for m in update["messages"]] == ["Neu", "Vor dem Verbinden"]
+    resp.close()
+
+
 def test_post_alarm_notifies_sse_subscribers(client, flask_app) -> None:
     """Posting a new alarm should set all registered SSE subscriber events."""
     evt = threading.Event()
@@ -560,6 +643,106 @@ def test_sse_subscriber_not_notified_for_dropped_alarm(client, flask_app) -> Non
             pass
 
 
+# ---------------------------------------------------------------------------
+# POST /api/alarm/batch
+# ---------------------------------------------------------------------------
+
+
+def test_post_alarm_batch_stores_backlog_once_and_notifies_once(client, flask_app) -> None:
+    store = flask_app.config["ALARM_STORE"]
+    client.post(
+        "/api/alarm",
+        json={"incident_number": "B-1", "keyword": "F3Y", "timestamp": "2024-05-01T09:00:00+00:00"},
+        headers={"X-API-Key": API_KEY},
+    )
+    hooks = flask_app.config["ALARM_HOOKS"]
+    hooks.dispatch = MagicMock()  # type: ignore[method-assign]
+    backlog = [
+        {"incident_number": "B-1", "keyword": "F3Y"},
+        {"incident_number": "B-2", "keyword": "H1", "timestamp": "2024-05-01T10:00:00+00:00"},
+        {"incident_number": "B-3", "keyword": "F2", "timestamp": "2024-05-01T11:00:00+00:00",
+         "latitude": 50.1, "longitude": 9.2},
+        {"incident_number": "B-2", "keyword": "H1"},
+    ]
+
+    with patch.object(store, "_persist_locked", wraps=store._persist_locked) as persist:
+        response = client.post("/api/alarm/batch", json=backlog, headers={"X-API-Key": API_KEY})
+        assert persist.call_count == 1
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "status": "ok",
+        "stored": ["B-2", "B-3"],
+        "duplicates": ["B-1", "B-2"],
+        "filtered": [],
+    }
+    assert [entry["alarm"]["incident_number"] for entry in store.history()][:2] == ["B-3", "B-2"]
+    hooks.dispatch.assert_called_once()
+    assert hooks.dispatch.call_args.args[0]["incident_number"] == "B-3"
+    deadline = time.monotonic() + 5
+    while store.latest()["coordinates"] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.latest()["coordinates"] == {"lat": 50.1, "lon": 9.2}
+
+
+def test_post_alarm_batch_rejects_whole_batch_with_all_errors(client, flask_app) -> None:
+    backlog = [
+        {"incident_number": "OK-1"},
+        {"incident_number": "bad id!", "keyword": 5},
+    ]
+
+    response = client.post("/api/alarm/batch", json=backlog, headers={"X-API-Key": API_KEY})
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        "alarms[1]: incident_number must be 1–50 characters matching ^[A-Za-z0-9\\-_]+$",
+        "alarms[1]: keyword must be a string",
+    ]
+    assert flask_app.config["ALARM_STORE"].history() == []
+
+
+def test_post_alarm_batch_requires_api_key_and_array(client) -> None:
+    assert client.post("/api/alarm/batch", json=[{"incident_number": "X"}]).status_code == 401
+    headers = {"X-API-Key": API_KEY}
+    assert client.post("/api/alarm/batch", json={"incident_number": "X"}, headers=headers).status_code == 400
+    too_many = [{"incident_number": f"N{index}"} for index in range(101)]
+    assert client.post("/api/alarm/batch", json=too_many, headers=headers).status_code == 400
+
+
+def test_process_alarm_batch_enriches_and_routes_displayed_alarm_first() -> None:
+    store = AlarmStore()
+    executor = SimpleNamespace(submit=lambda fn: fn())
+    route_cache = MagicMock()
+    config = SimpleNamespace(
+        ors_api_key="ors-key",
+        weather_base_url="https://weather.example",
+        weather_params="",
+        nominatim_base_url="https://nominatim.example",
+    )
+    settings = {"activation_groups": [], "default_latitude": 50.0, "default_longitude": 9.0}
+    backlog = [
+        {
+            "incident_number": f"B-{index}",
+            "timestamp": f"2024-05-01T{index:02d}:00:00+00:00",
+            "latitude": 50.0 + index / 100,
+            "longitude": 9.5,
+        }
+        for index in range(12)
+    ]
+
+    with patch("alarm_monitor.weather.fetch_weather", return_value=None), \
+            patch.object(store, "update_enrichment_many", wraps=store.update_enrichment_many) as update:
+        process_alarm_batch(
+            backlog, store, config, lambda: settings, executor, route_cache=route_cache
+        )
+
+    chunks = [list(call.args[0]) for call in update.call_args_list]
+    assert chunks[0] == ["B-11"]
+    assert [len(chunk) for chunk in chunks] == [1, 10, 1]
+    route_cache.prefetch.assert_called_once_with("ors-key", 50.0, 9.0, 50.11, 9.5)
+    assert store.latest()["coordinates"] == {"lat": 50.11, "lon": 9.5}
+
+
 # ---------------------------------------------------------------------------
 # Part 2a – SSE max concurrent connections
 # ---------------------------------------------------------------------------
@@ -598,6 +781,14 @@ def test_post_alarm_with_oversized_keyword_returns_400(client) -> None:
     assert "error" in response.get_json()
 
 
+def test_post_alarm_with_non_object_body_returns_400(client) -> None:
+    """POST /api/alarm with a JSON array or string body should return 400."""
+    for body in ([1], "x"):
+        response = client.post("/api/alarm", json=body, headers={"X-API-Key": API_KEY})
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
 def test_post_alarm_with_invalid_incident_number_chars_returns_400(client) -> None:
     """POST /api/alarm with incident_number containing invalid chars should return 400."""
     response = client.post(
@@ -716,6 +907,144 @@ def test_metrics_endpoint_returns_prometheus_format(client) -> None:
         os.environ.pop("ALARM_MONITOR_METRICS_TOKEN", None)
 
 
+def test_metrics_endpoint_includes_latency_histograms(client) -> None:
+    """Request and persistence latency histograms are exported per bounded label."""
+    import os
+    token = "test-metrics-token-123"
+    os.environ["ALARM_MONITOR_METRICS_TOKEN"] = token
+    try:
+        client.post(
+            "/api/alarm",
+            json={"incident_number": "MET-001", "keyword": "F3Y"},
+            headers={"X-API-Key": API_KEY},
+        )
+        client.get("/does-not-exist")
+        response = client.get("/api/metrics", headers={"X-Metrics-Token": token})
+        body = response.data.decode()
+        assert 'alarm_monitor_http_request_duration_seconds_count{endpoint="api.receive_alarm"}' in body
+        assert 'alarm_monitor_http_request_duration_seconds_count{endpoint="unmatched"}' in body
+        assert 'alarm_monitor_store_persist_duration_seconds_count{store="alarms"}' in body
+        assert 'alarm_monitor_outbound_request_errors_total{integration="nominatim"}' in body
+        assert "alarm_monitor_executor_queue_depth" in body
+    finally:
+        os.environ.pop("ALARM_MONITOR_METRICS_TOKEN", None)
+
+
+def test_executor_queue_depth_counts_tasks_waiting_for_a_worker() -> None:
+    executor = app_module._CountingExecutor(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+    try:
+        executor.submit(lambda: (started.set(), release.wait(timeout=5)))
+        assert started.wait(timeout=5)
+        queued = [executor.submit(lambda: None) for _ in range(3)]
+        assert executor.queue_depth == 3
+
+        assert queued[0].cancel()
+        assert executor.queue_depth == 2
+        release.set()
+        for future in queued[1:]:
+            future.result(timeout=5)
+        assert executor.queue_depth == 0
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+
+# ---------------------------------------------------------------------------
+# Alarm latency tracing
+# ---------------------------------------------------------------------------
+
+
+def test_post_alarm_records_trace_and_render_beacon(client) -> None:
+    """A stored alarm gets a trace; the dashboard beacon appends the render span."""
+    client.post(
+        "/api/alarm",
+        json={"incident_number": "TRC-001", "keyword": "F3Y"},
+        headers={"X-API-Key": API_KEY},
+    )
+
+    beacon = client.post("/api/alarm/TRC-001/rendered")
+    assert beacon.status_code == 204
+
+    response = client.get("/api/alarm/traces/TRC-001")
+    assert response.status_code == 200
+    spans = [span["span"] for span in response.get_json()["spans"]]
+    for expected in ("received", "validated", "stored", "sse_notified", "rendered"):
+        assert expected in spans
+
+    listing = client.get("/api/alarm/traces").get_json()
+    assert listing["traces"][0]["incident_number"] == "TRC-001"
+
+
+def test_render_beacon_for_unknown_incident_returns_404(client) -> None:
+    """Beacons for incidents that were never stored are rejected."""
+    assert client.post("/api/alarm/NOPE-1/rendered").status_code == 404
+    assert client.get("/api/alarm/traces/NOPE-1").status_code == 404
+
+
+def test_duplicate_alarm_does_not_replace_trace(client) -> None:
+    """Retries of an already stored incident must not reset its trace."""
+    client.post("/api/alarm", json={"incident_number": "TRC-002"}, headers={"X-API-Key": API_KEY})
+    client.post("/api/alarm/TRC-002/rendered")
+    client.post("/api/alarm", json={"incident_number": "TRC-002"}, headers={"X-API-Key": API_KEY})
+
+    spans = [span["span"] for span in client.get("/api/alarm/traces/TRC-002").get_json()["spans"]]
+    assert "rendered" in spans
+
+
+# ---------------------------------------------------------------------------
+# GET /api/calendar
+# ---------------------------------------------------------------------------
+
+
+def test_calendar_not_configured(client) -> None:
+    response = client.get("/api/calendar")
+    assert response.get_json() == {"events": [], "configured": False}
+
+
+def test_calendar_is_answered_from_cache(client, flask_app) -> None:
+    """/api/calendar must not download feeds in the request thread."""
+    from alarm_monitor.calendar_service import CalendarDownload
+
+    flask_app.config["SETTINGS_STORE"].update({"calendar_urls": ["https://cal.example/a.ics"]})
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    download = CalendarDownload(events=[{"summary": "Übungsdienst", "start": start}])
+    request_thread = threading.get_ident()
+    download_threads = []
+    fetched = threading.Event()
+
+    def _download(*_args, **_kwargs):
+        download_threads.append(threading.get_ident())
+        fetched.set()
+        return download
+
+    with patch("alarm_monitor.calendar_service.download_calendar", side_effect=_download):
+        first = client.get("/api/calendar").get_json()
+        assert fetched.wait(timeout=5)
+        cache = flask_app.config["CALENDAR_CACHE"]
+        for _ in range(100):
+            if not cache._feeds["https://cal.example/a.ics"].get("fetching"):
+                break
+            threading.Event().wait(0.01)
+        second = client.get("/api/calendar").get_json()
+
+    assert first["events"] == [] and first["configured"] is True
+    assert first["feeds"][0]["status"] == "pending"
+    assert [event["summary"] for event in second["events"]] == ["Übungsdienst"]
+    assert second["feeds"] == [{
+        "index": 0,
+        "host": "cal.example",
+        "status": "ok",
+        "events": 1,
+        "last_success": second["feeds"][0]["last_success"],
+        "last_error": None,
+        "last_error_at": None,
+        "duration_seconds": second["feeds"][0]["duration_seconds"],
+    }]
+    assert request_thread not in download_threads
+
+
 # ---------------------------------------------------------------------------
 # View route tests (coverage for routes/views.py)
 # ---------------------------------------------------------------------------
@@ -802,6 +1131,29 @@ def test_api_route_returns_503_when_not_configured(client) -> None:
     assert response.status_code == 503
 
 
+def test_api_route_uses_local_road_graph_without_ors_key(flask_app, client) -> None:
+    """GET /api/route should answer from the offline road graph when configured."""
+    from alarm_monitor.road_graph import RoadGraph
+
+    flask_app.config["ROAD_GRAPH"] = RoadGraph.from_edges(
+        [(50.0, 9.0), (50.01, 9.0)],
+        [(0, 1, 80.0, 1112.0, "Hauptstraße", ()), (1, 0, 80.0, 1112.0, "Hauptstraße", ())],
+    )
+
+    response = client.get("/api/route?start_lat=50&start_lon=9&end_lat=50.01&end_lon=9")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["routes"][0]["summary"]["duration"] == pytest.approx(80.0)
+    assert data["routes"][0]["geometry"]["coordinates"] == [[9.0, 50.0], [9.0, 50.01]]
+
+    response = client.get("/api/route?start_lat=50&start_lon=9&end_lat=50.01&end_lon=9&geometry=polyline")
+    assert response.status_code == 200
+    assert isinstance(response.get_json()["routes"][0]["geometry"], str)
+
+    response = client.get("/api/route?start_lat=50&start_lon=9&end_lat=51&end_lon=10")
+    assert response.status_code == 502
+
+
 def test_api_metrics_unauthorized(client) -> None:
     """GET /api/metrics with wrong token should return 401."""
     import os
@@ -1381,7 +1733,59 @@ def test_post_alarm_triggers_cec_watcher(client, flask_app) -> None:
         headers={"X-API-Key": API_KEY},
     )
     assert response.status_code == 200
+    flask_app.config["ALARM_HOOKS"].flush(timeout=5)
+    watcher.handle_alarm_stored.assert_called_once()
+
+
+def test_post_alarm_notifies_dashboards_without_waiting_for_cec(client, flask_app) -> None:
+    release = threading.Event()
+    watcher = flask_app.config["CEC_WATCHER"]
+    watcher.handle_alarm_stored = MagicMock(side_effect=lambda: release.wait(timeout=5))  # type: ignore[method-assign]
+    subscriber = threading.Event()
+    with flask_app.config["SSE_SUBSCRIBERS_LOCK"]:
+        flask_app.config["SSE_SUBSCRIBERS"].append(subscriber)
+
+    response = client.post(
+        "/api/alarm",
+        json={"incident_number": "CEC-SLOW", "keyword": "F3Y"},
+        headers={"X-API-Key": API_KEY},
+    )
+
+    assert response.status_code == 200
+    assert subscriber.is_set()
+    release.set()
+    flask_app.config["ALARM_HOOKS"].flush(timeout=5)
     watcher.handle_alarm_stored.assert_called_once()
+    assert flask_app.config["ALARM_HOOKS"].names[0] == "sse"
+
+
+def test_post_cec_settings_wakes_cec_watcher(client, flask_app) -> None:
+    watcher = flask_app.config["CEC_WATCHER"]
+    watcher.handle_settings_changed = MagicMock()  # type: ignore[method-assign]
+    headers = {
+        "X-Settings-Password": SETTINGS_PASSWORD,
+        "X-CSRF-Token": generate_csrf_token(SETTINGS_PASSWORD),
+    }
+
+    client.post("/api/settings", json={"fire_department_name": "FF Test"}, headers=headers)
+    watcher.handle_settings_changed.assert_not_called()
+
+    response = client.post("/api/settings", json={"hdmi_cec_enabled": True}, headers=headers)
+    assert response.status_code == 200
+    watcher.handle_settings_changed.assert_called_once()
+
+
+def test_settings_change_reconnects_ntfy_poller(flask_app) -> None:
+    poller = flask_app.config["NTFY_POLLER"]
+    poller.reconnect = MagicMock()  # type: ignore[method-assign]
+    settings_store = flask_app.config["SETTINGS_STORE"]
+
+    settings_store.update({"fire_department_name": "FF Test"})
+    poller.reconnect.assert_not_called()
+
+    settings_store.update({"ntfy_topic_url": "https://ntfy.example/fw"})
+    poller.reconnect.assert_called_once()
+    assert settings_store.effective()["ntfy_topic_url"] == "https://ntfy.example/fw"
 
 
 def test_upload_logo_unsupported_format_returns_415(client) -> None:
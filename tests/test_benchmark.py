@@ -0,0 +1,117 @@
+"""Smoke tests for the load-testing harness in ``scripts/benchmark.py``."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="module")
+def benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark", ROOT / "scripts" / "benchmark.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules["benchmark"] = module
+    spec.loader.exec_module(module)
+    yield module
+    sys.modules.pop("benchmark", None)
+
+
+def test_percentile_summary_uses_nearest_rank(benchmark) -> None:
+    summary = benchmark.summarise_latencies([i / 1000 for i in range(1, 101)])
+    assert summary["p50"] == 50.0
+    assert summary["p95"] == 95.0
+    assert summary["p99"] == 99.0
+    assert summary["max"] == 100.0
+
+
+def test_compare_reports_flags_regressions(benchmark) -> None:
+    def _report(p95: float, rps: float) -> dict:
+        latency = {"p50": 1.0, "p95": p95, "p99": p95, "max": p95, "mean": 1.0}
+        return {"scenarios": {"ingest": {"latency_ms": latency, "throughput_rps": rps}}}
+
+    regressions = benchmark.compare_reports(_report(10.0, 100.0), _report(15.0, 70.0), 20.0)
+    labels = [" ".join(line.split()[1:3]) for line in regressions]
+    assert labels == ["latency p95", "latency p99", "throughput 100.00"]
+    assert benchmark.compare_reports(_report(10.0, 100.0), _report(11.0, 95.0), 20.0) == []
+
+
+def test_ingest_and_fanout_scenarios_run_against_stubs(benchmark, tmp_path: Path) -> None:
+    output = tmp_path / "report.json"
+    exit_code = benchmark.main([
+        "--scenario", "ingest",
+        "--scenario", "fanout",
+        "--alarms", "5",
+        "--concurrency", "2",
+        "--subscribers", "2",
+        "--fanout-alarms", "2",
+        "--output", str(output),
+    ])
+
+    assert exit_code == 0
+    report = json.loads(output.read_text(encoding="utf-8"))
+    ingest = report["scenarios"]["ingest"]
+    assert ingest["requests"] == 5
+    assert ingest["errors"] == 0
+    assert set(ingest["latency_ms"]) >= {"p50", "p95", "p99"}
+    assert ingest["rss_kib_after"] > 0
+    fanout = report["scenarios"]["fanout"]
+    assert fanout["requests"] == 4  # 2 alarms x 2 subscribers
+    assert fanout["errors"] == 0
+
+
+def test_routing_scenarios_query_a_grid_and_compact_payloads(benchmark, tmp_path: Path) -> None:
+    output = tmp_path / "report.json"
+    exit_code = benchmark.main([
+        "--scenario", "routing",
+        "--scenario", "route_payload",
+        "--road-grid", "6",
+        "--route-queries", "5",
+        "--output", str(output),
+    ])
+
+    assert exit_code == 0
+    scenarios = json.loads(output.read_text(encoding="utf-8"))["scenarios"]
+    routing = scenarios["routing"]
+    assert routing["requests"] == 5
+    assert routing["errors"] == 0
+    assert routing["nodes"] == 36
+    payload = scenarios["route_payload"]
+    assert payload["requests"] == 5
+    assert payload["polyline_bytes"] < payload["compact_bytes"] < payload["raw_bytes"]
+
+
+def test_activation_scenario_agrees_with_naive_filter(benchmark, tmp_path: Path) -> None:
+    output = tmp_path / "report.json"
+    exit_code = benchmark.main([
+        "--scenario", "activation",
+        "--activation-groups", "50",
+        "--output", str(output),
+    ])
+
+    assert exit_code == 0
+    activation = json.loads(output.read_text(encoding="utf-8"))["scenarios"]["activation"]
+    assert activation["groups"] == 50
+    assert activation["errors"] == 0
+    assert activation["naive_mean_us"] > 0
+
+
+def test_validation_scenario_reports_per_payload_cost(benchmark, tmp_path: Path) -> None:
+    output = tmp_path / "report.json"
+    exit_code = benchmark.main([
+        "--scenario", "validation",
+        "--validations", "200",
+        "--output", str(output),
+    ])
+
+    assert exit_code == 0
+    validation = json.loads(output.read_text(encoding="utf-8"))["scenarios"]["validation"]
+    assert validation["requests"] == 200
+    assert validation["latency_ms"]["p50"] > 0
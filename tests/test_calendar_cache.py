@@ -0,0 +1,277 @@
+"""Tests for CalendarCache and the conditional calendar download."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+import requests
+
+from alarm_monitor.calendar_cache import CalendarCache
+from alarm_monitor.calendar_service import (
+    CalendarDownload,
+    describe_fetch_error,
+    download_calendar,
+    fetch_calendar_feeds,
+)
+
+_URL = "https://calendar.example/feed.ics"
+
+
+class _InlineExecutor:
+    """Executor stand-in running submitted work immediately."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls += 1
+        fn(*args, **kwargs)
+
+
+def _event(summary: str, days_ahead: float) -> dict:
+    return {
+        "summary": summary,
+        "start": datetime.now(timezone.utc) + timedelta(days=days_ahead),
+    }
+
+
+def test_cache_miss_returns_empty_and_schedules_refresh() -> None:
+    cache = CalendarCache()
+    executor = MagicMock()
+
+    assert cache.get_events([_URL], executor=executor) == []
+    executor.submit.assert_called_once()
+
+
+def test_events_are_served_from_memory_after_refresh() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    download = CalendarDownload(events=[_event("Vergangen", -1), _event("Übung", 2)])
+
+    with patch("alarm_monitor.calendar_service.download_calendar", return_value=download) as mock_dl:
+        cache.get_events([_URL], executor=executor)
+        events = cache.get_events([_URL], executor=executor)
+        again = cache.get_events([_URL], executor=executor)
+
+    assert [event["summary"] for event in events] == ["Übung"]
+    assert again == events
+    mock_dl.assert_called_once()
+
+
+def test_stale_feed_is_revalidated_with_validators() -> None:
+    cache = CalendarCache(ttl_minutes=15)
+    executor = _InlineExecutor()
+    first = CalendarDownload(events=[_event("Dienst", 1)], etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    with patch("alarm_monitor.calendar_service.download_calendar", return_value=first):
+        cache.get_events([_URL], executor=executor)
+
+    cache._feeds[_URL]["next_refresh"] = time.monotonic() - 1
+    not_modified = CalendarDownload(not_modified=True, etag='"abc"')
+    with patch("alarm_monitor.calendar_service.download_calendar", return_value=not_modified) as mock_dl:
+        events = cache.get_events([_URL], executor=executor)
+
+    mock_dl.assert_called_once_with(
+        _URL, etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT", index=None
+    )
+    assert [event["summary"] for event in events] == ["Dienst"]
+
+
+def test_failed_refresh_keeps_stale_events_and_retries_later() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    with patch(
+        "alarm_monitor.calendar_service.download_calendar",
+        return_value=CalendarDownload(events=[_event("Dienst", 1)]),
+    ):
+        cache.get_events([_URL], executor=executor)
+
+    cache._feeds[_URL]["next_refresh"] = time.monotonic() - 1
+    with patch("alarm_monitor.calendar_service.download_calendar", side_effect=OSError("down")):
+        cache.get_events([_URL], executor=executor)
+        events = cache.get_events([_URL], executor=executor)
+
+    assert [event["summary"] for event in events] == ["Dienst"]
+    assert not cache._feeds[_URL]["fetching"]
+    assert cache._feeds[_URL]["next_refresh"] > time.monotonic()
+
+
+def test_in_flight_refresh_is_not_duplicated() -> None:
+    cache = CalendarCache()
+    executor = MagicMock()
+
+    cache.get_events([_URL], executor=executor)
+    cache.get_events([_URL], executor=executor)
+
+    executor.submit.assert_called_once()
+
+
+def test_removed_urls_are_forgotten() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    with patch(
+        "alarm_monitor.calendar_service.download_calendar",
+        return_value=CalendarDownload(events=[_event("Alt", 1)]),
+    ):
+        cache.get_events([_URL], executor=executor)
+
+    assert cache.get_events([], executor=executor) == []
+    assert _URL not in cache._feeds
+
+
+def test_download_calendar_sends_conditional_headers_and_handles_304() -> None:
+    response = MagicMock(status_code=304)
+    with patch("alarm_monitor.calendar_service.requests.get", return_value=response) as mock_get:
+        result = download_calendar(_URL, etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    headers = mock_get.call_args.kwargs["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert result.not_modified
+    assert result.etag == '"v1"'
+
+
+def test_download_calendar_rejects_unsafe_url() -> None:
+    with pytest.raises(ValueError):
+        download_calendar("file:///etc/passwd")
+
+
+def test_fetch_calendar_feeds_returns_partial_results_at_deadline() -> None:
+    release = threading.Event()
+
+    def _download(url, etag=None, last_modified=None, index=None):
+        if "slow" in url:
+            release.wait(timeout=5)
+        if "broken" in url:
+            raise OSError("refused")
+        return CalendarDownload(events=[_event(url, 1)])
+
+    urls = ["https://a.example/fast.ics", "https://b.example/slow.ics", "https://c.example/broken.ics"]
+    started = time.monotonic()
+    try:
+        with patch("alarm_monitor.calendar_service.download_calendar", side_effect=_download):
+            results = fetch_calendar_feeds(urls, deadline=0.2)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert [result.url for result in results] == urls
+    fast, slow, broken = results
+    assert fast.error is None and fast.download.events[0]["summary"] == urls[0]
+    assert slow.error == "timeout" and slow.download is None
+    assert broken.error == "OSError"
+
+
+def test_describe_fetch_error_never_contains_url() -> None:
+    response = MagicMock(status_code=403)
+    exc = requests.HTTPError("403 for url https://cal.example/private-token.ics", response=response)
+
+    assert describe_fetch_error(exc) == "HTTP 403"
+    assert describe_fetch_error(requests.ConnectTimeout("https://cal.example/secret")) == "timeout"
+
+
+def test_all_due_feeds_are_refreshed_in_one_task() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    other = "https://other.example/feed.ics"
+
+    with patch(
+        "alarm_monitor.calendar_service.download_calendar",
+        side_effect=lambda url, **_: CalendarDownload(events=[_event(url, 1)]),
+    ):
+        cache.get_events([_URL, other], executor=executor)
+        events = cache.get_events([_URL, other], executor=executor)
+
+    assert executor.calls == 1
+    assert sorted(event["summary"] for event in events) == sorted([_URL, other])
+
+
+def test_health_reports_per_feed_status_without_url() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    secret = "https://private.example/calendar/s3cr3t-token/basic.ics"
+
+    def _download(url, **_):
+        if url == secret:
+            raise requests.ConnectionError(f"Max retries exceeded with url: {url}")
+        return CalendarDownload(events=[_event("Dienst", 1)])
+
+    with patch("alarm_monitor.calendar_service.download_calendar", side_effect=_download):
+        cache.get_events([_URL, secret], executor=executor)
+
+    health = cache.health([_URL, secret])
+    assert [feed["status"] for feed in health] == ["ok", "error"]
+    assert health[0]["events"] == 1 and health[0]["last_success"] is not None
+    assert health[1]["last_error"] == "connection error"
+    assert health[1]["host"] == "private.example"
+    assert "s3cr3t" not in repr(health)
+
+    metrics = "\n".join(cache.render_metrics([_URL, secret]))
+    assert 'alarm_monitor_calendar_feed_up{feed="0"} 1' in metrics
+    assert 'alarm_monitor_calendar_feed_up{feed="1"} 0' in metrics
+    assert "s3cr3t" not in metrics
+
+
+def test_refresh_passes_previous_index_to_download() -> None:
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    index = MagicMock()
+    index.occurrences.return_value = [_event("Dienst", 1)]
+    with patch(
+        "alarm_monitor.calendar_service.download_calendar",
+        return_value=CalendarDownload(events=[_event("Dienst", 1)], index=index),
+    ):
+        cache.get_events([_URL], executor=executor)
+
+    cache._feeds[_URL]["next_refresh"] = time.monotonic() - 1
+    with patch(
+        "alarm_monitor.calendar_service.download_calendar",
+        return_value=CalendarDownload(not_modified=True),
+    ) as mock_dl:
+        cache.get_events([_URL], executor=executor)
+
+    assert mock_dl.call_args.kwargs["index"] is index
+
+
+def test_not_modified_refresh_moves_recurrence_window() -> None:
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=1)
+    body = (
+        "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:drill\r\nSUMMARY:Übung\r\n"
+        f"DTSTART:{start:%Y%m%dT%H%M%SZ}\r\nRRULE:FREQ=WEEKLY\r\n"
+        "END:VEVENT\r\nEND:VCALENDAR\r\n"
+    ).encode()
+    response = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+    response.iter_content.return_value = [body]
+    clock = {"now": datetime.now(timezone.utc)}
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock["now"]
+
+    cache = CalendarCache()
+    executor = _InlineExecutor()
+    with patch("alarm_monitor.calendar_service.datetime", _Clock), \
+            patch("alarm_monitor.calendar_service.requests.get", return_value=response):
+        cache.get_events([_URL], executor=executor)
+        first = cache.get_events([_URL], executor=executor)
+
+    clock["now"] += timedelta(days=20)
+    cache._feeds[_URL]["next_refresh"] = time.monotonic() - 1
+    not_modified = MagicMock(status_code=304, headers={})
+    with patch("alarm_monitor.calendar_service.datetime", _Clock), \
+            patch("alarm_monitor.calendar_service.requests.get", return_value=not_modified):
+        cache.get_events([_URL], executor=executor)
+        later = cache.get_events([_URL], executor=executor)
+
+    assert len(first) == 5
+    assert len(later) == 5
+    assert datetime.fromisoformat(later[0]["start"]) >= clock["now"]
@@ -12,10 +12,12 @@ import pytest
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from alarm_monitor.cec_controller import (
+    CecClientSession,
     CecController,
     CecDisplayWatcher,
     get_hdmi_cec_settings,
     is_in_schedule_window,
+    next_schedule_boundary,
     normalize_schedules,
     _alarm_display_mode,
 )
@@ -244,3 +246,222 @@ def test_cec_watcher_keeps_display_on_during_schedule() -> None:
 
     controller.standby.assert_not_called()
     assert controller.wake.call_count >= 1
+
+
+def _watcher(settings, alarm_payload, controller=None) -> CecDisplayWatcher:
+    if controller is None:
+        controller = CecController("/usr/bin/cec-client")
+        controller.wake = MagicMock(return_value=True)  # type: ignore[method-assign]
+        controller.standby = MagicMock(return_value=True)  # type: ignore[method-assign]
+        controller.configure = MagicMock()  # type: ignore[method-assign]
+        controller.available = MagicMock(return_value=True)  # type: ignore[method-assign]
+    return CecDisplayWatcher(
+        get_effective_settings=lambda: settings,
+        get_alarm_payload=lambda: alarm_payload,
+        get_display_duration_minutes=lambda: 30,
+        get_timezone=lambda: "UTC",
+        controller=controller,
+    )
+
+
+_ENABLED = {
+    "hdmi_cec_enabled": True,
+    "hdmi_cec_idle_standby_minutes": 5,
+    "hdmi_cec_standby_on_idle": True,
+    "hdmi_cec_schedules": [],
+}
+
+
+def test_next_schedule_boundary_finds_window_start_and_end() -> None:
+    schedules = [{"enabled": True, "weekday": 1, "start_time": "18:45", "end_time": "21:30"}]
+    monday = datetime(2026, 7, 6, 12, 0)
+
+    assert next_schedule_boundary(schedules, monday) == datetime(2026, 7, 7, 18, 45)
+    assert next_schedule_boundary(schedules, datetime(2026, 7, 7, 19, 0)) == datetime(2026, 7, 7, 21, 31)
+    # After the window the next one is a week later.
+    assert next_schedule_boundary(schedules, datetime(2026, 7, 7, 22, 0)) == datetime(2026, 7, 14, 18, 45)
+    assert next_schedule_boundary([], monday) is None
+    assert next_schedule_boundary([dict(schedules[0], enabled=False)], monday) is None
+
+
+def test_cec_watcher_sleeps_until_alarm_display_ends() -> None:
+    from datetime import timedelta, timezone
+
+    received_at = datetime.now(timezone.utc) - timedelta(minutes=10)
+    watcher = _watcher(_ENABLED, {"received_at": received_at.isoformat()})
+
+    delay = watcher._tick()
+
+    assert watcher._display_mode == "alarm"
+    assert delay == pytest.approx(20 * 60, abs=5)
+
+
+def test_cec_watcher_sleeps_until_idle_standby_deadline() -> None:
+    from datetime import timedelta, timezone
+
+    received_at = datetime.now(timezone.utc) - timedelta(minutes=45)
+    watcher = _watcher(_ENABLED, {"received_at": received_at.isoformat()})
+    watcher._display_mode = "alarm"
+
+    delay = watcher._tick()
+    assert delay == pytest.approx(5 * 60, abs=5)
+
+    watcher._idle_since = datetime.now(timezone.utc) - timedelta(minutes=10)
+    assert watcher._tick() is None  # standby sent, nothing left to wait for
+
+
+def test_cec_watcher_retries_failed_standby_later() -> None:
+    from datetime import timedelta, timezone
+
+    watcher = _watcher(_ENABLED, None)
+    watcher._controller.standby.return_value = False
+    watcher._idle_since = datetime.now(timezone.utc) - timedelta(minutes=10)
+
+    delay = watcher._tick()
+
+    assert delay is not None and 0 < delay <= 60
+    assert watcher._standby_sent_for_idle is False
+
+
+def test_cec_watcher_waits_for_events_when_disabled() -> None:
+    watcher = _watcher({"hdmi_cec_enabled": False}, None)
+
+    assert watcher._tick() is None
+
+
+def test_cec_watcher_reevaluates_on_settings_change() -> None:
+    import threading
+
+    settings = {"hdmi_cec_enabled": False}
+    watcher = _watcher(settings, None)
+    ticked = threading.Event()
+    original_tick = watcher._tick
+
+    def _tick():
+        result = original_tick()
+        ticked.set()
+        return result
+
+    watcher._tick = _tick  # type: ignore[method-assign]
+    watcher.start()
+    try:
+        assert ticked.wait(timeout=2)
+        ticked.clear()
+        settings["hdmi_cec_enabled"] = True
+        watcher.handle_settings_changed()
+        assert ticked.wait(timeout=2)
+        assert watcher._idle_since is not None
+    finally:
+        watcher.stop()
+
+
+_FAKE_CEC_CLIENT = """#!{python}
+import os
+import sys
+
+log = open({log!r}, "a")
+print("opening a connection to the CEC adapter...", flush=True)
+print("waiting for input", flush=True)
+power = "standby"
+for line in sys.stdin:
+    command = line.strip()
+    log.write(command + "\\n")
+    log.flush()
+    if command == "q":
+        break
+    if command.startswith("on "):
+        if os.path.exists({crash_marker!r}):
+            os.remove({crash_marker!r})
+            sys.exit(1)
+        power = "on"
+    elif command.startswith("standby "):
+        power = "standby"
+    elif command.startswith("pow "):
+        print("power status: " + power, flush=True)
+"""
+
+
+@pytest.fixture
+def fake_cec_client(tmp_path: Path):
+    """An executable stand-in for interactive cec-client; returns (path, log, crash marker)."""
+    log = tmp_path / "commands.log"
+    crash_marker = tmp_path / "crash-on-next-on"
+    script = tmp_path / "cec-client"
+    script.write_text(
+        _FAKE_CEC_CLIENT.format(python=sys.executable, log=str(log), crash_marker=str(crash_marker)),
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return script, log, crash_marker
+
+
+def test_persistent_session_reuses_one_process(fake_cec_client) -> None:
+    script, log, _ = fake_cec_client
+    controller = CecController(str(script), device_address=0, persistent=True)
+    try:
+        assert controller.wake() is True
+        assert controller.last_output.endswith("power status: on")
+        assert controller.standby() is True
+        assert controller.last_output == "power status: standby"
+        assert controller._session.starts == 1
+    finally:
+        controller.close()
+
+    assert log.read_text(encoding="utf-8").split() == [
+        "on", "0", "pow", "0", "standby", "0", "pow", "0", "q",
+    ]
+
+
+def test_persistent_session_restarts_after_crash(fake_cec_client) -> None:
+    script, _, crash_marker = fake_cec_client
+    controller = CecController(str(script), device_address=0, persistent=True)
+    try:
+        assert controller.standby() is True
+        crash_marker.touch()
+
+        # The process dies on "on"; the command is retried on a new process.
+        assert controller.wake() is True
+        assert controller._session.starts == 2
+        assert not crash_marker.exists()
+    finally:
+        controller.close()
+
+
+def test_session_reports_failure_when_client_exits_immediately(tmp_path: Path) -> None:
+    script = tmp_path / "cec-client"
+    script.write_text(f"#!{sys.executable}\nprint('unable to open the device')\n", encoding="utf-8")
+    script.chmod(0o755)
+    session = CecClientSession(str(script), start_timeout=5)
+
+    success, output = session.send("on 0", "pow 0")
+
+    assert success is False
+    assert "unable to open the device" in output
+    assert session.starts == 2
+
+
+def test_handle_alarm_stored_wakes_display_on_watcher_thread() -> None:
+    import threading
+
+    main_thread = threading.get_ident()
+    woken = threading.Event()
+    wake_threads = []
+    controller = CecController("/usr/bin/cec-client")
+    controller.available = MagicMock(return_value=False)  # type: ignore[method-assign]
+    controller.configure = MagicMock()  # type: ignore[method-assign]
+
+    def _wake() -> bool:
+        wake_threads.append(threading.get_ident())
+        woken.set()
+        return True
+
+    controller.wake = _wake  # type: ignore[method-assign]
+    watcher = _watcher(dict(_ENABLED, hdmi_cec_wake_on_alarm=True), None, controller=controller)
+    watcher.start()
+    try:
+        watcher.handle_alarm_stored()
+        assert woken.wait(timeout=2)
+    finally:
+        watcher.stop()
+
+    assert wake_threads and wake_threads[0] != main_thread
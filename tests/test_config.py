@@ -243,6 +243,7 @@ def test_load_config_reads_hdmi_cec_env_vars():
         ALARM_MONITOR_CEC_IDLE_STANDBY_MINUTES="15",
         ALARM_MONITOR_CEC_WAKE_ON_ALARM="false",
         ALARM_MONITOR_CEC_STANDBY_ON_IDLE="true",
+        ALARM_MONITOR_CEC_PERSISTENT_SESSION="false",
     ):
         app_config = config.load_config()
 
@@ -252,3 +253,4 @@ def test_load_config_reads_hdmi_cec_env_vars():
     assert app_config.cec_idle_standby_minutes == 15
     assert app_config.cec_wake_on_alarm is False
     assert app_config.cec_standby_on_idle is True
+    assert app_config.cec_persistent_session is False
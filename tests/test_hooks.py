@@ -0,0 +1,73 @@
+"""Tests for the post-commit hook pipeline of stored alarms."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from alarm_monitor.hooks import AlarmHooks
+from alarm_monitor.metrics import ALARM_HOOK_ERRORS, ALARM_HOOK_SECONDS
+
+_ALARM = {"incident_number": "4711", "keyword": "F3Y"}
+
+
+def test_inline_hooks_run_first_and_background_hooks_in_order() -> None:
+    hooks = AlarmHooks()
+    calls = []
+    hooks.register("bg-1", lambda alarm: calls.append(("bg-1", threading.current_thread().name)), background=True)
+    hooks.register("inline", lambda alarm: calls.append(("inline", threading.current_thread().name)))
+    hooks.register("bg-2", lambda alarm: calls.append(("bg-2", threading.current_thread().name)), background=True)
+
+    future = hooks.dispatch(_ALARM)
+    future.result(timeout=5)
+
+    assert [name for name, _ in calls] == ["inline", "bg-1", "bg-2"]
+    assert calls[0][1] == threading.current_thread().name
+    assert calls[1][1].startswith("alarm-hooks")
+    assert hooks.names == ["inline", "bg-1", "bg-2"]
+    hooks.shutdown()
+
+
+def test_slow_background_hook_does_not_block_dispatch() -> None:
+    hooks = AlarmHooks()
+    release = threading.Event()
+    hooks.register("hardware", lambda alarm: release.wait(timeout=5), background=True)
+
+    future = hooks.dispatch(_ALARM)
+
+    assert not future.done()
+    release.set()
+    future.result(timeout=5)
+    hooks.shutdown()
+
+
+def test_failing_hook_is_counted_and_later_hooks_still_run() -> None:
+    hooks = AlarmHooks()
+    calls = []
+
+    def _broken(alarm):
+        raise RuntimeError("adapter gone")
+
+    hooks.register("test-broken", _broken, background=True)
+    hooks.register("test-after", lambda alarm: calls.append(alarm["incident_number"]), background=True)
+    errors_before = ALARM_HOOK_ERRORS.value("test-broken")
+    timed_before = ALARM_HOOK_SECONDS.snapshot("test-after")[0]
+
+    hooks.dispatch(_ALARM)
+    hooks.flush(timeout=5)
+
+    assert calls == ["4711"]
+    assert ALARM_HOOK_ERRORS.value("test-broken") == errors_before + 1
+    assert ALARM_HOOK_SECONDS.snapshot("test-after")[0] == timed_before + 1
+    hooks.shutdown()
+
+
+def test_dispatch_without_background_hooks_returns_none() -> None:
+    hooks = AlarmHooks()
+    hooks.register("sse", lambda alarm: None)
+
+    assert hooks.dispatch(_ALARM) is None
+    hooks.shutdown()
@@ -0,0 +1,212 @@
+"""Tests for the streaming iCal parser and RRULE expansion."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from alarm_monitor.calendar_service import CalendarDownload, download_calendar, merge_upcoming_events
+from alarm_monitor.ical_parser import (
+    CalendarIndex,
+    expand_rrule,
+    iter_unfolded_lines,
+    parse_ical_events,
+)
+
+_NOW = datetime(2025, 3, 1, tzinfo=timezone.utc)
+_WINDOW_END = _NOW + timedelta(days=31)
+
+
+def _utc(*args: int) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def _calendar(*events: str) -> str:
+    body = "".join(f"BEGIN:VEVENT\r\n{event.strip()}\r\nEND:VEVENT\r\n" for event in events)
+    return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{body}END:VCALENDAR\r\n"
+
+
+def _parse(text: str, chunk_size: int = 7) -> list:
+    data = text.encode("utf-8")
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    return parse_ical_events(iter_unfolded_lines(chunks), _NOW, _WINDOW_END)
+
+
+def test_unfolding_and_utf8_survive_chunk_boundaries() -> None:
+    text = "SUMMARY:Übungs\r\n dienst Gerätehaus\r\nLOCATION:Feuerwache\r\n"
+    data = text.encode("utf-8")
+
+    for size in (1, 2, 3, 5, len(data)):
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        assert list(iter_unfolded_lines(chunks)) == [
+            "SUMMARY:Übungsdienst Gerätehaus",
+            "LOCATION:Feuerwache",
+        ]
+
+
+def test_events_outside_window_are_dropped() -> None:
+    events = _parse(_calendar(
+        "SUMMARY:Vergangen\r\nDTSTART:20190105T180000Z",
+        "SUMMARY:Dienst\r\nDTSTART:20250304T180000Z\r\nDTEND:20250304T200000Z\r\nLOCATION:Wache",
+        "SUMMARY:Zu weit\r\nDTSTART:20260101T180000Z",
+    ))
+
+    assert events == [{
+        "summary": "Dienst",
+        "start": _utc(2025, 3, 4, 18),
+        "end": _utc(2025, 3, 4, 20),
+        "location_name": "Wache",
+    }]
+
+
+def test_alarm_subcomponent_does_not_override_event_properties() -> None:
+    events = _parse(_calendar(
+        "SUMMARY:Dienst\r\nDTSTART:20250304T180000Z\r\n"
+        "BEGIN:VALARM\r\nACTION:DISPLAY\r\nDESCRIPTION:Erinnerung\r\nEND:VALARM",
+    ))
+
+    assert len(events) == 1
+    assert "description" not in events[0]
+
+
+def test_quoted_parameter_with_colon_is_skipped() -> None:
+    events = _parse(_calendar(
+        'SUMMARY:Dienst\r\nDTSTART:20250304T180000Z\r\n'
+        'DESCRIPTION;ALTREP="https://example.org/x":Ausbildung',
+    ))
+
+    assert events[0]["description"] == "Ausbildung"
+
+
+def test_weekly_rule_started_years_ago_is_expanded_inside_window() -> None:
+    events = _parse(_calendar(
+        "SUMMARY:Übungsdienst\r\nDTSTART:20150106T190000Z\r\nDTEND:20150106T210000Z\r\n"
+        "RRULE:FREQ=WEEKLY;BYDAY=TU\r\nEXDATE:20250311T190000Z",
+    ))
+
+    starts = [event["start"] for event in events]
+    assert starts == [_utc(2025, 3, 4, 19), _utc(2025, 3, 18, 19), _utc(2025, 3, 25, 19)]
+    assert all(event["end"] - event["start"] == timedelta(hours=2) for event in events)
+
+
+def test_monthly_ordinal_weekday_and_until() -> None:
+    starts = list(expand_rrule(
+        "FREQ=MONTHLY;BYDAY=2TU,-1FR;UNTIL=20250430T235959Z",
+        _utc(2025, 1, 14, 19),
+        _utc(2025, 1, 1),
+        _utc(2025, 12, 31),
+    ))
+
+    assert starts == [
+        _utc(2025, 1, 14, 19), _utc(2025, 1, 31, 19),
+        _utc(2025, 2, 11, 19), _utc(2025, 2, 28, 19),
+        _utc(2025, 3, 11, 19), _utc(2025, 3, 28, 19),
+        _utc(2025, 4, 8, 19), _utc(2025, 4, 25, 19),
+    ]
+
+
+def test_count_is_honoured_from_dtstart() -> None:
+    starts = list(expand_rrule(
+        "FREQ=DAILY;INTERVAL=2;COUNT=3",
+        _utc(2025, 2, 26, 8),
+        _NOW,
+        _WINDOW_END,
+    ))
+
+    assert starts == [_utc(2025, 2, 26, 8), _utc(2025, 2, 28, 8), _utc(2025, 3, 2, 8)]
+
+
+def test_yearly_rule_skips_missing_leap_day() -> None:
+    starts = list(expand_rrule(
+        "FREQ=YEARLY", _utc(2024, 2, 29), _utc(2024, 1, 1), _utc(2029, 1, 1)
+    ))
+
+    assert starts == [_utc(2024, 2, 29), _utc(2028, 2, 29)]
+
+
+def test_unsupported_rule_yields_first_occurrence_only() -> None:
+    start = _utc(2025, 3, 5, 12)
+
+    assert list(expand_rrule("FREQ=HOURLY", start, _NOW, _WINDOW_END)) == [start]
+    assert list(expand_rrule("FREQ=MONTHLY;BYSETPOS=-1;BYDAY=MO", start, _NOW, _WINDOW_END)) == [start]
+
+
+def test_download_calendar_parses_streamed_chunks() -> None:
+    body = _calendar(
+        "SUMMARY:Vergangen\r\nDTSTART:20200105T180000Z",
+        "SUMMARY:Dienst\r\nDTSTART:20250304T180000Z",
+    ).encode("utf-8")
+    response = MagicMock(status_code=200, headers={"ETag": '"v2"'})
+    response.iter_content.return_value = [body[i:i + 16] for i in range(0, len(body), 16)]
+
+    with patch("alarm_monitor.calendar_service.requests.get", return_value=response):
+        result = download_calendar("https://cal.example/feed.ics", now=_NOW)
+
+    assert [event["summary"] for event in result.events] == ["Dienst"]
+    assert result.etag == '"v2"'
+    response.close.assert_called_once()
+
+
+def _lines(text: str) -> list:
+    return list(iter_unfolded_lines([text.encode("utf-8")]))
+
+
+def test_index_reparses_only_changed_events() -> None:
+    def _feed(stamp: str, title: str) -> str:
+        return _calendar(*(
+            f"UID:e{day}\r\nDTSTAMP:{stamp}\r\nSUMMARY:Dienst {day}\r\nDTSTART:202503{day:02d}T180000Z"
+            for day in range(2, 10)
+        ), f"UID:changed\r\nDTSTAMP:{stamp}\r\nSUMMARY:{title}\r\nDTSTART:20250310T180000Z",
+            f"UID:old\r\nDTSTAMP:{stamp}\r\nSUMMARY:Alt\r\nDTSTART:20200101T180000Z")
+
+    first = CalendarIndex.build(_lines(_feed("20250301T000000Z", "Vorher")), _NOW)
+    second = CalendarIndex.build(_lines(_feed("20250301T001500Z", "Nachher")), _NOW, previous=first)
+
+    assert (first.parsed, first.reused) == (10, 0)
+    assert (second.parsed, second.reused) == (1, 9)
+    summaries = [event["summary"] for event in second.occurrences(_NOW, _WINDOW_END)]
+    assert summaries[-1] == "Nachher"
+    assert "Alt" not in summaries and len(summaries) == 9
+
+
+def test_index_applies_overrides_and_latest_sequence() -> None:
+    index = CalendarIndex.build(_lines(_calendar(
+        "UID:drill\r\nSUMMARY:Übung\r\nDTSTART:20250304T190000Z\r\nRRULE:FREQ=WEEKLY;COUNT=3",
+        "UID:drill\r\nRECURRENCE-ID:20250311T190000Z\r\nSUMMARY:Übung (verschoben)\r\n"
+        "DTSTART:20250312T190000Z",
+        "UID:meeting\r\nSEQUENCE:0\r\nSUMMARY:Besprechung\r\nDTSTART:20250305T190000Z",
+        "UID:meeting\r\nSEQUENCE:2\r\nSUMMARY:Besprechung neu\r\nDTSTART:20250306T190000Z",
+    )), _NOW)
+
+    events = [(event["summary"], event["start"].day) for event in index.occurrences(_NOW, _WINDOW_END)]
+    assert events == [
+        ("Übung", 4),
+        ("Besprechung neu", 6),
+        ("Übung (verschoben)", 12),
+        ("Übung", 18),
+    ]
+
+
+def test_merge_upcoming_events_merges_sorted_feeds_lazily() -> None:
+    def _feed(*days: int) -> list:
+        return [{"summary": f"d{day}", "start": _NOW + timedelta(days=day)} for day in days]
+
+    merged = merge_upcoming_events(
+        [_feed(-3, 1, 4, 40), _feed(-1, 2, 3), _feed()], max_events=3, now=_NOW
+    )
+
+    assert [event["summary"] for event in merged] == ["d1", "d2", "d3"]
+    assert merge_upcoming_events([_feed(1, 40)], now=_NOW)[-1]["summary"] == "d1"
+
+
+def test_merge_upcoming_events_bisects_stored_start_times() -> None:
+    events = [{"summary": f"d{day}", "start": _NOW + timedelta(days=day)} for day in (-3, -2, 1, 2)]
+    download = CalendarDownload(events=events)
+
+    assert download.starts == [event["start"] for event in events]
+    merged = merge_upcoming_events([download.events], now=_NOW, starts=[download.starts])
+    assert [event["summary"] for event in merged] == ["d1", "d2"]
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -12,7 +14,7 @@ import pytest
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from alarm_monitor.message_store import MessageStore
-from alarm_monitor.ntfy_client import NtfyPoller
+from alarm_monitor.ntfy_client import NtfyPoller, parse_ntfy_topics
 
 
 # ---------------------------------------------------------------------------
@@ -40,12 +42,9 @@ def test_get_active_returns_non_expired():
 def test_get_active_excludes_expired():
     store = MessageStore()
     msg = store.add("Abgelaufen", ttl_minutes=1)
-    # Manually expire by back-dating expires_at
-    with store._lock:
-        store._messages[0]["expires_at"] = (
-            datetime.now(timezone.utc) - timedelta(minutes=1)
-        ).isoformat()
-    active = store.get_active()
+    # Expiry is parsed once on insert, so move the clock instead
+    with patch("alarm_monitor.message_store.time.time", return_value=time.time() + 120):
+        active = store.get_active()
     assert active == []
 
 
@@ -163,6 +162,76 @@ def test_delete_by_source_id_returns_false_for_unknown_id():
     assert store.delete_by_source_id("seq-unknown") is False
 
 
+def test_add_with_absolute_expiry_is_idempotent_per_source_id():
+    called = []
+    store = MessageStore()
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    first = store.add_with_absolute_expiry("A", expires, source_id="seq-1")
+
+    again = store.add_with_absolute_expiry(
+        "A", expires + timedelta(minutes=5), source_id="seq-1", on_stored=lambda: called.append(True)
+    )
+
+    assert again["id"] == first["id"]
+    assert called == []
+    assert len(store.get_active()) == 1
+
+
+def test_add_with_absolute_expiry_updates_same_source_id_in_place():
+    store = MessageStore()
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    first = store.add_with_absolute_expiry("Übung 19 Uhr", expires, source_id="seq-1")
+
+    updated = store.add_with_absolute_expiry("Übung 20 Uhr", expires, source_id="seq-1")
+
+    assert updated["id"] == first["id"]
+    assert [m["text"] for m in store.get_active()] == ["Übung 20 Uhr"]
+
+
+def test_source_id_index_survives_restart(tmp_path: Path):
+    path = tmp_path / "messages.json"
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    MessageStore(persistence_path=path).add_with_absolute_expiry("A", expires, source_id="seq-1")
+
+    store = MessageStore(persistence_path=path)
+    store.add_with_absolute_expiry("A", expires, source_id="seq-1")
+
+    assert len(store.get_active()) == 1
+    assert store.delete_by_source_id("seq-1") is True
+    assert store.get_active() == []
+
+
+def test_apply_events_batches_changes_into_one_persist(tmp_path: Path):
+    store = MessageStore(persistence_path=tmp_path / "messages.json")
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    notified = []
+
+    with patch.object(store, "_persist_locked", wraps=store._persist_locked) as persist:
+        changes = store.apply_events(
+            [
+                {"action": "upsert", "text": "A", "expires_at": expires, "source_id": "seq-1"},
+                {"action": "upsert", "text": "B", "expires_at": expires, "source_id": "seq-2"},
+                {"action": "upsert", "text": "A", "expires_at": expires, "source_id": "seq-1"},
+                {"action": "delete", "source_id": "seq-1"},
+                {"action": "delete", "source_id": "seq-unknown"},
+                {"action": "unknown"},
+            ],
+            on_changed=lambda: notified.append(True),
+        )
+
+    assert changes == 3
+    assert persist.call_count == 1
+    assert notified == [True]
+    assert [m["text"] for m in store.get_active()] == ["B"]
+
+
+def test_apply_events_without_changes_does_not_persist():
+    store = MessageStore()
+    with patch.object(store, "_persist_locked") as persist:
+        assert store.apply_events([{"action": "delete", "source_id": "seq-1"}]) == 0
+    persist.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # prune_expired
 # ---------------------------------------------------------------------------
@@ -171,21 +240,59 @@ def test_delete_by_source_id_returns_false_for_unknown_id():
 def test_prune_expired_removes_expired_only():
     store = MessageStore()
     store.add("Aktiv", ttl_minutes=60)
-    expired_msg = store.add("Abgelaufen", ttl_minutes=1)
-    # Back-date the expired message
-    with store._lock:
-        for m in store._messages:
-            if m["id"] == expired_msg["id"]:
-                m["expires_at"] = (
-                    datetime.now(timezone.utc) - timedelta(minutes=1)
-                ).isoformat()
-    pruned = store.prune_expired()
+    store.add("Abgelaufen", ttl_minutes=1)
+    with patch("alarm_monitor.message_store.time.time", return_value=time.time() + 120):
+        pruned = store.prune_expired()
+        active = store.get_active()
     assert pruned == 1
-    active = store.get_active()
     assert len(active) == 1
     assert active[0]["text"] == "Aktiv"
 
 
+def test_get_active_is_cached_until_change():
+    store = MessageStore()
+    store.add("Erste", ttl_minutes=60)
+    first = store.get_active()
+    version = store.version
+
+    assert store.get_active() == first
+    assert store.version == version
+
+    store.add("Zweite", ttl_minutes=60)
+    assert [m["text"] for m in store.get_active()] == ["Zweite", "Erste"]
+    assert store.version > version
+
+
+def test_next_expiry_tracks_earliest_message():
+    store = MessageStore()
+    assert store.next_expiry() is None
+
+    store.add("Lang", ttl_minutes=60)
+    short = store.add("Kurz", ttl_minutes=5)
+    assert store.next_expiry() == datetime.fromisoformat(short["expires_at"]).timestamp()
+
+    store.delete(short["id"])
+    assert store.next_expiry() > time.time() + 50 * 60
+
+
+def test_expiry_timer_prunes_and_notifies(tmp_path: Path):
+    path = tmp_path / "messages.json"
+    store = MessageStore(persistence_path=path)
+    expired = threading.Event()
+    store.start_expiry_timer(on_expired=expired.set)
+    try:
+        store.add_with_absolute_expiry(
+            "Gleich weg", datetime.now(timezone.utc) + timedelta(milliseconds=300)
+        )
+        store.add("Bleibt", ttl_minutes=60)
+        assert expired.wait(timeout=5)
+    finally:
+        store.stop_expiry_timer()
+
+    assert [m["text"] for m in store.get_active()] == ["Bleibt"]
+    assert [m["text"] for m in MessageStore(persistence_path=path).get_active()] == ["Bleibt"]
+
+
 # ---------------------------------------------------------------------------
 # on_stored callback
 # ---------------------------------------------------------------------------
@@ -313,8 +420,8 @@ def test_ntfy_poller_applies_default_ttl_when_no_expires_in_event():
     assert timedelta(minutes=44) <= delta <= timedelta(minutes=46)
 
 
-def test_ntfy_poller_resets_last_poll_time_on_url_change():
-    """NtfyPoller should reset its poll history when the topic URL changes."""
+def test_ntfy_poller_drops_cursor_of_removed_topic_on_url_change():
+    """NtfyPoller should forget the cursor of a topic that is no longer configured."""
     store = MessageStore()
     settings = {"ntfy_topic_url": "https://ntfy.sh/topic-a", "ntfy_poll_interval": 60, "message_default_ttl_minutes": 60}
     poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
@@ -327,7 +434,7 @@ def test_ntfy_poller_resets_last_poll_time_on_url_change():
         poller._poll_once()
 
     assert poller._last_topic_url == "https://ntfy.sh/topic-a"
-    first_poll_time = poller._last_poll_time
+    assert set(poller._cursors) == {"https://ntfy.sh/topic-a"}
 
     # Change the URL
     settings["ntfy_topic_url"] = "https://ntfy.sh/topic-b"
@@ -338,6 +445,7 @@ def test_ntfy_poller_resets_last_poll_time_on_url_change():
 
     # Should have reset and used the new URL
     assert poller._last_topic_url == "https://ntfy.sh/topic-b"
+    assert set(poller._cursors) == {"https://ntfy.sh/topic-b"}
 
 
 def test_ntfy_poller_deletes_message_on_message_delete_event():
@@ -374,3 +482,197 @@ def test_ntfy_poller_deletes_message_on_deleted_flag_event():
         poller._poll_once()
 
     assert store.get_active() == []
+
+
+# ---------------------------------------------------------------------------
+# NtfyPoller – streaming subscription
+# ---------------------------------------------------------------------------
+
+
+def _stream_response(*lines: str) -> MagicMock:
+    mock_resp = MagicMock()
+    mock_resp.raise_for_status.return_value = None
+    mock_resp.iter_lines.return_value = [line.encode("utf-8") for line in lines]
+    return mock_resp
+
+
+def test_ntfy_stream_stores_messages_and_resumes_after_last_id():
+    store = MessageStore()
+    settings = _make_settings(topic_url="https://ntfy.sh/test")
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+    now = int(datetime.now(timezone.utc).timestamp())
+
+    first = _stream_response(
+        f'{{"id":"k1","time":{now},"event":"open","topic":"test"}}',
+        "",
+        f'{{"id":"m1","time":{now},"event":"message","topic":"test","message":"Erste"}}',
+        f'{{"id":"ka","time":{now},"event":"keepalive","topic":"test"}}',
+        f'{{"id":"m2","time":{now},"event":"message","topic":"test","message":"Zweite"}}',
+    )
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=first) as mock_get:
+        delay = poller._stream_once()
+
+    assert mock_get.call_args.args[0] == "https://ntfy.sh/test/json"
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert sorted(m["text"] for m in store.get_active()) == ["Erste", "Zweite"]
+    assert poller._cursors["https://ntfy.sh/test"] == {"time": now, "ids": ["m1", "m2"]}
+    assert delay == 1.0  # clean end of stream reconnects after the backoff
+    first.close.assert_called()
+
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=_stream_response()) as mock_get:
+        poller._stream_once()
+    assert mock_get.call_args.kwargs["params"] == {"since": "m2"}
+
+
+def test_ntfy_stream_backoff_grows_and_resets_after_connect():
+    import requests
+
+    store = MessageStore()
+    settings = _make_settings(topic_url="https://ntfy.sh/test")
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+
+    with patch(
+        "alarm_monitor.ntfy_client.requests.get",
+        side_effect=requests.ConnectionError("down"),
+    ):
+        delays = [poller._stream_once() for _ in range(8)]
+    assert delays == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=_stream_response()):
+        assert poller._stream_once() == 1.0
+
+
+def test_ntfy_stream_reconnect_closes_response_without_backoff():
+    store = MessageStore()
+    settings = _make_settings(topic_url="https://ntfy.sh/test")
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+
+    def _lines():
+        yield b'{"id":"m1","event":"message","message":"Vor Reconnect"}'
+        poller.reconnect()
+        raise ConnectionError("closed")
+
+    response = _stream_response()
+    response.iter_lines.side_effect = _lines
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=response):
+        delay = poller._stream_once()
+
+    assert delay == 0.0
+    assert response.close.called
+    assert [m["text"] for m in store.get_active()] == ["Vor Reconnect"]
+
+
+def test_ntfy_stream_applies_burst_as_one_batch():
+    store = MessageStore()
+    settings = _make_settings(topic_url="https://ntfy.sh/test")
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+    notified = []
+    poller._on_message = lambda: notified.append(True)
+
+    response = _stream_response(
+        *(f'{{"id":"m{i}","event":"message","message":"Nachricht {i}"}}' for i in range(5)),
+        *(f'{{"event":"message_clear","sequence_id":"m{i}"}}' for i in range(3)),
+    )
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=response), \
+            patch.object(store, "apply_events", wraps=store.apply_events) as apply_events:
+        poller._stream_once()
+
+    apply_events.assert_called_once()
+    assert notified == [True]
+    assert sorted(m["text"] for m in store.get_active()) == ["Nachricht 3", "Nachricht 4"]
+
+
+def test_ntfy_poll_mode_runs_interval_polls():
+    store = MessageStore()
+    settings = {**_make_settings(topic_url="https://ntfy.sh/test"), "ntfy_mode": "poll"}
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+
+    with patch.object(poller, "_poll_once", side_effect=poller.stop) as mock_poll, \
+            patch.object(poller, "_stream_once") as mock_stream:
+        poller._run()
+
+    mock_poll.assert_called_once()
+    mock_stream.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# NtfyPoller – multiple topics
+# ---------------------------------------------------------------------------
+
+
+def test_parse_ntfy_topics_accepts_lines_commas_and_ttls():
+    topics = parse_ntfy_topics(
+        "https://ntfy.example/base/fw-wache\nhttps://ntfy.example/base/fw-fahrzeuge,fw-uebung 240"
+    )
+
+    assert [(t.name, t.ttl_minutes) for t in topics] == [
+        ("fw-wache", None), ("fw-fahrzeuge", 240), ("fw-uebung", 240),
+    ]
+    assert {t.server for t in topics} == {"https://ntfy.example/base"}
+    assert parse_ntfy_topics("") == []
+
+    for raw in ("ftp://ntfy.sh/a", "https://ntfy.sh/a 0", "https://ntfy.sh/a b c",
+                "https://ntfy.sh/a\nhttps://other.example/b", "https://ntfy.sh/bad topic!"):
+        with pytest.raises(ValueError):
+            parse_ntfy_topics(raw)
+
+
+def test_ntfy_multi_topic_subscription_uses_per_topic_ttls_and_cursors(tmp_path: Path):
+    store = MessageStore()
+    settings = _make_settings(
+        topic_url="https://ntfy.sh/fw-wache\nhttps://ntfy.sh/fw-uebung 240", default_ttl=30
+    )
+    cursor_path = tmp_path / "ntfy_cursors.json"
+    poller = NtfyPoller(lambda: settings, store, cursor_path=cursor_path)
+    now = int(datetime.now(timezone.utc).timestamp())
+
+    response = _stream_response(
+        f'{{"id":"w1","time":{now - 5},"event":"message","topic":"fw-wache","message":"Wache"}}',
+        f'{{"id":"u1","time":{now - 2},"event":"message","topic":"fw-uebung","message":"Übung"}}',
+    )
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=response) as mock_get:
+        poller._stream_once()
+
+    assert mock_get.call_args.args[0] == "https://ntfy.sh/fw-wache,fw-uebung/json"
+    ttl = {
+        m["text"]: datetime.fromisoformat(m["expires_at"]) - datetime.now(timezone.utc)
+        for m in store.get_active()
+    }
+    assert timedelta(minutes=29) < ttl["Wache"] <= timedelta(minutes=30)
+    assert timedelta(minutes=239) < ttl["Übung"] <= timedelta(minutes=240)
+
+    # After a restart the cursors are restored: the subscription resumes at
+    # the older topic and the replayed message of the newer one is skipped.
+    restarted = NtfyPoller(lambda: settings, store, cursor_path=cursor_path)
+    replay = _stream_response(
+        f'{{"id":"u1","time":{now - 2},"event":"message","topic":"fw-uebung","message":"Übung"}}',
+        f'{{"id":"w2","time":{now - 1},"event":"message","topic":"fw-wache","message":"Neu"}}',
+    )
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=replay) as mock_get:
+        restarted._stream_once()
+
+    assert mock_get.call_args.kwargs["params"] == {"since": "w1"}
+    assert sorted(m["text"] for m in store.get_active()) == ["Neu", "Wache", "Übung"]
+    assert restarted._cursors["https://ntfy.sh/fw-wache"] == {"time": now - 1, "ids": ["w2"]}
+
+
+def test_ntfy_poll_applies_whole_response_as_one_batch():
+    store = MessageStore()
+    settings = _make_settings(topic_url="https://ntfy.sh/test")
+    poller = NtfyPoller(get_effective_settings=lambda: settings, message_store=store)
+    notified = []
+    poller._on_message = lambda: notified.append(True)
+
+    mock_resp = MagicMock()
+    mock_resp.raise_for_status.return_value = None
+    mock_resp.text = "".join(
+        f'{{"id":"m{i}","event":"message","message":"Nachricht {i}"}}\n' for i in range(5)
+    ) + "".join(f'{{"event":"message_clear","sequence_id":"m{i}"}}\n' for i in range(3))
+
+    with patch("alarm_monitor.ntfy_client.requests.get", return_value=mock_resp), \
+            patch.object(store, "apply_events", wraps=store.apply_events) as apply_events:
+        poller._poll_once()
+
+    apply_events.assert_called_once()
+    assert notified == [True]
+    assert sorted(m["text"] for m in store.get_active()) == ["Nachricht 3", "Nachricht 4"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from unittest.mock import Mock, patch
 
 import pytest
@@ -10,6 +11,7 @@ import requests
 from alarm_monitor.messenger import (
     AlarmMessenger,
     AlarmMessengerConfig,
+    ParticipantPoller,
     create_messenger,
 )
 
@@ -259,6 +261,98 @@ class TestAlarmMessenger:
         assert participants is None
 
 
+    @patch("alarm_monitor.messenger.requests.get")
+    def test_get_participants_caches_emergency_uuid(self, mock_get, messenger_config):
+        lookup_response = Mock(status_code=200)
+        lookup_response.json.return_value = {"data": [{"id": "emergency-uuid-123"}]}
+        participants_response = Mock(status_code=200)
+        participants_response.json.return_value = {"participants": []}
+        mock_get.side_effect = [lookup_response, participants_response, participants_response]
+
+        messenger = AlarmMessenger(messenger_config)
+        assert messenger.get_participants("12345") == []
+        assert messenger.get_participants("12345") == []
+
+        assert mock_get.call_count == 3
+        assert mock_get.call_args_list[2][0][0].endswith("/emergency-uuid-123/participants")
+
+    @patch("alarm_monitor.messenger.requests.get")
+    def test_get_participants_404_forgets_cached_uuid(self, mock_get, messenger_config):
+        lookup_response = Mock(status_code=200)
+        lookup_response.json.return_value = {"data": [{"id": "emergency-uuid-123"}]}
+        gone_response = Mock(status_code=404)
+        gone_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        mock_get.side_effect = [lookup_response, gone_response]
+
+        messenger = AlarmMessenger(messenger_config)
+        assert messenger.get_participants("12345") is None
+        assert "12345" not in messenger._emergency_ids
+
+
+class TestParticipantPoller:
+    """Test the shared participant poller."""
+
+    def test_get_fetches_once_and_serves_from_memory(self):
+        messenger = Mock()
+        messenger.get_participants.return_value = [{"id": "p1"}]
+        poller = ParticipantPoller(messenger)
+
+        assert poller.get("12345") == [{"id": "p1"}]
+        assert poller.get("12345") == [{"id": "p1"}]
+        messenger.get_participants.assert_called_once_with("12345")
+
+    def test_poll_bumps_version_and_notifies_only_on_change(self):
+        messenger = Mock()
+        messenger.get_participants.side_effect = [[], [], [{"id": "p1"}], None]
+        on_change = Mock()
+        poller = ParticipantPoller(messenger, on_change=on_change)
+
+        entry = poller.watch("12345")
+        for _ in range(4):
+            poller._poll("12345", entry)
+
+        assert on_change.call_count == 2
+        # A failed poll keeps serving the last known list
+        assert poller.snapshot() == {"12345": (2, [{"id": "p1"}])}
+
+    def test_first_get_failure_returns_none(self):
+        messenger = Mock()
+        messenger.get_participants.return_value = None
+        poller = ParticipantPoller(messenger)
+
+        assert poller.get("12345") is None
+        assert poller.snapshot() == {}
+
+    def test_watched_incidents_are_capped(self):
+        messenger = Mock()
+        poller = ParticipantPoller(messenger, max_incidents=2)
+
+        poller.watch("1")
+        poller.watch("2")
+        poller.watch("1")
+        poller.watch("3")
+
+        assert sorted(poller._incidents) == ["1", "3"]
+        assert not poller.is_watched("2")
+        messenger.forget.assert_called_once_with("2")
+
+    def test_background_thread_drops_idle_incidents(self):
+        messenger = Mock()
+        messenger.get_participants.return_value = []
+        poller = ParticipantPoller(messenger, interval=0.01, idle_seconds=0.05)
+        poller.start()
+        try:
+            assert poller.get("12345") == []
+            deadline = time.monotonic() + 2
+            while "12345" in poller._incidents and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            poller.stop()
+
+        assert "12345" not in poller._incidents
+        messenger.forget.assert_called_with("12345")
+
+
 class TestCreateMessenger:
     """Tests for create_messenger factory function."""
 
@@ -0,0 +1,73 @@
+"""Tests for the Prometheus instrumentation primitives."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from alarm_monitor.metrics import (
+    OUTBOUND_REQUEST_ERRORS,
+    OUTBOUND_REQUEST_SECONDS,
+    Counter,
+    Histogram,
+    track_outbound,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    hist = Histogram("test_seconds", "Test histogram", label="endpoint", buckets=(0.1, 1.0))
+    hist.observe(0.05, "a")
+    hist.observe(0.5, "a")
+    hist.observe(5.0, "a")
+
+    lines = hist.render()
+    assert 'test_seconds_bucket{endpoint="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{endpoint="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{endpoint="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{endpoint="a"} 3' in lines
+
+
+def test_histogram_folds_excess_labels_into_other() -> None:
+    hist = Histogram("bounded_seconds", "Bounded", label="endpoint", max_series=3)
+    for index in range(10):
+        hist.observe(0.01, f"endpoint-{index}")
+
+    assert sorted(hist._series) == ["endpoint-0", "endpoint-1", "other"]
+    assert hist.snapshot("other")[0] == 8
+
+
+def test_counter_is_thread_safe() -> None:
+    counter = Counter("test_total", "Test counter", label="kind")
+
+    def _work() -> None:
+        for _ in range(1000):
+            counter.inc("x")
+
+    threads = [threading.Thread(target=_work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value("x") == 4000
+
+
+def test_track_outbound_counts_errors_and_reraises() -> None:
+    errors_before = OUTBOUND_REQUEST_ERRORS.value("ors")
+    calls_before = OUTBOUND_REQUEST_SECONDS.snapshot("ors")[0]
+
+    with pytest.raises(RuntimeError):
+        with track_outbound("ors"):
+            raise RuntimeError("boom")
+    with track_outbound("ors") as call:
+        call.fail()
+    with track_outbound("ors"):
+        pass
+
+    assert OUTBOUND_REQUEST_ERRORS.value("ors") == errors_before + 2
+    assert OUTBOUND_REQUEST_SECONDS.snapshot("ors")[0] == calls_before + 3
@@ -0,0 +1,174 @@
+"""Tests for the offline road graph and its build script."""
+
+from __future__ import annotations
+
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from alarm_monitor.road_graph import RoadGraph, RoadGraphError, load_road_graph
+
+_STEP = 0.001  # ~110 m
+
+
+def _grid(size: int, oneway_row: int = -1) -> RoadGraph:
+    """Street grid; row *oneway_row* can only be driven eastwards."""
+    nodes = [(50.0 + row * _STEP, 9.0 + col * _STEP) for row in range(size) for col in range(size)]
+    edges = []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            if col + 1 < size:
+                duration = 8.0 if row == 0 else 13.0
+                edges.append((node, node + 1, duration, 72.0, f"Straße {row}", ()))
+                if row != oneway_row:
+                    edges.append((node + 1, node, duration, 72.0, f"Straße {row}", ()))
+            if row + 1 < size:
+                edges.append((node, node + size, 13.0, 111.0, f"Weg {col}", ()))
+                edges.append((node + size, node, 13.0, 111.0, f"Weg {col}", ()))
+    return RoadGraph.from_edges(nodes, edges)
+
+
+@pytest.fixture(scope="module")
+def build_script():
+    spec = importlib.util.spec_from_file_location(
+        "build_road_graph", ROOT / "scripts" / "build_road_graph.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules["build_road_graph"] = module
+    spec.loader.exec_module(module)
+    yield module
+    sys.modules.pop("build_road_graph", None)
+
+
+def test_route_has_openrouteservice_shape() -> None:
+    graph = _grid(4)
+
+    data = graph.route(50.0, 9.0, 50.0 + 3 * _STEP, 9.0 + 3 * _STEP)
+
+    route = data["routes"][0]
+    coordinates = route["geometry"]["coordinates"]
+    assert coordinates[0] == [9.0, 50.0]
+    assert coordinates[-1] == pytest.approx([9.0 + 3 * _STEP, 50.0 + 3 * _STEP])
+    # Along the fast first street, then north on "Weg 3"
+    assert route["summary"]["duration"] == pytest.approx(3 * 8.0 + 3 * 13.0)
+    steps = route["segments"][0]["steps"]
+    assert [step["instruction"] for step in steps] == [
+        "Abfahrt auf Straße 0",
+        "Links abbiegen auf Weg 3",
+        "Ziel erreicht",
+    ]
+    assert steps[0]["way_points"] == [0, 3]
+    assert steps[1]["way_points"] == [3, 6]
+
+
+def test_oneway_street_is_respected() -> None:
+    graph = _grid(3, oneway_row=0)
+
+    path = graph.shortest_path(2, 0)
+
+    assert path is not None
+    assert sum(graph._durations[edge] for edge in path) > 2 * 8.0
+
+
+def test_hierarchy_matches_astar() -> None:
+    graph = _grid(8, oneway_row=3)
+    graph.contract()
+    rng = random.Random(7)
+
+    for _ in range(50):
+        source = rng.randrange(graph.node_count)
+        target = rng.randrange(graph.node_count)
+        fast = graph.shortest_path(source, target)
+        reference = graph._astar_path(source, target) if source != target else []
+        assert sum(graph._durations[e] for e in fast) == pytest.approx(
+            sum(graph._durations[e] for e in reference)
+        )
+        node = source
+        for edge in fast:
+            assert graph._offsets[node] <= edge < graph._offsets[node + 1]
+            node = graph._targets[edge]
+        assert node == target
+
+
+def test_points_far_from_the_graph_are_not_routed() -> None:
+    graph = _grid(3)
+
+    assert graph.route(50.0, 9.0, 51.0, 9.0) is None
+
+
+def test_save_and_load_round_trip(tmp_path: Path) -> None:
+    graph = _grid(4)
+    graph.contract()
+    path = tmp_path / "graph.json.gz"
+
+    graph.save(path)
+    loaded = RoadGraph.load(path)
+
+    assert loaded.has_hierarchy
+    assert loaded.route(50.0, 9.0, 50.003, 9.003) == graph.route(50.0, 9.0, 50.003, 9.003)
+
+
+def test_invalid_graph_file_disables_offline_routing(tmp_path: Path) -> None:
+    path = tmp_path / "graph.json.gz"
+    path.write_bytes(b"not gzip")
+
+    with pytest.raises(RoadGraphError):
+        RoadGraph.load(path)
+    assert load_road_graph(str(path)) is None
+    assert load_road_graph(None) is None
+
+
+_OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="50.000" lon="9.000"/>
+  <node id="2" lat="50.001" lon="9.000"/>
+  <node id="3" lat="50.002" lon="9.000"/>
+  <node id="4" lat="50.003" lon="9.000"/>
+  <node id="5" lat="50.003" lon="9.001"/>
+  <node id="6" lat="50.000" lon="9.001"/>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/><nd ref="4"/>
+    <tag k="highway" v="residential"/><tag k="name" v="Hauptstraße"/>
+  </way>
+  <way id="11">
+    <nd ref="4"/><nd ref="5"/>
+    <tag k="highway" v="service"/><tag k="oneway" v="yes"/>
+  </way>
+  <way id="12">
+    <nd ref="1"/><nd ref="6"/>
+    <tag k="highway" v="footway"/>
+  </way>
+</osm>
+"""
+
+
+def test_build_script_collapses_chains_and_keeps_oneways(build_script, tmp_path: Path) -> None:
+    extract = tmp_path / "district.osm"
+    extract.write_text(_OSM, encoding="utf-8")
+    output = tmp_path / "graph.json.gz"
+
+    assert build_script.main([str(extract), str(output)]) == 0
+    graph = RoadGraph.load(output)
+
+    # Junctions 1, 4 and 5; the footway is dropped.
+    assert graph.node_count == 3
+    assert graph.edge_count == 3  # Hauptstraße both ways, service road one way
+    route = graph.route(50.0, 9.0, 50.003, 9.001)["routes"][0]
+    assert len(route["geometry"]["coordinates"]) == 5
+    assert route["segments"][0]["steps"][0]["instruction"] == "Abfahrt auf Hauptstraße"
+    assert graph.route(50.003, 9.001, 50.0, 9.0) is None
+
+
+def test_way_speed_uses_maxspeed_and_skips_private_roads(build_script) -> None:
+    assert build_script.way_speed({"highway": "primary", "maxspeed": "50"}) == 50
+    assert build_script.way_speed({"highway": "primary", "maxspeed": "DE:urban"}) == 80
+    assert build_script.way_speed({"highway": "residential", "access": "private"}) is None
+    assert build_script.way_speed({"highway": "cycleway"}) is None
@@ -0,0 +1,136 @@
+"""Tests for the route cache and route precomputation."""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from alarm_monitor.alarm_processor import process_alarm
+from alarm_monitor.route_cache import RouteCache, RoutingError, fetch_route
+
+_ROUTE = {"features": [{"geometry": {"coordinates": [[9.0, 50.0], [9.1, 50.1]]}}]}
+
+
+class _InlineExecutor:
+    """Executor stand-in running submitted work immediately."""
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+def test_route_is_served_from_cache_for_rounded_coordinates() -> None:
+    cache = RouteCache()
+
+    with patch("alarm_monitor.route_cache.fetch_route", return_value=_ROUTE) as mock_fetch:
+        first = cache.get_route("key", 50.0, 9.0, 50.123451, 9.123449)
+        second = cache.get_route("key", 50.0, 9.0, 50.12346, 9.12344)
+
+    assert first == second == _ROUTE
+    mock_fetch.assert_called_once()
+
+
+def test_least_recently_used_route_is_evicted() -> None:
+    cache = RouteCache(max_entries=2)
+
+    with patch("alarm_monitor.route_cache.fetch_route", return_value=_ROUTE) as mock_fetch:
+        cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+        cache.get_route("key", 50.0, 9.0, 50.2, 9.2)
+        cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+        cache.get_route("key", 50.0, 9.0, 50.3, 9.3)
+        cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+        cache.get_route("key", 50.0, 9.0, 50.2, 9.2)
+
+    assert mock_fetch.call_count == 4
+
+
+def test_expired_route_is_fetched_again() -> None:
+    cache = RouteCache(ttl_minutes=1)
+
+    with patch("alarm_monitor.route_cache.fetch_route", return_value=_ROUTE) as mock_fetch:
+        cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+        with patch("alarm_monitor.route_cache.time.monotonic", return_value=time.monotonic() + 61):
+            cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+
+    assert mock_fetch.call_count == 2
+
+
+def test_failed_route_is_not_cached() -> None:
+    cache = RouteCache()
+
+    with patch("alarm_monitor.route_cache.fetch_route", side_effect=RoutingError("Routing service error")):
+        with pytest.raises(RoutingError):
+            cache.get_route("key", 50.0, 9.0, 50.1, 9.1)
+        assert cache.prefetch("key", 50.0, 9.0, 50.1, 9.1) is None
+
+    with patch("alarm_monitor.route_cache.fetch_route", return_value=_ROUTE) as mock_fetch:
+        assert cache.get_route("key", 50.0, 9.0, 50.1, 9.1) == _ROUTE
+    mock_fetch.assert_called_once()
+
+
+def test_concurrent_requests_share_one_fetch() -> None:
+    cache = RouteCache()
+    release = threading.Event()
+    calls = []
+
+    def _fetch(*args, **kwargs):
+        calls.append(args)
+        release.wait(timeout=5)
+        return _ROUTE
+
+    results = []
+    with patch("alarm_monitor.route_cache.fetch_route", side_effect=_fetch):
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_route("key", 50.0, 9.0, 50.1, 9.1)))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [_ROUTE] * 3
+
+
+def test_fetch_route_raises_on_error_status() -> None:
+    response = MagicMock(status_code=403)
+    with patch("alarm_monitor.route_cache.requests.post", return_value=response):
+        with pytest.raises(RoutingError, match="Routing service error"):
+            fetch_route("key", 50.0, 9.0, 50.1, 9.1)
+
+    with patch("alarm_monitor.route_cache.requests.post", side_effect=OSError("down")):
+        with pytest.raises(RoutingError, match="Routing service unavailable"):
+            fetch_route("key", 50.0, 9.0, 50.1, 9.1)
+
+
+def test_process_alarm_precomputes_route_from_station() -> None:
+    store = MagicMock()
+    store.has_incident_number.return_value = False
+    route_cache = MagicMock()
+    config = SimpleNamespace(
+        ors_api_key="ors-key",
+        weather_base_url="https://weather.example",
+        weather_params="",
+        nominatim_base_url="https://nominatim.example",
+    )
+    settings = {"activation_groups": [], "default_latitude": 50.0, "default_longitude": 9.0}
+    alarm = {"incident_number": "4711", "keyword": "F3Y", "latitude": 50.5, "longitude": 9.5}
+
+    with patch("alarm_monitor.weather.fetch_weather", return_value=None):
+        stored = process_alarm(
+            alarm, store, config, lambda: settings, _InlineExecutor(), route_cache=route_cache
+        )
+
+    assert stored
+    route_cache.prefetch.assert_called_once_with("ors-key", 50.0, 9.0, 50.5, 9.5)
+
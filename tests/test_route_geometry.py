@@ -0,0 +1,138 @@
+"""Tests for route simplification and compact route responses."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from alarm_monitor.route_geometry import (
+    compact_route,
+    decode_polyline,
+    encode_polyline,
+    simplify,
+    tolerance_for_zoom,
+)
+
+
+def _winding_road(points: int = 400) -> list:
+    """A road with gentle curves and sub-meter GPS noise, as [lon, lat]."""
+    return [
+        [9.0 + index * 0.0001, 50.0 + 0.002 * math.sin(index / 40) + 0.000002 * (-1) ** index]
+        for index in range(points)
+    ]
+
+
+def _ors_response(coordinates: list) -> dict:
+    middle = len(coordinates) // 2
+    last = len(coordinates) - 1
+    steps = [
+        {"distance": 1000.0, "duration": 60.0, "type": 11, "instruction": "Abfahrt", "name": "A",
+         "way_points": [0, middle]},
+        {"distance": 1000.0, "duration": 60.0, "type": 1, "instruction": "Rechts abbiegen",
+         "name": "B", "way_points": [middle, last]},
+        {"distance": 0.0, "duration": 0.0, "type": 10, "instruction": "Ziel erreicht", "name": "-",
+         "way_points": [last, last]},
+    ]
+    return {
+        "bbox": [9.0, 50.0, 9.1, 50.1],
+        "routes": [{
+            "summary": {"distance": 2000.0, "duration": 120.0},
+            "segments": [{"distance": 2000.0, "duration": 120.0, "steps": steps}],
+            "bbox": [9.0, 50.0, 9.1, 50.1],
+            "geometry": encode_polyline(coordinates),
+            "way_points": [0, last],
+        }],
+        "metadata": {"attribution": "openrouteservice.org", "query": {"coordinates": []}},
+    }
+
+
+def test_polyline_round_trip_matches_reference_encoding() -> None:
+    # Example from the Google encoded polyline documentation.
+    coordinates = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+
+    encoded = encode_polyline(coordinates)
+
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(encoded) == coordinates
+
+
+def test_simplify_keeps_endpoints_anchors_and_shape() -> None:
+    coordinates = _winding_road()
+    tolerance = 2.0
+
+    kept = simplify(coordinates, tolerance, keep=[123])
+
+    assert kept[0] == 0 and kept[-1] == len(coordinates) - 1
+    assert 123 in kept
+    assert len(kept) < len(coordinates) / 4
+    # Every dropped point lies within the tolerance of the simplified line.
+    scale = 111_195 * math.cos(math.radians(50.0))
+    for first, last in zip(kept, kept[1:]):
+        (ax, ay), (bx, by) = coordinates[first], coordinates[last]
+        for lon, lat in coordinates[first + 1:last]:
+            cross = (bx - ax) * scale * (lat - ay) * 111_195 - (by - ay) * 111_195 * (lon - ax) * scale
+            length = math.hypot((bx - ax) * scale, (by - ay) * 111_195)
+            assert abs(cross) / length <= tolerance + 0.01
+
+
+def test_simplify_collapses_straight_lines() -> None:
+    line = [[9.0 + index * 0.001, 50.0] for index in range(10)]
+
+    assert simplify(line, 1.0) == [0, 9]
+
+
+def test_tolerance_is_one_pixel_at_the_map_zoom() -> None:
+    assert tolerance_for_zoom(16, 0.0) == pytest.approx(2.389, abs=0.001)
+    assert tolerance_for_zoom(17, 50.0) == pytest.approx(tolerance_for_zoom(16, 50.0) / 2)
+
+
+def test_compact_route_strips_fields_and_remaps_way_points() -> None:
+    coordinates = _winding_road()
+    data = _ors_response(coordinates)
+
+    compact = compact_route(data, zoom=16)
+
+    assert set(compact) == {"routes"}
+    route = compact["routes"][0]
+    assert set(route) == {"summary", "segments", "geometry"}
+    assert route["summary"] == {"distance": 2000.0, "duration": 120.0}
+    line = route["geometry"]["coordinates"]
+    assert len(line) < len(coordinates) / 4
+    steps = route["segments"][0]["steps"]
+    assert [step["instruction"] for step in steps] == ["Abfahrt", "Rechts abbiegen", "Ziel erreicht"]
+    middle = steps[0]["way_points"][1]
+    assert line[middle] == pytest.approx(coordinates[len(coordinates) // 2], abs=1e-5)
+    assert steps[2]["way_points"] == [len(line) - 1, len(line) - 1]
+    assert "name" not in steps[0]
+
+
+def test_compact_route_encodes_polyline_geometry() -> None:
+    coordinates = _winding_road()
+
+    compact = compact_route(_ors_response(coordinates), encoded=True)
+    route = compact["routes"][0]
+
+    assert route["geometry_precision"] == 5
+    decoded = decode_polyline(route["geometry"])
+    assert decoded[0] == pytest.approx(coordinates[0], abs=1e-5)
+    assert decoded[-1] == pytest.approx(coordinates[-1], abs=1e-5)
+
+
+def test_compact_route_accepts_geojson_and_passes_unknown_data_through() -> None:
+    geojson = {
+        "features": [{
+            "geometry": {"type": "LineString", "coordinates": [[9.0, 50.0], [9.001, 50.0], [9.002, 50.0]]},
+            "properties": {"summary": {"distance": 143.0, "duration": 20.0}, "segments": []},
+        }],
+    }
+
+    compact = compact_route(geojson)
+
+    assert compact["routes"][0]["geometry"]["coordinates"] == [[9.0, 50.0], [9.002, 50.0]]
+    assert compact["routes"][0]["summary"]["distance"] == 143.0
+    assert compact_route({"error": "x"}) == {"error": "x"}
@@ -0,0 +1,58 @@
+"""Startup audit: keep oversized modules off the import path.
+
+Byte-compiling and importing very large modules (e.g. embedded base64 assets)
+slows cold starts noticeably on Raspberry Pi SD cards.  Binary assets belong
+in ``alarm_monitor/static`` instead.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MAX_MODULE_SOURCE_BYTES = 256 * 1024
+
+_PROBE = """
+import json, os, sys
+sys.path.insert(0, {root!r})
+from alarm_monitor.app import create_app  # noqa: F401
+sizes = {{}}
+for name, module in list(sys.modules.items()):
+    path = getattr(module, "__file__", None)
+    if path and path.endswith(".py") and os.path.exists(path):
+        sizes[name] = os.path.getsize(path)
+print(json.dumps(sizes))
+"""
+
+
+def test_no_oversized_module_is_imported_at_startup() -> None:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(root=str(ROOT))],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        timeout=60,
+    )
+    sizes = json.loads(result.stdout.strip().splitlines()[-1])
+
+    oversized = {
+        name: size for name, size in sizes.items() if size > MAX_MODULE_SOURCE_BYTES
+    }
+    assert not oversized, f"Modules above {MAX_MODULE_SOURCE_BYTES} bytes imported at startup: {oversized}"
+
+
+def test_package_ships_no_oversized_modules() -> None:
+    package = ROOT / "alarm_monitor"
+    oversized = [
+        str(path.relative_to(ROOT))
+        for path in package.rglob("*.py")
+        if path.stat().st_size > MAX_MODULE_SOURCE_BYTES
+    ]
+    assert not oversized
@@ -0,0 +1,172 @@
+"""Tests for content-addressed static assets and the logo endpoint."""
+
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from alarm_monitor import app as app_module
+from alarm_monitor.config import AppConfig
+from alarm_monitor.static_assets import IMMUTABLE_MAX_AGE, file_digest
+
+_PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture
+def flask_app(tmp_path: Path):
+    with (
+        patch("alarm_monitor.geocode.geocode_location", return_value=None),
+        patch("alarm_monitor.weather.fetch_weather", return_value=None),
+    ):
+        application = app_module.create_app(
+            AppConfig(
+                api_key="test-secret-key",
+                settings_password="test-settings-password",
+                history_file=str(tmp_path / "history.json"),
+                settings_file=str(tmp_path / "settings.json"),
+                messages_file=str(tmp_path / "messages.json"),
+            )
+        )
+        application.config["TESTING"] = True
+        yield application
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
+
+
+def test_file_digest_changes_with_content(tmp_path: Path) -> None:
+    path = tmp_path / "asset.bin"
+    path.write_bytes(b"one")
+    first = file_digest(path)
+    assert file_digest(path) == first
+    path.write_bytes(b"two!")
+    assert file_digest(path) != first
+
+
+def test_versioned_crest_is_immutable_with_strong_etag(client) -> None:
+    location = client.get("/api/logo").headers["Location"]
+    match = re.search(r"v=([0-9a-f]+)", location)
+    assert match is not None
+
+    response = client.get(location)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{match.group(1)}"'
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == IMMUTABLE_MAX_AGE
+    assert "Expires" not in response.headers
+
+    revalidated = client.get(location, headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_unversioned_static_file_is_not_immutable(client) -> None:
+    response = client.get("/static/img/crest.png?v=stale")
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    assert response.headers["ETag"].startswith('"')
+
+
+def test_static_path_traversal_is_rejected(client) -> None:
+    assert client.get("/static/../app.py").status_code == 404
+    assert client.get("/static/img/missing.png").status_code == 404
+
+
+def test_pages_link_custom_logo_by_content_version(client, flask_app) -> None:
+    logo_dir = Path(flask_app.config["LOGO_DIR"])
+    (logo_dir / "custom_logo.png").write_bytes(_PNG)
+    flask_app.config["SETTINGS_STORE"].update({"logo_filename": "custom_logo.png"})
+
+    html = client.get("/").get_data(as_text=True)
+    match = re.search(r'src="(/api/logo\?v=([0-9a-f]+))"', html)
+    assert match is not None
+
+    response = client.get(match.group(1))
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.headers["ETag"] == f'"{match.group(2)}"'
+
+    unversioned = client.get("/api/logo")
+    assert not unversioned.cache_control.immutable
+    assert "no-store" not in unversioned.headers["Cache-Control"]
+    assert client.get(
+        "/api/logo", headers={"If-None-Match": unversioned.headers["ETag"]}
+    ).status_code == 304
+
+
+def test_precompress_writes_variants_and_skips_small_files(tmp_path: Path) -> None:
+    from alarm_monitor.static_assets import precompress_static
+
+    (tmp_path / "app.js").write_text("console.log('alarm');\n" * 200, encoding="utf-8")
+    (tmp_path / "tiny.css").write_text("a{}", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(_PNG * 100)
+
+    stats = precompress_static(tmp_path)
+
+    assert (tmp_path / "app.js.gz").exists()
+    assert not (tmp_path / "tiny.css.gz").exists()
+    assert not (tmp_path / "logo.png.gz").exists()
+    assert stats["written"] >= 1
+    assert precompress_static(tmp_path)["written"] == 0
+
+
+def test_static_serves_precompressed_variant_by_accept_encoding(client, flask_app, tmp_path: Path) -> None:
+    import gzip
+
+    from alarm_monitor.static_assets import precompress_static
+
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    source = "window.alarm = true;\n" * 200
+    (static_dir / "app.js").write_text(source, encoding="utf-8")
+    precompress_static(static_dir)
+    flask_app.static_folder = str(static_dir)
+
+    with flask_app.test_request_context():
+        from alarm_monitor.static_assets import static_url
+        url = static_url("app.js")
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Content-Type"].startswith("text/javascript")
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert compressed.headers["ETag"].endswith('-gz"')
+    assert compressed.cache_control.immutable
+    assert gzip.decompress(compressed.data).decode("utf-8") == source
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_data(as_text=True) == source
+    assert plain.headers["ETag"] != compressed.headers["ETag"]
+
+
+def test_stale_variant_is_not_served(client, flask_app, tmp_path: Path) -> None:
+    import os
+
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    source = static_dir / "app.css"
+    source.write_text("body{color:red}\n" * 200, encoding="utf-8")
+    variant = static_dir / "app.css.gz"
+    variant.write_bytes(b"stale")
+    stat = source.stat()
+    os.utime(variant, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+    flask_app.static_folder = str(static_dir)
+
+    response = client.get("/static/app.css", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True).startswith("body{")
+
+
+def test_asset_url_uses_content_digest(client) -> None:
+    html = client.get("/").get_data(as_text=True)
+    match = re.search(r'src="/static/js/dashboard\.js\?v=([0-9a-f]+)"', html)
+    assert match is not None
+    assert len(match.group(1)) == 16
@@ -10,7 +10,7 @@ import pytest
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from alarm_monitor.storage import AlarmStore
+from alarm_monitor.storage import AlarmStore, SettingsStore
 
 
 def test_alarm_store_persists_and_restores_history(tmp_path):
@@ -178,3 +178,63 @@ def test_latest_persists_most_recent_by_date_across_restart(tmp_path):
     assert latest is not None
     assert latest["alarm"]["incident_number"] == "NEW"
 
+
+
+def test_settings_store_snapshot_is_cached_until_update(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(path, defaults={"name": "FF", "groups": ["A"]})
+
+    first = store.effective()
+    assert dict(first) == {"name": "FF", "groups": ["A"]}
+    assert store.effective() is first
+    with pytest.raises(TypeError):
+        first["name"] = "changed"  # type: ignore[index]
+
+    store.update({"name": "FF Test", "unknown": 1})
+
+    second = store.effective()
+    assert second is not first
+    assert dict(second) == {"name": "FF Test", "groups": ["A"]}
+    assert store.version == 1
+    assert dict(SettingsStore(path, defaults={"name": "FF"}).effective()) == {"name": "FF Test"}
+
+
+def test_settings_store_notifies_subscribers_of_changed_keys():
+    store = SettingsStore(defaults={"ntfy_topic_url": None, "ntfy_mode": "stream"})
+    calls = []
+    unsubscribe = store.subscribe(lambda snapshot, changed: calls.append((snapshot, changed)))
+
+    store.update({"ntfy_topic_url": "https://ntfy.example/fw"})
+    store.update({"ntfy_topic_url": "https://ntfy.example/fw", "ntfy_mode": "stream"})
+
+    assert len(calls) == 1
+    snapshot, changed = calls[0]
+    assert changed == {"ntfy_topic_url"}
+    assert snapshot is store.effective()
+
+    unsubscribe()
+    store.update({"ntfy_mode": "poll"})
+    assert len(calls) == 1
+    assert store.version == 2
+
+
+def test_update_many_matches_sequential_updates(tmp_path):
+    path = tmp_path / "history.json"
+    store = AlarmStore(persistence_path=path)
+    payloads = [
+        {"alarm": {"incident_number": "A-1", "timestamp": "2024-05-01T10:00:00+00:00"}},
+        {"alarm": {"incident_number": "A-2", "timestamp": "2024-05-01T09:00:00+00:00"}},
+    ]
+
+    store.update_many(payloads)
+    store.update_enrichment_many({
+        "A-1": ({"lat": 50.0, "lon": 9.0}, {"temperature": 12}),
+        "A-2": ({"lat": 51.0, "lon": 9.5}, None),
+    })
+
+    assert [entry["alarm"]["incident_number"] for entry in store.history()] == ["A-2", "A-1"]
+    assert store.latest()["alarm"]["incident_number"] == "A-1"
+    assert store.latest()["weather"] == {"temperature": 12}
+    assert store.has_incident_number("A-2")
+    restored = AlarmStore(persistence_path=path)
+    assert [entry["coordinates"]["lat"] for entry in restored.history()] == [51.0, 50.0]
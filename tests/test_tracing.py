@@ -0,0 +1,77 @@
+"""Tests for end-to-end alarm latency tracing."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from alarm_monitor.tracing import AlarmTracer
+
+
+def test_uncommitted_trace_is_not_visible() -> None:
+    tracer = AlarmTracer()
+    trace = tracer.begin("T-1")
+    trace.mark("validated")
+
+    assert tracer.get("T-1") is None
+    assert tracer.mark("T-1", "rendered") is False
+
+
+def test_commit_records_spans_in_order() -> None:
+    tracer = AlarmTracer()
+    trace = tracer.begin("T-1")
+    trace.mark("validated")
+    trace.mark("stored")
+    tracer.commit(trace)
+    assert tracer.mark("T-1", "rendered") is True
+
+    spans = [span["span"] for span in tracer.get("T-1")["spans"]]
+    assert spans == ["received", "validated", "stored", "rendered"]
+
+
+def test_unknown_span_names_are_ignored() -> None:
+    tracer = AlarmTracer()
+    trace = tracer.begin("T-1")
+    tracer.commit(trace)
+    tracer.mark("T-1", "bogus")
+
+    assert [span["span"] for span in tracer.get("T-1")["spans"]] == ["received"]
+
+
+def test_retained_incidents_are_bounded() -> None:
+    tracer = AlarmTracer(max_incidents=3)
+    for index in range(5):
+        tracer.commit(tracer.begin(f"T-{index}"))
+
+    assert [t["incident_number"] for t in tracer.recent()] == ["T-4", "T-3", "T-2"]
+
+
+def test_repeated_beacons_keep_earlier_spans() -> None:
+    tracer = AlarmTracer()
+    trace = tracer.begin("T-1")
+    trace.mark("validated")
+    trace.mark("stored")
+    tracer.commit(trace)
+    for _ in range(100):
+        assert tracer.mark("T-1", "rendered") is True
+
+    spans = [span["span"] for span in tracer.get("T-1")["spans"]]
+    assert spans == ["received", "validated", "stored", "rendered"]
+    assert set(tracer.percentiles()) == {"received", "validated", "stored", "rendered"}
+
+
+def test_percentiles_use_first_occurrence_per_incident() -> None:
+    tracer = AlarmTracer()
+    for index in range(4):
+        trace = tracer.begin(f"T-{index}")
+        trace._spans["stored"] = float(index + 1)
+        trace.mark("stored")
+        tracer.commit(trace)
+
+    stats = tracer.percentiles()["stored"]
+    assert stats["count"] == 4
+    assert stats["quantiles"][0.5] == 2.0
+    assert stats["quantiles"][0.99] == 4.0
+    assert any('span="stored",quantile="0.95"' in line for line in tracer.render_metrics())